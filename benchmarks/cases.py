@@ -0,0 +1,229 @@
+######################################################################
+# The benchmarks run by run.py. Each one is a function that takes its
+# parameters, sets up a game or view in that state, and returns a
+# function doing the one thing being measured, which is then called
+# over and over. Anything the measured function changes is undone by
+# it, so every call does the same work.
+#
+# CASES lists each benchmark with the parameters it is run at. The
+# hot paths of a tick, drawing, event dispatch, settings and text are
+# measured at a few trail lengths and board sizes, since those are what
+# grow as a match goes on.
+######################################################################
+
+import itertools
+
+import pygame
+from pygame.locals import *
+
+from pydroid import modules, settings, utils, views
+
+from GameView import GameView
+from LineRider import Direction, LineRider
+from Simulation import TronSimulation
+
+BOARDS = [(64, 48), (128, 96), (256, 192)]
+TRAILS = [100, 1000, 10000]
+
+# Stands in as the parent of the modules of the benchmarks, so that each
+# draws on a surface of its own size. There is only one display, and a
+# module made later would change it under the earlier ones.
+class Offscreen(object):
+    def __init__(self, size):
+        self.screen = pygame.Surface(size)
+
+# Returns a module that draws on its own surface of size.
+def offscreenModule(size):
+    return modules.Module(Offscreen(size))
+
+# Gives the rider at index in sim a trail of length blocks, going back and
+# forth across the rows from the top left, and points it down at the free
+# row below its head. Returns False if the trail does not fit.
+def layTrail(sim, index, length):
+    if length > sim.width * (sim.height - 1):
+        return False
+
+    rider = sim.riders[index]
+    for i in range(1, length):
+        y, x = divmod(i, sim.width)
+        if y % 2:
+            x = sim.width - 1 - x
+
+        rider.place(x, y)
+        sim.arena.occupy(x, y, index + 1)
+
+    rider.direction = Direction.BOTTOM
+    return True
+
+# A game of one rider starting in the top left corner. dim is the size of
+# a block in pixels.
+def soloGame(board, trail, dim=1):
+    sim = TronSimulation(board[0], board[1])
+    sim.addRider(LineRider(0, 0, Direction.RIGHT, dim))
+
+    return sim if layTrail(sim, 0, trail) else None
+
+# Moves a rider a block and checks it against the arena.
+def tick(board, trail):
+    sim = soloGame(board, trail)
+    if sim is None:
+        return None
+
+    rider = sim.riders[0]
+    def run():
+        rider.update()
+        rider.checkAlive(sim.arena)
+        del rider.cells[-2:]
+
+    return run
+
+# Steps a whole game, which also resolves the collisions, and puts it back.
+def step(board, trail):
+    sim = soloGame(board, trail)
+    if sim is None:
+        return None
+
+    snapshot = sim.snapshot()
+    def run():
+        sim.step()
+        sim.restore(snapshot)
+
+    return run
+
+# Steps a free for all of that many riders and puts it back. This should
+# cost the same per rider however many there are.
+def stepRiders(riders):
+    sim = TronSimulation.freeForAll(256, 192, riders)
+
+    snapshot = sim.snapshot()
+    def run():
+        sim.step()
+        sim.restore(snapshot)
+
+    return run
+
+# Draws a whole trail onto a surface.
+def drawRider(trail):
+    board = BOARDS[-1]
+    sim = soloGame(board, trail, GameView.DIM)
+    surface = pygame.Surface((board[0] * GameView.DIM,
+                              board[1] * GameView.DIM))
+
+    rider = sim.riders[0]
+    return lambda: rider.draw(surface)
+
+# Draws a whole frame of a game whose first rider has a trail.
+def drawGame(board, trail):
+    module = offscreenModule((board[0] * GameView.DIM,
+                              board[1] * GameView.DIM))
+    view = GameView(module, board)
+    if not layTrail(view.sim, 0, trail):
+        return None
+
+    # The chunks of the trail are made by the first draw.
+    view.draw()
+    return view.draw
+
+# Draws a whole frame of a game on a board of any size through a window of
+# the usual size, with the camera in the middle of the board. The cost
+# should not grow with the board.
+def drawBoard(board):
+    module = offscreenModule((640, 480))
+    view = GameView(module, board)
+    view.camera.center(board[0] // 2, board[1] // 2)
+
+    view.draw()
+    return view.draw
+
+# Dispatches a key press to a handler with callbacks for that many keys.
+def dispatchKey(callbacks):
+    handler = utils.EventHandler()
+    for key in range(callbacks):
+        handler.addEventCallback((KEYDOWN, key), lambda e: None)
+
+    event = pygame.event.Event(KEYDOWN, key=callbacks // 2)
+    return lambda: handler.handleEvent(event)
+
+# Dispatches a mouse move through a view group of that many children, laid
+# out in rows, to the one under the mouse.
+def dispatchMouse(children):
+    module = offscreenModule((640, 480))
+    group = views.ViewGroup(module, (0, 0), module.size)
+
+    for i in range(children):
+        y, x = divmod(i, 20)
+        child = views.View(module, (x * 32, y * 24 % 480), (30, 20))
+        child.addEventCallback((MOUSEMOTION, None), lambda e: None)
+        group.addChild(child)
+
+    event = pygame.event.Event(MOUSEMOTION, pos=(5, 5), rel=(0, 0),
+                               buttons=(0, 0, 0))
+    return lambda: group.handleEvent(event)
+
+# Fills the settings with that many keys, starting from an empty file.
+# The file is the one run.py points the settings at, in a directory that
+# it removes when the benchmarks are done. Returns the path of the file.
+def _fillSettings(keys):
+    settings.Settings.flush()
+
+    path = settings.Settings.SETTINGSFILE
+    open(path, "w").close()
+
+    settings.Settings._values = None
+    for i in range(keys):
+        settings.Settings.save("key%d" % i, str(i))
+    settings.Settings.flush()
+
+    return path
+
+# Loads a setting.
+def settingsLoad(keys):
+    _fillSettings(keys)
+    return lambda: settings.Settings.load("key0")
+
+# Saves a setting, which is written to the file later.
+def settingsSave(keys):
+    _fillSettings(keys)
+
+    return lambda: settings.Settings.save("key0", "0")
+
+# Saves a setting and writes the whole file.
+def settingsFlush(keys):
+    _fillSettings(keys)
+
+    def run():
+        settings.Settings.save("key0", "0")
+        settings.Settings.flush()
+
+    return run
+
+# Changes the text of a TextDisp. Cached text has been shown before, and
+# new text never has.
+def setText(cached):
+    module = offscreenModule((640, 480))
+    text = views.TextDisp(module, (0, 0))
+
+    if cached:
+        scores = itertools.cycle([str(i) for i in range(10)])
+    else:
+        scores = (str(i) for i in itertools.count(1000000))
+
+    return lambda: text.setText(next(scores))
+
+# (name, function, list of parameters to run it with).
+CASES = [
+    ("tick", tick, [{"board": b, "trail": t} for b in BOARDS for t in TRAILS]),
+    ("step", step, [{"board": b, "trail": t} for b in BOARDS for t in TRAILS]),
+    ("stepRiders", stepRiders, [{"riders": n} for n in (2, 8, 32, 128)]),
+    ("drawRider", drawRider, [{"trail": t} for t in TRAILS]),
+    ("drawGame", drawGame, [{"board": b, "trail": 1000} for b in BOARDS]),
+    ("drawBoard", drawBoard, [{"board": b}
+                              for b in ((128, 96), (1024, 768), (4096, 4096))]),
+    ("dispatchKey", dispatchKey, [{"callbacks": n} for n in (1, 10, 100)]),
+    ("dispatchMouse", dispatchMouse, [{"children": n}
+                                      for n in (10, 100, 1000)]),
+    ("settingsLoad", settingsLoad, [{"keys": n} for n in (10, 1000)]),
+    ("settingsSave", settingsSave, [{"keys": n} for n in (10, 1000)]),
+    ("settingsFlush", settingsFlush, [{"keys": n} for n in (10, 1000)]),
+    ("setText", setText, [{"cached": True}, {"cached": False}]),
+]
@@ -0,0 +1,217 @@
+#!/usr/bin/python
+
+######################################################################
+# Runs the benchmarks in cases.py and prints how long a call of each
+# takes, or with --json prints the results as json. Results saved with
+# --output can be passed back in as a --baseline, and any benchmark
+# that has got slower than the baseline by more than the tolerance is
+# reported and makes the run exit with status 1, so it can guard a
+# release.
+#
+# Each benchmark is called in a loop long enough to time reliably, and
+# the loop is repeated a few times. The fastest repeat is the result,
+# since anything else running on the machine only ever adds time. The
+# default tolerance is wide, since timings of a microsecond on a
+# shared machine move around that much from one run to the next.
+# Nothing is shown on screen, since SDL is given its dummy drivers.
+######################################################################
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path[:0] = [SRC, os.path.join(SRC, "pydroid")]
+
+import pygame
+
+from pydroid import settings
+
+from cases import CASES
+
+# The most precise clock there is.
+clock = getattr(time, "perf_counter", time.time)
+
+# Returns the name of the benchmark with its parameters, like
+# "tick board=64x48 trail=100".
+def benchName(name, params):
+    parts = [name]
+    for key in sorted(params):
+        value = params[key]
+        if type(value) is tuple:
+            value = "x".join(str(v) for v in value)
+
+        parts.append("%s=%s" % (key, value))
+
+    return " ".join(parts)
+
+# A fixed amount of plain python work. It is timed along with the
+# benchmarks, and comparisons with a baseline are made relative to it, so
+# that a machine that is slower or busier overall is not a regression.
+def reference():
+    total = 0
+    for i in range(1000):
+        total += i * i
+
+    return total
+
+# Returns how many calls of run take at least minTime, doubling the calls
+# until they do.
+def calibrate(run, minTime):
+    loops = 1
+    while True:
+        start = clock()
+        for i in range(loops):
+            run()
+        if clock() - start >= minTime:
+            return loops
+
+        loops *= 2
+
+# Returns the seconds per call of run over loops calls.
+def timeLoops(run, loops):
+    start = clock()
+    for i in range(loops):
+        run()
+
+    return (clock() - start) / loops
+
+# Runs the benchmarks whose names contain any of the filters, or all of
+# them with no filters. Returns the results by name, with the seconds per
+# call of the fastest and the median repeat and the calls per repeat.
+#
+# The repeats take turns across all the benchmarks rather than running
+# one benchmark at a time. How fast a machine runs drifts over seconds,
+# so this way every benchmark gets a chance at its quick moments.
+def runCases(cases, filters, minTime, repeat):
+    runs = [("reference", reference, calibrate(reference, minTime), [])]
+    for (name, function, paramsList) in cases:
+        for params in paramsList:
+            full = benchName(name, params)
+            if filters and not any(f in full for f in filters):
+                continue
+
+            run = function(**params)
+            if run is not None:
+                runs.append((full, run, calibrate(run, minTime), []))
+
+    for r in range(repeat):
+        for (name, run, loops, times) in runs:
+            times.append(timeLoops(run, loops))
+
+    results = {}
+    for (name, run, loops, times) in runs:
+        times.sort()
+        results[name] = {"seconds": times[0],
+                         "median": times[len(times) // 2], "loops": loops}
+
+    return results
+
+# Returns how many times slower each result is than in baseline, relative
+# to the reference of each.
+def ratios(results, baseline):
+    scale = baseline["reference"]["seconds"] / results["reference"]["seconds"]
+    return dict((name, results[name]["seconds"] /
+                 baseline[name]["seconds"] * scale)
+                for name in results if name in baseline)
+
+# Returns the names of the results that are slower than in baseline by more
+# than tolerance, as a fraction, with their ratios.
+def regressions(ratios, tolerance):
+    return [(name, ratios[name]) for name in sorted(ratios)
+            if ratios[name] > 1 + tolerance]
+
+# Returns the results as lines of text, with the change from the baseline
+# if there is one.
+def report(results, ratios):
+    lines = ["%-40s %12s %12s %9s" % ("benchmark", "best", "median",
+                                     "baseline")]
+    for name in sorted(results):
+        result = results[name]
+        change = ""
+        if name in ratios:
+            change = "%+8.1f%%" % ((ratios[name] - 1) * 100)
+
+        lines.append("%-40s %10.2fus %10.2fus %9s" %
+                     (name, result["seconds"] * 1e6, result["median"] * 1e6,
+                      change))
+
+    return lines
+
+# Runs the benchmarks picked by args, then saves and prints the results.
+# Returns the regressions against the baseline, if one was given.
+def benchmark(args):
+    pygame.init()
+
+    results = runCases(CASES, args.filters, args.minTime, args.repeat)
+    output = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    changes = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            changes = ratios(results, json.load(f)["results"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+
+    slower = regressions(changes, args.tolerance)
+    if args.json:
+        output["regressions"] = dict(slower)
+        print(json.dumps(output, indent=2, sort_keys=True))
+    else:
+        print("\n".join(report(results, changes)))
+        for (name, ratio) in slower:
+            print("regression: %s is %.2f times slower" % (name, ratio))
+
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the hot paths "
+                                     "of the game.")
+    parser.add_argument("filters", nargs="*",
+                        help="only run benchmarks whose names contain one "
+                        "of these")
+    parser.add_argument("--min-time", dest="minTime", type=float,
+                        default=0.02,
+                        help="seconds each repeat of a benchmark takes")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--output", help="save the results as json here")
+    parser.add_argument("--baseline",
+                        help="json results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="how much slower than the baseline is a "
+                        "regression, as a fraction")
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as json")
+    args = parser.parse_args()
+
+    # The real settings are left alone, and saves are only written when a
+    # benchmark flushes them so no write happens in the middle of another.
+    directory = tempfile.mkdtemp()
+    settings.Settings.SETTINGSFILE = os.path.join(directory, "settings.txt")
+    settings.Settings.WRITE_DELAY = 3600
+
+    try:
+        slower = benchmark(args)
+    finally:
+        shutil.rmtree(directory)
+
+    if slower:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+######################################################################
+# The occupancy grid that the riders of a game are played on. The
+# arena is measured in cells rather than pixels, where a cell is the
+# size of one block of a LineRider. Each cell is a single byte that is
+# 0 if the cell is free or the id of the rider whose trail covers it.
+#
+# Since the riders write their heads into the grid as they move,
+# checking if a rider has crashed is a single lookup no matter how
+# long the trails get, and a tick costs the same as the number of
+# riders no matter how many of them there are.
+######################################################################
+
+class Arena(object):
+    EMPTY = 0
+
+    # Creates an empty arena that is width cells wide and height cells
+    # tall.
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.cells = bytearray(width * height)
+
+    # Clears every cell of the arena.
+    def clear(self):
+        self.cells[:] = bytearray(len(self.cells))
+
+    # Returns True if the cell (x, y) is on the arena.
+    def inbounds(self, x, y):
+        return x >= 0 and x < self.width and y >= 0 and y < self.height
+
+    # Returns the value in the cell (x, y). The cell must be in bounds.
+    def get(self, x, y):
+        return self.cells[y * self.width + x]
+
+    # Returns True if the cell (x, y) is covered by some trail.
+    def occupied(self, x, y):
+        return self.cells[y * self.width + x] != Arena.EMPTY
+
+    # Marks the cell (x, y) with the provided value. Value must fit in a
+    # byte and should be the id of the rider that covers this cell.
+    def occupy(self, x, y, value=1):
+        self.cells[y * self.width + x] = value
+
+    # Checks if each of the riders is still alive after they have all
+    # moved, and then writes the heads of the survivors in the grid.
+    # Riders are identified by their position in the list plus one. Riders
+    # that are already dead are skipped. A rider dies if its head leaves
+    # the arena, hits a trail, or lands on the same cell as another head
+    # in this move. Riders that swap cells both crash too, since each
+    # moves onto the head the other left in the grid. Every rider is
+    # looked at once and the heads are matched up in a dict, so this
+    # is linear in the number of riders. Returns a list of the riders
+    # that died during this call.
+    def resolve(self, riders):
+        heads = {}
+        dead = []
+
+        for (i, rider) in enumerate(riders):
+            if not rider.alive:
+                continue
+
+            if rider.checkAlive(self):
+                heads.setdefault(rider.head(), []).append((i + 1, rider))
+            else:
+                dead.append(rider)
+
+        for (head, claimed) in heads.items():
+            # Riders meeting head on both crash into each other.
+            if len(claimed) > 1:
+                for (id, rider) in claimed:
+                    rider.alive = False
+                    dead.append(rider)
+            else:
+                self.occupy(head[0], head[1], claimed[0][0])
+
+        return dead
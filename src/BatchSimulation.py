@@ -0,0 +1,143 @@
+######################################################################
+# Runs many independent games of Tron at once using numpy. The rules
+# are the same as in TronSimulation, but rather than one object per
+# rider, every game is a row in a set of arrays. The positions and
+# directions are (games, riders) arrays and the occupancy of all the
+# arenas is one (games, height, width) array, so a tick of every game
+# is a handful of array operations no matter how many games there are.
+#
+# This is meant for bot tournaments and sweeps where thousands of games
+# are played. The arrays are always updated in place, so references to
+# them stay current across steps and resets. Requires numpy.
+######################################################################
+
+import numpy as np
+
+from LineRider import Direction
+from Simulation import Turn
+
+class BatchSimulation(object):
+    # The directions in clockwise order, so turning right is moving one
+    # forward in this list and turning left is moving one back.
+    DIRECTIONS = (Direction.TOP, Direction.RIGHT, Direction.BOTTOM,
+                  Direction.LEFT)
+    DX = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+    DY = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+
+    # Creates games number of arenas, each width cells wide and height
+    # cells tall. starts is a list of (x, y, direction) tuples in cells
+    # for where each rider starts, and is the same for every game. If no
+    # starts are given, the two riders start like in TronSimulation.duel.
+    def __init__(self, games, width, height, starts=None):
+        if starts is None:
+            starts = [(0, height // 2, Direction.RIGHT),
+                      (width - 1, height // 2, Direction.LEFT)]
+
+        self.games = games
+        self.width, self.height = width, height
+        self.riders = len(starts)
+
+        self.startX = np.array([s[0] for s in starts], dtype=np.int32)
+        self.startY = np.array([s[1] for s in starts], dtype=np.int32)
+        self.startDir = np.array([BatchSimulation.DIRECTIONS.index(s[2])
+                                  for s in starts], dtype=np.int8)
+
+        shape = (games, self.riders)
+        self.cells = np.zeros((games, height, width), dtype=np.uint8)
+        self.x = np.zeros(shape, dtype=np.int32)
+        self.y = np.zeros(shape, dtype=np.int32)
+        self.dirs = np.zeros(shape, dtype=np.int8)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.scores = np.zeros(shape, dtype=np.int32)
+
+        self.ticks = np.zeros(games, dtype=np.int32)
+        self.over = np.zeros(games, dtype=bool)
+
+        # The index of each game, to pair with per rider arrays when
+        # indexing into the arenas.
+        self._rows = np.arange(games)[:, None]
+        self._ids = np.arange(1, self.riders + 1, dtype=np.uint8)
+
+        self.reset()
+
+    # Puts the riders of the provided games back at their starts and
+    # clears their arenas. games is a boolean mask or a list of indices
+    # of the games to reset, or None to reset all of them. Scores are
+    # kept, since they are counted across rounds.
+    def reset(self, games=None):
+        # The mask is copied since it may well be self.over, which is
+        # changed below.
+        if games is None:
+            games = slice(None)
+        else:
+            games = np.array(games)
+
+            # An empty list would be an array of floats, which can't index.
+            if games.size == 0 or (games.dtype == bool and not games.any()):
+                return
+
+        self.cells[games] = 0
+        self.x[games] = self.startX
+        self.y[games] = self.startY
+        self.dirs[games] = self.startDir
+        self.alive[games] = True
+        self.ticks[games] = 0
+        self.over[games] = False
+
+        rows = self._rows[games]
+        self.cells[rows, self.y[games], self.x[games]] = self._ids
+
+    # Moves every game that is not over forward a tick. actions is a
+    # (games, riders) array of Turn values, or None if no rider turns.
+    # The rules and scoring are the same as TronSimulation.step. Returns
+    # a (games, riders) boolean array of the riders that died this tick.
+    def step(self, actions=None):
+        running = ~self.over
+        moving = self.alive & running[:, None]
+
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = np.where(actions == Turn.LEFT, 3,
+                            np.where(actions == Turn.RIGHT, 1, 0))
+            self.dirs[...] = np.where(moving, (self.dirs + turn) % 4,
+                                      self.dirs)
+
+        nx = self.x + BatchSimulation.DX[self.dirs] * moving
+        ny = self.y + BatchSimulation.DY[self.dirs] * moving
+
+        inbounds = (nx >= 0) & (nx < self.width) & \
+                   (ny >= 0) & (ny < self.height)
+        cx = np.clip(nx, 0, self.width - 1)
+        cy = np.clip(ny, 0, self.height - 1)
+
+        crashed = moving & (~inbounds | (self.cells[self._rows, cy, cx] != 0))
+        safe = moving & ~crashed
+
+        # Riders whose heads land on the same cell meet head on. There are
+        # only a few riders per game, so every pair is compared at once.
+        flat = np.where(safe, cy * self.width + cx, -1)
+        same = (flat[:, :, None] == flat[:, None, :]) & safe[:, :, None]
+        headOn = safe & (same.sum(axis=2) > 1)
+
+        dead = crashed | headOn
+        safe &= ~headOn
+
+        rows, riders = np.nonzero(safe)
+        self.cells[rows, cy[rows, riders], cx[rows, riders]] = \
+            self._ids[riders]
+
+        self.x[...] = np.where(moving, nx, self.x)
+        self.y[...] = np.where(moving, ny, self.y)
+        self.alive &= ~dead
+        self.ticks += running
+
+        # Each crash gives a point to every other rider that was riding.
+        crashes = dead.sum(axis=1)[:, None]
+        self.scores += np.where(self.alive, crashes,
+                                np.where(dead, crashes - 1, 0))
+
+        ended = (crashes[:, 0] > 0) & \
+                (self.alive.sum(axis=1) <= min(1, self.riders - 1))
+        self.over |= ended
+
+        return dead
@@ -0,0 +1,125 @@
+######################################################################
+# The part of an arena that is on screen. The arena is measured in
+# cells and the view in pixels, and zoom is how many pixels wide a
+# cell is drawn, which can be less than one to see more of a big
+# arena at once. x and y are the pixel of the whole zoomed arena that
+# is at the top left of the view.
+#
+# An arena that is smaller than the view along an axis is drawn from
+# the top left along it, and one that is bigger can be scrolled
+# without ever showing past its edges. Nothing here imports pygame, so
+# rects are plain (x, y, w, h) tuples.
+######################################################################
+
+class Camera(object):
+    # The zooms that zoomIn and zoomOut step through. A chunk of 64 cells
+    # is a whole number of pixels at every one of them.
+    ZOOMS = (0.25, 0.5, 1, 2, 3, 5, 8, 12)
+
+    # How close in pixels the cell being followed can get to the edge of
+    # the view before it scrolls, as a share of the size of the view.
+    MARGIN = 0.25
+
+    # Creates a camera over an arena of board cells for a view of size
+    # pixels, looking at the top left of the arena.
+    def __init__(self, size, board, zoom=1):
+        self.size = size
+        self.board = board
+        self.zoom = zoom
+
+        self.x, self.y = 0, 0
+
+    # Returns True if the whole arena fits in the view.
+    def fits(self):
+        return all(self.board[i] * self.zoom <= self.size[i] for i in (0, 1))
+
+    # Returns the pixel of the zoomed arena that the cell (x, y) starts at.
+    def pixel(self, x, y):
+        return (int(x * self.zoom), int(y * self.zoom))
+
+    # Returns the rect on the view that the cell (x, y) is drawn in. A cell
+    # is at least a pixel, even when zoomed out past that.
+    def rect(self, x, y):
+        px, py = self.pixel(x, y)
+        dim = max(1, int(self.zoom))
+
+        return (px - self.x, py - self.y, dim, dim)
+
+    # Returns the cell at the pixel (px, py) of the view.
+    def cellAt(self, px, py):
+        return (int((px + self.x) // self.zoom),
+                int((py + self.y) // self.zoom))
+
+    # Returns the cells that are at least partly on the view, as the range
+    # (x0, y0, x1, y1) with x1 and y1 not included.
+    def visible(self):
+        x0, y0 = self.cellAt(0, 0)
+        x1, y1 = self.cellAt(self.size[0] - 1, self.size[1] - 1)
+
+        return (max(0, x0), max(0, y0), min(self.board[0], x1 + 1),
+                min(self.board[1], y1 + 1))
+
+    # Scrolls as little as it takes to keep the cell (x, y) a margin away
+    # from the edges of the view. Returns True if the camera moved.
+    def follow(self, x, y):
+        px, py = self.pixel(x, y)
+        dim = max(1, int(self.zoom))
+        old = (self.x, self.y)
+
+        view = [self.x, self.y]
+        for (i, p) in enumerate((px, py)):
+            margin = int(self.size[i] * Camera.MARGIN)
+            view[i] = min(view[i], p - margin)
+            view[i] = max(view[i], p + dim + margin - self.size[i])
+
+        self.x, self.y = view
+        self._clamp()
+
+        return (self.x, self.y) != old
+
+    # Puts the cell (x, y) in the middle of the view, as far as the edges of
+    # the arena let it.
+    def center(self, x, y):
+        px, py = self.pixel(x, y)
+        self.x = px - self.size[0] // 2
+        self.y = py - self.size[1] // 2
+        self._clamp()
+
+    # Changes the zoom, keeping the cell (x, y) where it is on the view, or
+    # the cell in the middle of the view if no cell is given. Returns True if
+    # the zoom changed.
+    def setZoom(self, zoom, cell=None):
+        if zoom == self.zoom:
+            return False
+
+        if cell is None:
+            cell = self.cellAt(self.size[0] // 2, self.size[1] // 2)
+
+        # Where the cell is on the view now.
+        px, py = self.pixel(*cell)
+        sx, sy = px - self.x, py - self.y
+
+        self.zoom = zoom
+        px, py = self.pixel(*cell)
+        self.x, self.y = px - sx, py - sy
+        self._clamp()
+
+        return True
+
+    def zoomIn(self, cell=None):
+        bigger = [z for z in Camera.ZOOMS if z > self.zoom]
+        return self.setZoom(bigger[0], cell) if bigger else False
+
+    def zoomOut(self, cell=None):
+        smaller = [z for z in Camera.ZOOMS if z < self.zoom]
+        return self.setZoom(smaller[-1], cell) if smaller else False
+
+    # Keeps the view inside the arena along each axis it is bigger on, and
+    # at the top left along each axis it fits on.
+    def _clamp(self):
+        view = [self.x, self.y]
+        for i in (0, 1):
+            span = int(self.board[i] * self.zoom)
+            view[i] = max(0, min(view[i], span - self.size[i]))
+
+        self.x, self.y = view
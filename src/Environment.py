@@ -0,0 +1,128 @@
+######################################################################
+# Gym style environments for training bots with reinforcement
+# learning. reset starts a round and returns the observation, and step
+# takes a Turn for every rider and returns (observation, rewards, done,
+# info). Nothing is drawn and there is no clock, so rounds run as fast
+# as the rules do.
+#
+# The observation is a dict of numpy arrays that are made once and
+# updated in place every step, so reading them costs nothing but they
+# have to be copied to be kept. grid is the occupancy of the arena,
+# with 0 for a free cell or the id of the rider covering it, heads is
+# the (x, y) cell of each head, directions the index of each direction
+# in BatchSimulation.DIRECTIONS, and alive whether each rider is still
+# riding. A rider is rewarded -1 for crashing and 1 for each step that
+# another rider crashed while it kept riding. Requires numpy.
+######################################################################
+
+import numpy as np
+
+from BatchSimulation import BatchSimulation
+from Simulation import TronSimulation
+
+# One game, played with a TronSimulation.
+class TronEnv(object):
+    def __init__(self, width=128, height=96):
+        self.sim = TronSimulation.duel(width, height)
+        riders = len(self.sim.riders)
+
+        # The grid shares its memory with the arena, so it never has to be
+        # copied over.
+        grid = np.frombuffer(self.sim.arena.cells, dtype=np.uint8)
+        self.observation = {
+            "grid": grid.reshape(height, width),
+            "heads": np.zeros((riders, 2), dtype=np.int32),
+            "directions": np.zeros(riders, dtype=np.int8),
+            "alive": np.zeros(riders, dtype=bool),
+        }
+        self.rewards = np.zeros(riders, dtype=np.float32)
+
+    # Starts a new round and returns the observation.
+    def reset(self):
+        self.sim.reset()
+        self._observe()
+
+        return self.observation
+
+    # Moves the round forward a tick with actions, a Turn for each rider.
+    # The round has to be reset once it is done.
+    def step(self, actions):
+        if self.sim.over:
+            raise ValueError("the round is over and has to be reset")
+
+        dead = self.sim.step(actions)
+        self._observe()
+
+        self.rewards.fill(0)
+        if dead:
+            self.rewards[self.observation["alive"]] = 1
+            for (i, rider) in enumerate(self.sim.riders):
+                if rider in dead:
+                    self.rewards[i] = -1
+
+        return (self.observation, self.rewards, self.sim.over,
+                {"ticks": self.sim.ticks})
+
+    def _observe(self):
+        heads = self.observation["heads"]
+        directions = self.observation["directions"]
+        alive = self.observation["alive"]
+
+        for (i, rider) in enumerate(self.sim.riders):
+            heads[i] = rider.head()
+            directions[i] = BatchSimulation.DIRECTIONS.index(rider.direction)
+            alive[i] = rider.alive
+
+# Many games stepped together with a BatchSimulation, for the sample
+# throughput that one game at a time can't reach in python. The arrays
+# of the observation have the game as their first axis, actions are a
+# (games, riders) array and step returns the rewards and dones of every
+# game. A game that ends is reset right away, so its part of the
+# observation is already the start of its next round, and there is
+# never a need to call reset after the first time.
+class VectorTronEnv(object):
+    def __init__(self, games, width=128, height=96):
+        self.sim = BatchSimulation(games, width, height)
+        shape = (games, self.sim.riders)
+
+        self.observation = {
+            "grid": self.sim.cells,
+            "heads": np.zeros(shape + (2,), dtype=np.int32),
+            "directions": self.sim.dirs,
+            "alive": self.sim.alive,
+        }
+        self.rewards = np.zeros(shape, dtype=np.float32)
+        self.dones = np.zeros(games, dtype=bool)
+
+        # How long each game that is done lasted, since its ticks are reset.
+        self.ticks = np.zeros(games, dtype=np.int32)
+
+    # Starts a new round in every game and returns the observation.
+    def reset(self):
+        self.sim.reset()
+        self._observe()
+
+        return self.observation
+
+    def step(self, actions):
+        dead = self.sim.step(actions)
+
+        crashed = dead.any(axis=1)[:, None]
+        self.rewards.fill(0)
+        self.rewards[self.sim.alive & crashed] = 1
+        self.rewards[dead] = -1
+
+        self.dones[...] = self.sim.over
+        self.ticks[...] = self.sim.ticks
+        if self.dones.any():
+            self.sim.reset(self.dones)
+
+        self._observe()
+
+        return (self.observation, self.rewards, self.dones,
+                {"ticks": self.ticks})
+
+    def _observe(self):
+        heads = self.observation["heads"]
+        heads[..., 0] = self.sim.x
+        heads[..., 1] = self.sim.y
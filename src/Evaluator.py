@@ -0,0 +1,129 @@
+######################################################################
+# Measures how much room the riders of a game have, for bots to judge
+# their moves by. Every tick a bot asks for the area it can still
+# reach from a cell, or for the Voronoi territory of each rider, which
+# is the free cells that rider can get to before any other one.
+#
+# A breadth first search over the arena a cell at a time is far too
+# slow in python to run several times a tick. Instead the free cells
+# are kept as the bits of one python int, a bitboard, and a search
+# grows a whole frontier by a ring of cells with a few shifts and ands
+# on it. That is one step per ring rather than per cell, and each step
+# runs in C. The cell (x, y) is bit y * (width + 1) + x, and the extra
+# column is always blocked so that a shift past one edge of a row never
+# comes back on the other edge.
+######################################################################
+
+from Arena import Arena
+
+class SpaceEvaluator(object):
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.stride = width + 1
+
+        # Turns a row of the arena into the binary digits of its free cells,
+        # with the digit of the blocked column in front.
+        self._digits = bytearray(b"0") * 256
+        self._digits[Arena.EMPTY] = ord("1")
+
+        # The digits of every row, highest bit first, reused for each load.
+        self._rows = bytearray(self.stride * height)
+
+        self.free = 0
+
+    # Reads which cells are free from the arena. Call this once the game has
+    # changed and before asking about it.
+    def load(self, arena):
+        cells = arena.cells
+        rows = self._rows
+        width, stride = self.width, self.stride
+
+        # The last row is the highest bits, so it goes first.
+        for y in range(self.height):
+            start = (self.height - 1 - y) * stride
+            rows[start] = ord("0")
+            rows[start + 1:start + stride] = \
+                cells[y * width:(y + 1) * width][::-1]
+
+        # int only reads a str in python 2, not a bytearray.
+        self.free = int(bytes(rows.translate(self._digits)).decode("ascii"), 2)
+
+    # Returns the bit of the cell (x, y).
+    def bit(self, x, y):
+        return 1 << (y * self.stride + x)
+
+    # Returns the bits next to any of the bits of cells.
+    def _around(self, cells):
+        stride = self.stride
+        return (cells << 1) | (cells >> 1) | (cells << stride) | \
+            (cells >> stride)
+
+    # Returns how many free cells can be reached from (x, y), counting it,
+    # without going through the cells in blocked. Returns 0 if (x, y) is not
+    # free.
+    def reachable(self, x, y, blocked=0):
+        if not 0 <= x < self.width or not 0 <= y < self.height:
+            return 0
+
+        free = self.free & ~blocked
+        reached = frontier = self.bit(x, y) & free
+        while frontier:
+            frontier = self._around(frontier) & free & ~reached
+            reached |= frontier
+
+        return bin(reached).count("1")
+
+    # Returns True if a path of free cells joins the cells start and end,
+    # given as (x, y), which need not be free themselves. This stops as soon
+    # as the path is found, so it is cheap when the cells are close.
+    def connected(self, start, end):
+        free = self.free
+        target = self.bit(*end)
+
+        reached = frontier = self.bit(*start)
+        while frontier:
+            frontier = self._around(frontier)
+            if frontier & target:
+                return True
+
+            frontier &= free & ~reached
+            reached |= frontier
+
+        return False
+
+    # Returns the territory of each of the heads, given as (x, y) cells, as
+    # the number of free cells it reaches strictly before every other head.
+    # Cells reached by several heads at once belong to nobody, and the
+    # search goes on from them for all of those heads. The cells in blocked
+    # are treated as taken. If limit is given only the cells at most that
+    # many steps from a head are counted.
+    def voronoi(self, heads, blocked=0, limit=None):
+        free = self.free & ~blocked
+
+        frontiers = [self.bit(x, y) for (x, y) in heads]
+        owned = [0] * len(heads)
+        claimed = 0
+        for frontier in frontiers:
+            claimed |= frontier
+
+        rings = 0
+        while limit is None or rings < limit:
+            rings += 1
+
+            # Find the cells each head reaches this ring, and which of those
+            # more than one head reaches.
+            once = twice = 0
+            for (i, frontier) in enumerate(frontiers):
+                ring = self._around(frontier) & free & ~claimed
+                twice |= once & ring
+                once |= ring
+                frontiers[i] = ring
+
+            if not once:
+                break
+
+            claimed |= once
+            for (i, ring) in enumerate(frontiers):
+                owned[i] |= ring & ~twice
+
+        return [bin(cells).count("1") for cells in owned]
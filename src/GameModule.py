@@ -4,10 +4,15 @@
 # Author: Matias Grioni
 # Created: 7/14/15
 #
-# The module for the main game activity.
+# The module for the main game activity. If the "replays" setting is a
+# directory, the game is saved there once the module is left, and can
+# be watched with replay.py.
 ######################################################################
 
-from pydroid import modules, views
+import os
+import time
+
+from pydroid import modules, settings, views
 
 from GameView import GameView
 
@@ -15,6 +20,23 @@ class GameModule(modules.Module):
     def __init__(self, parent):
         super(GameModule, self).__init__(parent, (255, 255, 255), parent.size)
 
+        self.incremental = True
+
         # The only view necessary for this module is the game view.
         self.game = GameView(self)
         self.setView(self.game)
+
+    # The bots can have searches running on their own threads.
+    def onDestroy(self):
+        self.game.close()
+
+    # Saves the recording of the game once this module is done, if there is
+    # a directory to save it in.
+    def execute(self):
+        try:
+            super(GameModule, self).execute()
+        finally:
+            directory = settings.Settings.load("replays")
+            if directory and self.game.recorder.frame > 0:
+                name = time.strftime("%Y%m%d-%H%M%S") + ".tron"
+                self.game.recorder.save(os.path.join(directory, name))
@@ -8,9 +8,11 @@
 # dies. Similar to the pause menu however no resume option.
 ###########################################################
 
-from pydroid import modules, settings, views
+from pydroid import views
 
-class GameOverMenu(modules.Module):
+from ScoreMenu import ScoreMenu
+
+class GameOverMenu(ScoreMenu):
     def __init__(self, parent):
         super(GameOverMenu, self).__init__(parent, (255, 255, 255))
 
@@ -35,16 +37,3 @@ class GameOverMenu(modules.Module):
         self.menu.addOptionCallback("Next game", self.back)
         self.menu.addOptionCallback("Main menu", self.back, count=2)
         self.menu.addOptionCallback("Quit", self.quit)
-
-    # Create the score children views in the top left and right corners.
-    def _initScores(self):
-        self.p1Score = views.TextDisp(self, (10, 10))
-        self.p1Score.setFont(fontsize=15)
-        
-        self.p2Score = views.TextDisp(self, (self.size[0] - 150, 10))
-        self.p2Score.setFont(fontsize=15)
-
-    # Set the score text for the views here.
-    def setScores(self, scores):
-        self.p1Score.setText("Player 1: " + str(scores[0]))
-        self.p2Score.setText("Player 2: " + str(scores[1]))
@@ -5,22 +5,42 @@
 # Created: 6/6/15
 #
 # The actual game view. The game loop consists of updating the players
-# locations, and handling event inputs such as the arrow keys. When
+# locations, and handling event inputs such as the arrow keys. The
+# rules of the game are in a TronSimulation, so this view only steps it,
+# turns the riders on input, and draws what happened. It is stepped
+# through a ReplayRecorder, so a game can be saved and watched again. When
 # a player dies, a callback can be set to be called so that any action
 # that is necessary can be taken.
 #
 # The class is a viewgroup that has the scores, and timer as children
 # view. The players are drawn in the draw method of the viewgroup.
+#
+# The "riders" setting makes it a free for all of that many riders.
+# Player N is set up with the settings "pN" for its color, "pNbot" for
+# a bot and "pNkeys" for its left and right keys, named like "j,l".
+# The first two players are on the keyboard unless given a bot, and
+# the rest ride as PARTY_BOT unless given keys.
+#
+# The arena is as big as the window unless the "board" setting asks for
+# another size, like 4096x4096. Only the part a Camera sees is drawn,
+# and it follows a rider, which tab switches between. The - and = keys
+# and the mouse wheel zoom out and in.
 ######################################################################
 
+import colorsys
+
 import pygame
 
 from pydroid import modules, views, settings, utils
 
 from pygame.locals import *
-from LineRider import Direction, LineRider
+from Camera import Camera
+from Policy import POLICIES
+from Replay import ReplayRecorder
+from Simulation import TronSimulation, Turn
 from PauseMenu import PauseMenu
 from GameOverMenu import GameOverMenu
+from Trails import TrailChunks
 
 ######################################################################
 # Author: Matias Grioni
@@ -32,20 +52,37 @@ from GameOverMenu import GameOverMenu
 # positions of players and accepting input and handling events.
 #
 # Timer means that there was some interrupt in game play, and that a
-# countdown timer should be used before play is resumed. The only
-# thing that is really done when it is encountered is timer.execute()
+# countdown timer should be used before play is resumed. The timer is
+# started when the state is encountered, and the game stays in it,
+# still drawing and handling events, until the countdown finishes.
 ######################################################################
 class GameState(object):
     TIMER, PLAYING = range(2)
 
 class GameView(views.ViewGroup):
-    def __init__(self, module):
+    # The size in pixels of a cell of the arena.
+    DIM = 5
+
+    # The biggest arena the board setting can ask for, in cells a side.
+    MAX_BOARD = 4096
+
+    # The colors and the left and right keys of the first players, and the
+    # policy of the players past them that have no keys.
+    COLORS = ((50, 100, 12), (0, 0, 0))
+    CONTROLS = ((K_LEFT, K_RIGHT), (K_a, K_d))
+    PARTY_BOT = "avoid"
+
+    # board is the (width, height) of the arena in cells, which is the
+    # board setting if not given.
+    def __init__(self, module, board=None):
         # Make the game fullscreen
         super(GameView, self).__init__(module, (0, 0), module.size)
+        self.board = board
 
         self.setFocusable(True)
 
         self._initPlayers()
+        self._initTrails()
         self._initEventCallbacks()
 
         # Start the Game off with a countdown timer.
@@ -55,136 +92,366 @@ class GameView(views.ViewGroup):
         self.timer.onTick = self._timerTick
         self.timer.onFinish = self._timerFinish
 
-        # Setup the children views for this viewgroup
-        self.p1Score = views.TextDisp(module, (10, 10), "0")
-        self.p2Score = views.TextDisp(module, (self.size[0] - 20, 10), "0")
+        # Setup the children views for this viewgroup. The scores are spread
+        # across the top, from the left corner to the right one, and with
+        # more than two they are in the colors of the riders.
+        self.scores = []
+        for (i, rider) in enumerate(self.riders):
+            x = 10
+            if len(self.riders) > 1:
+                x += i * (self.size[0] - 30) // (len(self.riders) - 1)
+
+            score = views.TextDisp(module, (x, 10))
+            if len(self.riders) > 2:
+                score.setFont(color=rider.color)
+            score.setText("0")
+            self.scores.append(score)
+
         self.timerDisp = views.TextDisp(module,
                                        (self.size[0] / 2, self.size[1] / 2))
 
         # Add them to this container
-        self.addChild(self.p1Score)
-        self.addChild(self.p2Score)
+        for score in self.scores:
+            self.addChild(score)
         self.addChild(self.timerDisp)
 
-    # Setup the players with the saved colors and also setup the views that
-    # display the appropriate scores in the corner.
+    # Loads the saved colors of count players as (r, g, b) tuples. Players
+    # past those in COLORS default to hues spread around the color wheel.
+    @staticmethod
+    def loadColors(count=2):
+        colors = []
+        for i in range(count):
+            if i < len(GameView.COLORS):
+                default = GameView.COLORS[i]
+            else:
+                hue = (i * 0.618034) % 1.0
+                default = tuple(int(c * 255) for c in
+                                colorsys.hsv_to_rgb(hue, 0.8, 0.8))
+
+            colors.append(settings.Settings.loadColor("p%d" % (i + 1),
+                                                      default))
+
+        return colors
+
+    # Loads how many riders a local game on a board of (width, height)
+    # cells has from the riders setting, which is 2 if it is not set or
+    # can't be read. It is never more than fit on the board.
+    @staticmethod
+    def loadRiders(board):
+        try:
+            riders = int(settings.Settings.load("riders", "2"))
+        except ValueError:
+            return 2
+
+        return max(2, min(riders, TronSimulation.maxRiders(*board)))
+
+    # Loads the size of the arena in cells from the board setting, saved as
+    # "WIDTHxHEIGHT". If there is none, or it can't be read, the arena is
+    # as big as a window of size.
+    @staticmethod
+    def loadBoard(size):
+        default = (size[0] // GameView.DIM, size[1] // GameView.DIM)
+
+        try:
+            board = tuple(int(n) for n in
+                          settings.Settings.load("board", "").split("x"))
+        except ValueError:
+            return default
+
+        if len(board) != 2 or not all(0 < n <= GameView.MAX_BOARD
+                                      for n in board):
+            return default
+
+        return board
+
+    # Loads the left and right keys of count players, or None for a player
+    # with no keys. The keys are saved by their names in pygame without the
+    # K_, like "LEFT,RIGHT" or "j,l".
+    @staticmethod
+    def loadControls(count=2):
+        controls = []
+        for i in range(count):
+            default = GameView.CONTROLS[i] if i < len(GameView.CONTROLS) \
+                else None
+
+            names = settings.Settings.load("p%dkeys" % (i + 1))
+            if names is None:
+                controls.append(default)
+                continue
+
+            keys = tuple(getattr(pygame.locals, "K_" + name.strip(), None)
+                         for name in names.split(","))
+            if len(keys) != 2 or None in keys:
+                keys = default
+            controls.append(keys)
+
+        return controls
+
+    # Loads the bots that ride for count players, or None for a player on
+    # the keyboard. A bot is picked by setting "p1bot", "p2bot" and so on to
+    # the name of a policy, such as voronoi. Players with no keys that are
+    # not given one ride as PARTY_BOT.
+    @staticmethod
+    def loadBots(count=2, controls=None):
+        bots = []
+        for i in range(count):
+            name = settings.Settings.load("p%dbot" % (i + 1))
+            if name not in POLICIES and controls is not None and \
+               controls[i] is None:
+                name = GameView.PARTY_BOT
+
+            bots.append(POLICIES[name]() if name in POLICIES else None)
+
+        return bots
+
+    # Setup the players with the saved colors and the simulation of the game
+    # that they are riding in. The arena is measured in cells the size of a
+    # block of a LineRider. actions are the turns taken since the last step,
+    # and controls the left and right keys of each rider on the keyboard.
     def _initPlayers(self):
-        # Load the tuple for the color as a string.
-        p1ColorStr = settings.Settings.load("p1", "(50, 100, 12)")
-        p2ColorStr = settings.Settings.load("p2", "(0, 0, 0)")
-
-        # Convert the string to a list using split and convert each channel
-        # to an int.
-        p1Channels = [int(i) for i in p1ColorStr.strip()[1:-1].split(",")]
-        p2Channels = [int(i) for i in p2ColorStr.strip()[1:-1].split(",")]
-
-        # Then setup the colors
-        p1Color, p2Color = tuple(p1Channels), tuple(p2Channels)
-        self.p1 = LineRider(0, self.size[1] / 2, Direction.RIGHT,
-                            color=p1Color)
-        self.p2 = LineRider(self.size[0] - 5, self.size[1] / 2,
-                            Direction.LEFT, color=p2Color)
+        width, height = self.board or GameView.loadBoard(self.size)
+        count = GameView.loadRiders((width, height))
+        self.sim = TronSimulation.freeForAll(width, height, count,
+                                             GameView.DIM,
+                                             GameView.loadColors(count))
+        self.riders = self.sim.riders
+
+        self.recorder = ReplayRecorder(self.sim)
+        self.actions = [Turn.NONE] * len(self.riders)
+        self.controls = GameView.loadControls(count)
+        self.bots = GameView.loadBots(count, self.controls)
+
+        tickRate = self.module.tickRate or 60
+        for bot in self.bots:
+            if bot is not None:
+                bot.realtime(1.0 / tickRate)
+
+    # The trails are drawn onto chunks as they grow, and the chunks the
+    # camera sees are copied to the screen when the whole game has to be
+    # redrawn. stamped is how many blocks of each rider are already on the
+    # chunks, and following is the index of the rider the camera follows.
+    def _initTrails(self):
+        self.camera = Camera(self.size, (self.sim.width, self.sim.height),
+                             GameView.DIM)
+        self.trails = TrailChunks(self.sim.arena, self.riders,
+                                  self.background, self.camera.zoom)
+        self.following = 0
+        self._clearTrails()
+
+    # Erases every trail from the chunks.
+    def _clearTrails(self):
+        self.trails.clear()
+        self.stamped = [0] * len(self.riders)
+
+    # Draws the blocks that each rider has added since the last call onto the
+    # chunks. Returns the (color, rect) of the ones the camera sees, as rects
+    # of the view.
+    def _stampTrails(self):
+        camera = self.camera
+
+        shown = []
+        for (i, rider) in enumerate(self.riders):
+            cells, color = rider.cells, rider.color
+            if self.stamped[i] * 2 == len(cells):
+                continue
+
+            x0, y0, x1, y1 = camera.visible()
+            for c in range(self.stamped[i] * 2, len(cells), 2):
+                x, y = cells[c], cells[c + 1]
+                if 0 <= x < self.sim.width and 0 <= y < self.sim.height:
+                    self.trails.stamp(x, y, color)
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        shown.append((color, camera.rect(x, y)))
+
+            self.stamped[i] = len(cells) // 2
+
+        return shown
+
+    # Scrolls the camera to keep up with the rider it follows. Returns True
+    # if it moved.
+    def _followCamera(self):
+        if self.camera.fits():
+            return False
+
+        return self.camera.follow(*self.riders[self.following].head())
 
     # Set up the callbacks for this view. Such as the arrows to move the player
     # space to pause the game, etc.
     def _initEventCallbacks(self):
-        # Add callbacks for moving the player 1 and player 2 respetively.
-        self.addEventCallback((KEYDOWN, (K_RIGHT, K_LEFT)), self._p1DirKeydown)
-        self.addEventCallback((KEYUP, (K_RIGHT, K_LEFT)), self._p1DirKeyup)
-
-        self.addEventCallback((KEYDOWN, (K_a, K_d)), self._p2DirKeydown)
-        self.addEventCallback((KEYUP, (K_a, K_d)), self._p2DirKeyup)
+        # Add callbacks for turning each player that has keys.
+        for (i, keys) in enumerate(self.controls):
+            if keys is not None:
+                self.addEventCallback((KEYDOWN, keys), self._dirKeydown, i)
+                self.addEventCallback((KEYUP, keys), self._dirKeyup, i)
 
         self.addEventCallback((KEYDOWN, K_SPACE), self._pause)
 
+        self.addEventCallback((KEYDOWN, K_TAB), self._switchFollowing)
+        self.addEventCallback((KEYDOWN, (K_EQUALS, K_MINUS)), self._zoomKey)
+        self.addEventCallback((MOUSEBUTTONDOWN, (4, 5)), self._zoomWheel)
+
     # Resets the game to its initial state. (ie. before any update calls)
     def reset(self):
-        self.p1.reset()
-        self.p2.reset()
+        self.recorder.reset()
+        self.actions = [Turn.NONE] * len(self.riders)
+
+        self._clearTrails()
+        self.invalidate()
 
+        self.timer.cancel()
         self.gameState = GameState.TIMER
 
+    # Lets the bots go once the game is over for good.
+    def close(self):
+        for bot in self.bots:
+            if bot is not None:
+                bot.close()
+
     # Simply move each player along as needed or update the timer depending
     # on the current game mode.
     def update(self):
         if self.gameState == GameState.TIMER:
-            self.timer.start()
-            self.gameState = GameState.PLAYING
-            self.requestFocus()
+            if not self.timer.running():
+                self.timer.start(self.module.scheduler)
         elif self.gameState == GameState.PLAYING:
-            self.p1.update()
-            self.p2.update()
-
-            # Bounds of the screen
-            bounds = (0, 0, self.size[0], self.size[1])
-            alive = (self.p1.checkAlive(self.p2, bounds),
-                     self.p2.checkAlive(self.p1, bounds))
-
-            # If at least one of the players is not alive, then check which
-            # ones. Increment the scores of the players and then create
-            # the GameOverMenu.
-            if False in alive:
-                if not alive[0]:
-                    self.p2.score += 1
-                    self.p2Score.setText(str(self.p2.score))
-
-                if not alive[1]:
-                    self.p1.score += 1
-                    self.p1Score.setText(str(self.p1.score))
+            for (i, bot) in enumerate(self.bots):
+                if bot is not None:
+                    self.actions[i] = bot.act(self.sim, i)
+
+            self.recorder.step(self.actions)
+            self.actions = [Turn.NONE] * len(self.riders)
+
+            # The bots can think about their next move while this one is
+            # drawn.
+            if not self.sim.over:
+                for (i, bot) in enumerate(self.bots):
+                    if bot is not None and self.riders[i].alive:
+                        bot.ponder(self.sim, i)
+
+            # Once the round is over the simulation has already given the
+            # points, so show the new scores and then create the
+            # GameOverMenu.
+            if self.sim.over:
+                self._showScores()
 
                 # This will automatically restart the game once the update
                 # loop is reached again.
                 self.reset()
 
-                gameOverMenu = GameOverMenu(self.module)
-                gameOverMenu.setScores([self.p1.score, self.p2.score])
+                gameOverMenu = self.module.getModule(GameOverMenu)
+                gameOverMenu.setScores([r.score for r in self.riders])
                 gameOverMenu.execute()
 
+    # Redraws the whole game. The chunks of the trails stand in for the
+    # background so the trails are not drawn block by block.
     def draw(self):
-        super(GameView, self).draw()
-
-        self.p1.draw(self.screen)
-        self.p2.draw(self.screen)
-
-    # Change the text on the countdown timer, and then force it to be redrawn
+        self._followCamera()
+        self._stampTrails()
+
+        # Past the right and bottom edges of an arena smaller than the view.
+        width, height = self.camera.pixel(self.sim.width, self.sim.height)
+        width, height = width - self.camera.x, height - self.camera.y
+        if width < self.size[0]:
+            self.screen.fill(self.background, (self.x + width, self.y,
+                                               self.size[0] - width,
+                                               self.size[1]))
+        if height < self.size[1]:
+            self.screen.fill(self.background, (self.x, self.y + height,
+                                               min(width, self.size[0]),
+                                               self.size[1] - height))
+
+        self.trails.draw(self.screen, self.camera, (self.x, self.y))
+
+        views.callEach(self.children, "draw")
+
+    # Only draws the blocks added since the last frame to the screen. This
+    # costs the same no matter how long the trails are. If the camera has
+    # to scroll everything moves, so the whole game is drawn.
+    def drawDirty(self):
+        if self._followCamera():
+            self.draw()
+            self.module.invalidate((self.x, self.y, self.size[0],
+                                    self.size[1]))
+            return
+
+        for (color, rect) in self._stampTrails():
+            dest = (self.x + rect[0], self.y + rect[1], rect[2], rect[3])
+            self.screen.fill(color, dest)
+            self.module.invalidate(dest)
+
+        super(GameView, self).drawDirty()
+
+    # Change the text on the countdown timer. It is drawn with the rest of
+    # the game on the next frame.
     def _timerTick(self, t):
         self.timerDisp.setText(str(t))
-        self.timerDisp.draw()
-        pygame.display.flip()
 
     def _timerFinish(self):
         self.timerDisp.setText("")
-        self.timerDisp.draw()
-        pygame.display.flip()
+
+        self.gameState = GameState.PLAYING
+        self.requestFocus()
+
+    def _showScores(self):
+        for (score, rider) in zip(self.scores, self.riders):
+            score.setText(str(rider.score))
 
     def _pause(self, e):
-        # Once the update loop is reached again start a timer
+        # Once the update loop is reached again start a timer from the top,
+        # even if one was already counting down.
+        self.timer.cancel()
         self.gameState = GameState.TIMER
 
-        pauseMenu = PauseMenu(self.module)
-        pauseMenu.setScores([self.p1.score, self.p2.score])
+        pauseMenu = self.module.getModule(PauseMenu)
+        pauseMenu.setScores([r.score for r in self.riders])
         pauseMenu.execute()
 
-    # Methods to control the movement of the players based
-    # on the respective binded key presses.
-    def _p1DirKeydown(self, event):
-        if event.key == K_RIGHT:
-            self.p1.turnRight()
-        elif event.key == K_LEFT:
-            self.p1.turnLeft()
-
-        self.p1.turnable = False
-
-    def _p1DirKeyup(self, event):
-        self.p1.turnable = True
-
-    def _p2DirKeydown(self, event):
-        if event.key == K_d:
-            self.p2.turnRight()
-        elif event.key == K_a:
-            self.p2.turnLeft()
-
-        self.p2.turnable = False
-
-    def _p2DirKeyup(self, event):
-        self.p2.turnable = True
+    # Makes the camera follow the next rider.
+    def _switchFollowing(self, e):
+        self.following = (self.following + 1) % len(self.riders)
+        if self._followCamera():
+            self.invalidate()
+
+    # Zooms in or out by a step, keeping the cell at pos on the view where
+    # it is, or the middle of the view with no pos.
+    def _zoom(self, zoomIn, pos=None):
+        cell = None if pos is None else \
+            self.camera.cellAt(pos[0] - self.x, pos[1] - self.y)
+
+        if zoomIn:
+            changed = self.camera.zoomIn(cell)
+        else:
+            changed = self.camera.zoomOut(cell)
+
+        if changed:
+            self.trails.setZoom(self.camera.zoom)
+            self.invalidate()
+
+    def _zoomKey(self, e):
+        self._zoom(e.key == K_EQUALS)
+
+    def _zoomWheel(self, e):
+        self._zoom(e.button == 4, e.pos)
+
+    # Takes the turn for the rider at index on the next step, unless the
+    # key for its last turn is still held down.
+    def _turn(self, index, action):
+        if self.bots[index] is not None:
+            return
+
+        rider = self.riders[index]
+        if rider.turnable:
+            self.actions[index] = action
+
+        rider.turnable = False
+
+    # Turns the rider at index when one of its keys goes down.
+    def _dirKeydown(self, event, index):
+        left, right = self.controls[index]
+        if event.key == right:
+            self._turn(index, Turn.RIGHT)
+        elif event.key == left:
+            self._turn(index, Turn.LEFT)
+
+    def _dirKeyup(self, event, index):
+        self.riders[index].turnable = True
@@ -8,9 +8,19 @@
 # The LineRider is able to be turned, and must keep track
 # of where it has been, to have a continuously growing
 # line.
+#
+# The LineRider does not import pygame, so it can be used in
+# games that are simulated without a screen.
+#
+# The trail is kept as the cells it covers, two shorts per
+# cell in an array, rather than as a rect tuple per block,
+# which cuts its memory by more than ten times. blocks is
+# still there as a view that reads like the old list of
+# (x, y, w, h) tuples, for drawing.
 ##########################################################
 
-import pygame
+from array import array
+
 from Player import Player
 
 # An enum implementation of the possible directions for the
@@ -23,10 +33,23 @@ class Direction(object):
     RIGHT = (1, 0)
     LEFT = (-1, 0)
 
+    # Returns the direction to the left of the provided one.
+    @staticmethod
+    def left(direction):
+        return (direction[1], -direction[0])
+
+    # Returns the direction to the right of the provided one.
+    @staticmethod
+    def right(direction):
+        return (-direction[1], direction[0])
+
 # A LineRider is essentially the line created by the
 # players during the game. It is made of multiple
-# square blocks that are tuples of the form (x, y, w, h).
+# square blocks that are dim pixels wide and tall.
 class LineRider(Player):
+    __slots__ = ("direction", "fDirection", "dim", "color", "turnable",
+                 "cells")
+
     # Define the starting position, color, direction, size
     # of the LineRider. The direction should be a value
     # from Direction defined above. dim is the width and
@@ -34,102 +57,138 @@ class LineRider(Player):
     def __init__(self, x, y, direction, dim=5, color=(100, 100, 100)):
         super(LineRider, self).__init__()
 
-        self.x, self.y = x, y
         self.direction = self.fDirection = direction
         self.dim = dim
         self.color = color
         self.turnable = True
 
-        self.blocks = [(x, y, dim, dim)]
+        # The cells of the blocks as x0, y0, x1, y1, ... with the head last.
+        self.cells = array("h", (x // dim, y // dim))
+
+    # The blocks of the trail as (x, y, w, h) rects in pixels.
+    @property
+    def blocks(self):
+        return Blocks(self)
 
     # Reset the LineRider to the state it was in after being created
     # As if update was never called.
     def reset(self):
         self.alive = self.fAlive
 
-        first = self.blocks[0]
-        self.x, self.y = first[0], first[1]
         self.direction = self.fDirection
         self.turnable = True
 
-        del self.blocks[1:]
+        del self.cells[2:]
 
-    # Returns true if the player does not overlap itself, is in bounds, and
-    # does not collide with the other player. False otherwise.
-    def checkAlive(self, player, bounds):
-        self.alive = not self._collides(player) and self._inbounds(bounds) \
-                     and not self._overlap()
+    # Returns the state of the LineRider that changes as it rides, so that
+    # it can be put back with restore. The blocks are only ever added to
+    # the end, so only how many there are is kept and not the blocks.
+    def snapshot(self):
+        return (len(self.cells) // 2, self.direction, self.alive, self.score,
+                self.turnable)
 
-        return self.alive
+    # Puts the LineRider back in the state of a snapshot taken earlier in
+    # the same round. Blocks added since then are removed.
+    def restore(self, snapshot):
+        length, self.direction, self.alive, self.score, self.turnable = \
+            snapshot
 
-    # Check if the current line rider collides with the
-    # provided one. Collision is if the head of this
-    # line rider intersects any block of the other.
-    def _collides(self, lineRider):
-        for block in lineRider.blocks:
-            if self.blocks[-1] == block:
-                return True
+        del self.cells[length * 2:]
 
-        return False
+    # Returns the cell of the arena that the block at index is in.
+    def cell(self, index):
+        if index < 0:
+            index += len(self.cells) // 2
 
-    # Check if the line rider has overlapped itself.
-    def _overlap(self):
-        for b in self.blocks:
-            if self.blocks.count(b) > 1:
-                return True
+        return (self.cells[index * 2], self.cells[index * 2 + 1])
 
-        return False
+    # Returns the cell of the arena that the head of this LineRider is in.
+    def head(self):
+        return (self.cells[-2], self.cells[-1])
 
-    # Check if the linerider is within the provided bounds.
-    # The bounds should be provided as (x, y, width, height)
-    def _inbounds(self, bounds):
-        last = self.blocks[-1]
+    # Returns true if the head of the player is in the arena and is not on a
+    # cell that any trail, including its own, has already covered. False
+    # otherwise. The head itself must not be in the arena yet.
+    def checkAlive(self, arena):
+        x, y = self.head()
+        self.alive = arena.inbounds(x, y) and not arena.occupied(x, y)
 
-        return last[0] >= bounds[0] and last[0] < bounds[0] + bounds[2] \
-               and last[1] >= bounds[1] and last[1] < bounds[1] + bounds[3]
+        return self.alive
 
     # Update the LineRider by adding a new Block to it in
     # the corresponding direction. 
     def update(self):
-        last = self.blocks[-1]
+        x, y = self.head()
 
-        # Remember each block is a tuple in the form
-        # (x, y, width, height)
-        newX = last[0] + last[2] * self.direction[0]
-        newY = last[1] + last[3] * self.direction[1]
+        self.cells.append(x + self.direction[0])
+        self.cells.append(y + self.direction[1])
 
-        newBlock = (newX, newY, self.dim, self.dim)
-        self.blocks.append(newBlock)
+    # Adds a block at the cell (x, y) as the new head, for riders that are
+    # moved by something other than update, such as a game server.
+    def place(self, x, y):
+        self.cells.append(x)
+        self.cells.append(y)
 
-    # Iterates through all the tuples defining blocks and
-    # draws them using pygame.draw.rect. Requires a ref to
-    # the pygame screen object.
-    def draw(self, screen):
-        for b in self.blocks:
-            pygame.draw.rect(screen, self.color, b, 0)
+    # Fills in the blocks from start on onto the surface. Requires a ref
+    # to the pygame screen object, or any other surface to draw the trail
+    # on.
+    def draw(self, screen, start=0):
+        cells, dim, color = self.cells, self.dim, self.color
+        fill = screen.fill
+
+        for i in range(start * 2, len(cells), 2):
+            fill(color, (cells[i] * dim, cells[i + 1] * dim, dim, dim))
 
     # Turns this LineRider left assuming the forward direction
     # is the current direction of the LineRider.
     def turnLeft(self):
         if self.turnable:
-            if self.direction == Direction.TOP:
-                self.direction = Direction.LEFT
-            elif self.direction == Direction.BOTTOM:
-                self.direction = Direction.RIGHT
-            elif self.direction == Direction.RIGHT:
-                self.direction = Direction.TOP
-            elif self.direction == Direction.LEFT:
-                self.direction = Direction.BOTTOM
+            self.direction = Direction.left(self.direction)
 
     # Turns the LineRider right assuming we are facing the
     # current direction.
     def turnRight(self):
         if self.turnable:
-            if self.direction == Direction.TOP:
-                self.direction = Direction.RIGHT
-            elif self.direction == Direction.BOTTOM:
-                self.direction = Direction.LEFT
-            elif self.direction == Direction.RIGHT:
-                self.direction = Direction.BOTTOM
-            elif self.direction == Direction.LEFT:
-                self.direction = Direction.TOP
+            self.direction = Direction.right(self.direction)
+
+# A read only view of the trail of a LineRider as a sequence of
+# (x, y, w, h) tuples in pixels, which are made as they are read.
+# Slicing it gives a list of them.
+class Blocks(object):
+    __slots__ = ("rider",)
+
+    def __init__(self, rider):
+        self.rider = rider
+
+    def __len__(self):
+        return len(self.rider.cells) // 2
+
+    def __getitem__(self, index):
+        cells, dim = self.rider.cells, self.rider.dim
+
+        if isinstance(index, slice):
+            return [(cells[i * 2] * dim, cells[i * 2 + 1] * dim, dim, dim)
+                    for i in range(*index.indices(len(self)))]
+
+        if index < -len(self) or index >= len(self):
+            raise IndexError("block index out of range")
+
+        x, y = self.rider.cell(index)
+        return (x * dim, y * dim, dim, dim)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # Equal to another view or a list with the same blocks.
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
@@ -0,0 +1,306 @@
+######################################################################
+# Deterministic lockstep for peer to peer network games. Every peer
+# runs the same TronSimulation and they only send each other the turn
+# their rider takes on every tick. A turn made on the keyboard is
+# played input delay ticks later, which gives it time to reach the
+# other peers before they need it.
+#
+# When the turn of a remote rider has not arrived in time, it is
+# guessed to be no turn and the game goes on without waiting. If the
+# real turn turns out to be different, the game is rolled back to a
+# snapshot from before that tick and simulated again with it. Since
+# snapshots of a TronSimulation don't copy the trails, they are cheap
+# enough to take every tick.
+#
+# A transport sends the turns as (frame, index, action) and hands over
+# the ones that arrived. They need not arrive in order. A transport is
+# connected until the other peer goes away, after which the session
+# can never advance past the last turn it got from that peer.
+######################################################################
+
+import collections
+import errno
+import random
+import socket
+import time
+
+import Protocol
+from Protocol import Message
+from Simulation import Turn
+
+class LockstepSession(object):
+    # Creates a session for the simulation, where this peer controls the
+    # rider at index local and talks to the others through transport.
+    # delay is the input delay in ticks. window is how many ticks the
+    # game may run ahead of the last turn known from every peer before it
+    # waits for them.
+    def __init__(self, sim, local, transport, delay=2, window=60):
+        self.sim = sim
+        self.local = local
+        self.transport = transport
+        self.delay = delay
+        self.window = window
+
+        self.players = len(sim.riders)
+
+        # frame counts ticks across rounds, and is the next one to be
+        # simulated. A round is reset on a frame of its own.
+        self.frame = 0
+
+        # Keyed by frame. inputs are the turns known so far, with None for
+        # the ones that haven't arrived. used are the turns the frame was
+        # simulated with and snapshots are the game from before the frame.
+        self.inputs = {}
+        self.used = {}
+        self.snapshots = {}
+
+        # The last frame each peer has sent its turns up to.
+        self.confirmed = [-1] * self.players
+
+        # Turns from the keyboard that are waiting for a frame.
+        self.pending = collections.deque()
+
+        self.rollbacks = 0
+
+    # Returns False once the other peers have gone away.
+    def connected(self):
+        return self.transport.connected
+
+    # Queues a turn of the local rider. It is played input delay frames
+    # from now, or later if other turns are already waiting.
+    def turn(self, action):
+        self.pending.append(action)
+
+    # Returns the last frame for which the turns of every peer are known.
+    def confirmedFrame(self):
+        return min(self.confirmed)
+
+    # Reads the turns that have arrived, rolls back if any of them were
+    # guessed wrong, and then simulates the next frame. Returns False if
+    # the game has to wait for the other peers instead.
+    def advance(self):
+        rollback = self._receive()
+        if rollback is not None:
+            self._rollback(rollback)
+
+        if self.frame - self.confirmedFrame() > self.window:
+            return False
+
+        # A round is only reset once every turn that led to its end is
+        # known, since a rollback can't go back past a reset.
+        if self.sim.over and self.confirmedFrame() < self.frame - 1:
+            return False
+
+        # A rollback can leave the game on an earlier frame than before, and
+        # the turns already sent for the frames after it can't change.
+        while self.confirmed[self.local] < self.frame + self.delay:
+            self._sendLocal(self.confirmed[self.local] + 1)
+
+        self._simulate()
+        self._prune()
+
+        return True
+
+    # Returns the turns for frame, guessing no turn for those unknown.
+    def _actions(self, frame):
+        known = self.inputs.get(frame, [None] * self.players)
+        return [Turn.NONE if action is None else action for action in known]
+
+    # Simulates the next frame, which resets the round if it is over.
+    def _simulate(self):
+        self.snapshots[self.frame] = self.sim.snapshot()
+
+        if self.sim.over:
+            self.sim.reset()
+
+            # Nothing can roll back past the reset.
+            self.snapshots.clear()
+            self.used.clear()
+        else:
+            actions = self._actions(self.frame)
+            self.used[self.frame] = actions
+            self.sim.step(actions)
+
+        self.frame += 1
+
+    # Puts the game back to before frame and simulates it again up to where
+    # it was, with the turns known now. If the round ends sooner this time,
+    # what was simulated after that is thrown away.
+    def _rollback(self, frame):
+        end = self.frame
+
+        self.sim.restore(self.snapshots[frame])
+        self.frame = frame
+        while self.frame < end and not self.sim.over:
+            self._simulate()
+
+        for stale in range(self.frame, end):
+            self.used.pop(stale, None)
+            self.snapshots.pop(stale, None)
+
+        self.rollbacks += 1
+
+    # Decides the local turn for frame and sends it to the other peers.
+    def _sendLocal(self, frame):
+        action = self.pending.popleft() if self.pending else Turn.NONE
+
+        self.inputs.setdefault(frame, [None] * self.players)[self.local] = \
+            action
+        self.confirmed[self.local] = frame
+        self.transport.send((frame, self.local, action))
+
+    # Records the turns that arrived. Returns the earliest frame that was
+    # simulated with a wrong guess, or None if every guess was right.
+    def _receive(self):
+        rollback = None
+
+        for (frame, index, action) in self.transport.receive():
+            if frame <= self.confirmed[index]:
+                continue
+
+            self.inputs.setdefault(frame, [None] * self.players)[index] = \
+                action
+
+            # A peer has only confirmed the frames up to the first turn of
+            # its that is still missing.
+            while self._known(self.confirmed[index] + 1, index):
+                self.confirmed[index] += 1
+
+            used = self.used.get(frame)
+            if used is not None and used[index] != action:
+                if rollback is None or frame < rollback:
+                    rollback = frame
+
+        return rollback
+
+    # Returns True if the turn of the rider at index for frame has arrived.
+    def _known(self, frame, index):
+        known = self.inputs.get(frame)
+        return known is not None and known[index] is not None
+
+    # Forgets the frames that every peer has confirmed, since the game can
+    # never be rolled back to them again. The turns of frames that the peers
+    # are ahead on are still needed to simulate them.
+    def _prune(self):
+        confirmed = self.confirmedFrame()
+
+        for frame in [f for f in self.snapshots if f <= confirmed]:
+            del self.snapshots[frame]
+            self.used.pop(frame, None)
+
+        last = min(confirmed, self.frame)
+        for frame in [f for f in self.inputs if f < last]:
+            del self.inputs[frame]
+
+# A transport between two sessions in the same process, for trying out
+# lockstep without a network. Messages can be held back by a delay plus
+# a random jitter, but still arrive in the order they were sent, the
+# same as over TCP. clock can be replaced to control time.
+class LoopbackTransport(object):
+    def __init__(self, delay=0.0, jitter=0.0, seed=None, clock=time.time):
+        self.delay = delay
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.clock = clock
+
+        self.peer = None
+        self.queue = collections.deque()
+        self.connected = True
+        self._lastArrival = 0
+
+    # Returns two transports connected to each other.
+    @staticmethod
+    def pair(delay=0.0, jitter=0.0, seed=None, clock=time.time):
+        a = LoopbackTransport(delay, jitter, seed, clock)
+        b = LoopbackTransport(delay, jitter, seed, clock)
+        a.peer, b.peer = b, a
+
+        return (a, b)
+
+    # Disconnects both ends. What was sent before still arrives.
+    def close(self):
+        self.connected = False
+        if self.peer is not None:
+            self.peer.connected = False
+
+    def send(self, message):
+        if not self.connected:
+            return
+
+        arrival = self.clock() + self.delay + \
+                  self.random.uniform(0, self.jitter)
+        arrival = max(arrival, self._lastArrival)
+        self._lastArrival = arrival
+
+        self.peer.queue.append((arrival, message))
+
+    # Returns the messages that have arrived by now.
+    def receive(self):
+        now = self.clock()
+        messages = []
+        while self.queue and self.queue[0][0] <= now:
+            messages.append(self.queue.popleft()[1])
+
+        return messages
+
+# A transport over a connected TCP socket to another peer. The socket is
+# made non-blocking so receive never stalls the game loop, and turns the
+# socket can't take yet are kept and sent with the next ones.
+class SocketTransport(object):
+    # The errors of a non-blocking socket that only mean it has to be tried
+    # again later.
+    WOULDBLOCK = (errno.EWOULDBLOCK, errno.EAGAIN)
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+
+        self.buffer = Protocol.MessageBuffer()
+        self.outgoing = b""
+        self.connected = True
+
+    def close(self):
+        self.sock.close()
+        self.outgoing = b""
+        self.connected = False
+
+    def send(self, message):
+        if self.connected:
+            self.outgoing += Protocol.encodeInput(*message)
+            self._flush()
+
+    # Returns the turns that have arrived. If the other peer closed the
+    # connection or it failed, the transport is closed.
+    def receive(self):
+        self._flush()
+
+        while self.connected:
+            try:
+                data = self.sock.recv(4096)
+            except socket.error as e:
+                if e.errno not in SocketTransport.WOULDBLOCK:
+                    self.close()
+
+                break
+
+            if not data:
+                self.close()
+            else:
+                self.buffer.feed(data)
+
+        return [fields for (type, fields) in self.buffer.messages()
+                if type == Message.INPUT]
+
+    # Sends as much of what is waiting to be sent as the socket takes.
+    def _flush(self):
+        while self.connected and self.outgoing:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except socket.error as e:
+                if e.errno not in SocketTransport.WOULDBLOCK:
+                    self.close()
+
+                return
+
+            self.outgoing = self.outgoing[sent:]
@@ -0,0 +1,37 @@
+#!/usr/bin/python
+
+######################################################################
+# The module for playing a game hosted by a TronServer.
+######################################################################
+
+from pydroid import modules
+
+from GameView import GameView
+from NetworkView import NetworkView
+from Simulation import TronSimulation
+from TronClient import TronClient
+
+class NetworkModule(modules.Module):
+    # Connects to the server at host and port. Raises socket.error if the
+    # server can not be reached.
+    def __init__(self, parent, host, port):
+        super(NetworkModule, self).__init__(parent, (255, 255, 255),
+                                            parent.size)
+
+        self.incremental = True
+
+        # The server decides how many riders there are, so there is a color
+        # for as many as it could have.
+        colors = GameView.loadColors(TronSimulation.MAX_RIDERS)
+        self.client = TronClient(host, port, GameView.DIM, colors)
+        self.client.connect()
+
+        self.game = NetworkView(self, self.client)
+        self.setView(self.game)
+
+    # Leaves the server once this module is done, for any reason.
+    def execute(self):
+        try:
+            super(NetworkModule, self).execute()
+        finally:
+            self.client.close()
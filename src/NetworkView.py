@@ -0,0 +1,70 @@
+#!/usr/bin/python
+
+######################################################################
+# The game view for a network game. It draws the game the same way as
+# GameView, but the riders are a mirror of the game on the server that
+# the TronClient keeps up to date. The arrow keys send turns to the
+# server instead of turning the rider here, and there is no pausing
+# or second player on the keyboard.
+######################################################################
+
+from pygame.locals import *
+
+from GameView import GameView
+from Protocol import Message
+from Simulation import Turn
+
+class NetworkView(GameView):
+    def __init__(self, module, client):
+        # The client is needed to setup the players in the GameView init.
+        self.client = client
+        super(NetworkView, self).__init__(module)
+
+        self.removeEventCallback((KEYDOWN, K_SPACE))
+
+        self.timerDisp.setText("Waiting for players")
+
+        # The camera keeps this player's rider in view.
+        self.following = self.client.index
+
+    # The players are the mirror of the riders on the server. The arrow
+    # keys turn the rider that this player controls, whichever it is.
+    def _initPlayers(self):
+        self.sim = self.client.sim
+        self.riders = self.sim.riders
+        self.controls = [GameView.CONTROLS[0]]
+
+        # The rider that this player controls.
+        self.rider = self.client.rider()
+
+    # Reads what the server sent since the last frame. The riders are
+    # already moved by the client, so only the displays are updated here.
+    # If the server goes away the game is left.
+    def update(self):
+        for (type, fields) in self.client.poll():
+            if type == Message.START:
+                self.timerDisp.setText("")
+                self.requestFocus()
+            elif type == Message.OVER:
+                self._showScores()
+                self.timerDisp.setText("Next round")
+            elif type == Message.RESET:
+                self._clearTrails()
+                self.timerDisp.setText("")
+
+        if not self.client.connected:
+            self.module.back()
+
+    # The turns are sent to the server, which turns the rider on its next
+    # tick. Holding down the key only sends one turn, like a local game.
+    def _dirKeydown(self, event, index):
+        if self.rider.turnable:
+            if event.key == K_RIGHT:
+                self.client.sendTurn(Turn.RIGHT)
+            elif event.key == K_LEFT:
+                self.client.sendTurn(Turn.LEFT)
+
+        self.rider.turnable = False
+
+    def _dirKeyup(self, event, index):
+        self.rider.turnable = True
@@ -8,9 +8,11 @@
 # library.
 ###########################################################
 
-from pydroid import modules, views
+from pydroid import views
 
-class PauseMenu(modules.Module):
+from ScoreMenu import ScoreMenu
+
+class PauseMenu(ScoreMenu):
     def __init__(self, parent):
         super(PauseMenu, self).__init__(parent, (255, 255, 255), parent.size)
 
@@ -35,21 +37,7 @@ class PauseMenu(modules.Module):
         self.menu.addOptionCallback("Main menu", self.back, count=2)
         self.menu.addOptionCallback("Quit", self.quit)
 
-    # Initialize the views for the scores of this game that is paused.
-    def _initScores(self):
-        # Create the TextDisp objects but don't put in any text yet
-        self.p1Score = views.TextDisp(self, (10, 10))
-        self.p1Score.setFont(fontsize=15)
-
-        self.p2Score = views.TextDisp(self, (self.size[0] - 150, 10))
-        self.p2Score.setFont(fontsize=15)
-
-    # Set the text for the scores in the two corners.
-    def setScores(self, scores):
-        self.p1Score.setText("Player 1: " + str(scores[0]))
-        self.p2Score.setText("Player 2: " + str(scores[1]))
-
     # Assumes that the parent is the GameModule object
-    def _startGameOver(self):
+    def _startGameOver(self, e=None):
         self.parent.reset()
         self.back()
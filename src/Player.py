@@ -7,10 +7,14 @@
 # Class that defines the common characteristic amongst
 # Players. Such as score, update, draw methods and checking
 # if the player is currently alive. Super class should be
-# called for init and reset.
+# called for init and reset. Players use __slots__, since a
+# server keeps many of them, so subclasses have to list any
+# attributes they add.
 ###########################################################
 
 class Player(object):
+    __slots__ = ("score", "fScore", "alive", "fAlive")
+
     def __init__(self, score=0, alive=True):
         self.score = self.fScore = score
         self.alive = self.fAlive = alive
@@ -0,0 +1,254 @@
+######################################################################
+# Policies decide the turns of riders in a TronSimulation without any
+# input from a player. Each tick a policy is asked for the Turn of one
+# rider given the whole simulation. Policies that are random take a
+# seed so that the games they play can be reproduced.
+#
+# FloodFill and Voronoi look ahead at how much room each move leaves,
+# using a SpaceEvaluator. They are quick enough to drive a rider in a
+# local game at full speed as well as in tournaments. Minimax searches
+# several moves ahead, and in a local game does it on a worker thread
+# between ticks.
+######################################################################
+
+import random
+
+from Evaluator import SpaceEvaluator
+from Search import AlphaBeta, SearchThread
+from Simulation import Turn
+
+class Policy(object):
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    # Called before each round, with the seed to use for that round.
+    def reset(self, seed=None):
+        self.random.seed(seed)
+
+    # Returns the Turn that the rider at index in sim should take.
+    def act(self, sim, index):
+        return Turn.NONE
+
+    # Called when the policy rides in a game played in real time, which
+    # steps every seconds. act has to return well within that.
+    def realtime(self, seconds):
+        pass
+
+    # Called after each step of a game played in real time with the game as
+    # the rider at index will next act in, so that the policy can start
+    # thinking about its move while the game is drawn.
+    def ponder(self, sim, index):
+        pass
+
+    # Called once the policy is done riding, to let go of anything it
+    # holds on to between games.
+    def close(self):
+        pass
+
+# Never turns.
+class Straight(Policy):
+    pass
+
+# Turns left or right at random every so often, whether or not it is safe.
+class RandomTurns(Policy):
+    def __init__(self, seed=None, chance=0.1):
+        super(RandomTurns, self).__init__(seed)
+        self.chance = chance
+
+    def act(self, sim, index):
+        if self.random.random() < self.chance:
+            return self.random.choice((Turn.LEFT, Turn.RIGHT))
+
+        return Turn.NONE
+
+# Goes straight until the cell ahead is taken, then turns to whichever
+# side is free, picking at random if both are.
+class Avoid(Policy):
+    def act(self, sim, index):
+        rider = sim.riders[index]
+        if sim.free(*sim.nextCell(rider)):
+            return Turn.NONE
+
+        turns = [Turn.LEFT, Turn.RIGHT]
+        self.random.shuffle(turns)
+        for turn in turns:
+            if sim.free(*sim.nextCell(rider, turn)):
+                return turn
+
+        return Turn.NONE
+
+# A policy that judges the moves that don't crash right away by the space
+# they leave, and takes the best one. Of moves that are as good, the one
+# with the fewest free cells around it is taken, which keeps the rider
+# along walls and trails rather than leaving gaps it can't fill later.
+# After that going straight wins ties, and otherwise they are broken at
+# random.
+class SpacePolicy(Policy):
+    # The cells around a move whose free ones are counted.
+    SIDES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+    def __init__(self, seed=None):
+        super(SpacePolicy, self).__init__(seed)
+        self.evaluator = None
+
+    # Loads the arena of sim into the evaluator, making a new one if the
+    # arena is not the size of the last.
+    def _load(self, sim):
+        if self.evaluator is None or \
+           (self.evaluator.width, self.evaluator.height) != \
+           (sim.width, sim.height):
+            self.evaluator = SpaceEvaluator(sim.width, sim.height)
+
+        self.evaluator.load(sim.arena)
+
+    def act(self, sim, index):
+        self._load(sim)
+
+        turns = [Turn.LEFT, Turn.RIGHT]
+        self.random.shuffle(turns)
+
+        rider = sim.riders[index]
+        best, bestScore = Turn.NONE, None
+        for turn in [Turn.NONE] + turns:
+            x, y = sim.nextCell(rider, turn)
+            if not sim.free(x, y):
+                continue
+
+            sides = 0
+            for (dx, dy) in self.SIDES:
+                if sim.free(x + dx, y + dy):
+                    sides += 1
+
+            score = (self.score(sim, index, x, y), -sides)
+            if bestScore is None or score > bestScore:
+                best, bestScore = turn, score
+
+        return best
+
+    # Returns how good it is for the rider at index to move to the free cell
+    # (x, y). Higher is better.
+    def score(self, sim, index, x, y):
+        return 0
+
+# Moves where it can reach the most cells from.
+class FloodFill(SpacePolicy):
+    def score(self, sim, index, x, y):
+        return self.evaluator.reachable(x, y)
+
+# Moves where it has the most territory over the rider with the most
+# territory of the others. Once the riders are walled off from each other
+# that is the same as filling the most space. A move next to the head of
+# another rider costs HEAD_ON cells, since they might move there too.
+class Voronoi(SpacePolicy):
+    HEAD_ON = 10
+
+    def score(self, sim, index, x, y):
+        others = [rider.head() for (i, rider) in enumerate(sim.riders)
+                  if i != index and rider.alive]
+
+        territory = self.evaluator.voronoi([(x, y)] + others,
+                                           self.evaluator.bit(x, y))
+        score = territory[0] - max(territory[1:] or [0])
+
+        for (ox, oy) in others:
+            if abs(x - ox) + abs(y - oy) == 1:
+                score -= Voronoi.HEAD_ON
+
+        return score
+
+# Searches depth moves ahead against the closest other rider with an
+# AlphaBeta search, and takes the move that keeps the most territory
+# over it however it answers. With a budget in seconds the search stops
+# once it is spent, which makes the moves depend on how fast the machine
+# is, so tournaments search a fixed depth instead. Once the rider is
+# walled off from the others there is nobody to search against, and it
+# fills its space like FloodFill. It counts the diagonal cells too when
+# keeping to walls, which makes it follow its own trail much more
+# tightly and fill a lot more of its space.
+class Minimax(FloodFill):
+    # The share of each tick a search can take in a game played in real
+    # time, and how deep it can go when only the time limits it.
+    SHARE = 0.5
+    MAX_DEPTH = 64
+
+    SIDES = SpacePolicy.SIDES + ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+    def __init__(self, seed=None, depth=3, budget=None):
+        super(Minimax, self).__init__(seed)
+        self.depth = depth
+        self.budget = budget
+
+        self.search = None
+        self.worker = None
+        self.threaded = False
+
+    # Searches on a worker thread, for as long as a share of each tick.
+    def realtime(self, seconds):
+        self.depth = Minimax.MAX_DEPTH
+        self.budget = seconds * Minimax.SHARE
+        self.threaded = True
+
+        # The worker is made along with the next search.
+        self.search = None
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+
+    def ponder(self, sim, index):
+        if self.threaded:
+            position = self._position(sim, index)
+            if position is not None:
+                self.worker.start(position, self.depth, self.budget)
+
+    def act(self, sim, index):
+        position = self._position(sim, index)
+        if position is None:
+            return super(Minimax, self).act(sim, index)
+
+        if self.worker is not None:
+            return self.worker.result(position, self.depth, self.budget)
+
+        return self.search.search(*position, depth=self.depth,
+                                  budget=self.budget)
+
+    # Returns the position to search for the rider at index, as the
+    # arguments of AlphaBeta.search, or None if no other rider can be
+    # reached from it.
+    def _position(self, sim, index):
+        self._load(sim)
+
+        if self.search is None or self.search.evaluator.width != sim.width \
+           or self.search.evaluator.height != sim.height:
+            self.close()
+            self.search = AlphaBeta(sim.width, sim.height)
+            self.worker = SearchThread(self.search) if self.threaded else None
+
+        rider = sim.riders[index]
+        x, y = rider.head()
+
+        others = [other for (i, other) in enumerate(sim.riders)
+                  if i != index and other.alive]
+        others.sort(key=lambda o: abs(o.head()[0] - x) + abs(o.head()[1] - y))
+
+        for other in others:
+            if self.evaluator.connected((x, y), other.head()):
+                ox, oy = other.head()
+                stride = self.evaluator.stride
+
+                return (self.evaluator.free, y * stride + x, rider.direction,
+                        oy * stride + ox, other.direction)
+
+        return None
+
+# The policies that can be picked by name, for tournaments and for the
+# bots of a local game.
+POLICIES = {
+    "straight": Straight,
+    "random": RandomTurns,
+    "avoid": Avoid,
+    "flood": FloodFill,
+    "voronoi": Voronoi,
+    "minimax": Minimax,
+}
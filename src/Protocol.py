@@ -0,0 +1,138 @@
+######################################################################
+# The messages sent between a TronServer and its clients. Clients only
+# ever send the turns of their rider, and the server sends back what
+# changed each tick, which is the new head cell of every rider still
+# riding and the riders that died. No message ever holds a whole trail.
+#
+# Every message is framed as its length in 2 bytes, then a byte for its
+# type and then its fields, all in network byte order.
+######################################################################
+
+import struct
+
+from LineRider import Direction
+
+DEFAULT_PORT = 4747
+
+# Directions are sent as their index in this tuple.
+DIRECTIONS = (Direction.TOP, Direction.RIGHT, Direction.BOTTOM,
+              Direction.LEFT)
+
+# The types of messages.
+#
+# WELCOME is sent to a client once it connects. It has the index of its
+#   rider, the size of the arena, the tick rate and the start of each
+#   rider as (x, y, direction).
+# START is sent once every player has joined and the game begins.
+# TICK has the tick number, the new heads as (index, x, y) and the
+#   indices of the riders that died in that tick.
+# OVER is sent when a round ends, with the score of each rider.
+# RESET is sent when the next round begins.
+# TURN is sent by a client with the Turn its rider should take.
+# INPUT is sent between lockstep peers with the tick, the index of the
+#   rider and the Turn it takes on that tick.
+class Message(object):
+    WELCOME, START, TICK, OVER, RESET, TURN, INPUT = range(7)
+
+HEADER = struct.Struct("!HB")
+WELCOME = struct.Struct("!BHHHB")
+POSITION = struct.Struct("!HHB")
+TICK = struct.Struct("!IB")
+HEAD = struct.Struct("!BHH")
+TURN = struct.Struct("!B")
+INPUT = struct.Struct("!IBB")
+
+# Frames the message of the given type with its length.
+def _frame(type, body=b""):
+    return HEADER.pack(len(body) + 1, type) + body
+
+def encodeWelcome(index, width, height, rate, starts):
+    body = WELCOME.pack(index, width, height, rate, len(starts))
+    for (x, y, direction) in starts:
+        body += POSITION.pack(x, y, DIRECTIONS.index(direction))
+
+    return _frame(Message.WELCOME, body)
+
+def encodeStart():
+    return _frame(Message.START)
+
+def encodeTick(tick, heads, deaths):
+    body = TICK.pack(tick, len(heads))
+    for head in heads:
+        body += HEAD.pack(*head)
+
+    body += struct.pack("!B%dB" % len(deaths), len(deaths), *deaths)
+    return _frame(Message.TICK, body)
+
+def encodeOver(scores):
+    body = struct.pack("!B%dI" % len(scores), len(scores), *scores)
+    return _frame(Message.OVER, body)
+
+def encodeReset():
+    return _frame(Message.RESET)
+
+def encodeTurn(action):
+    return _frame(Message.TURN, TURN.pack(action))
+
+def encodeInput(tick, index, action):
+    return _frame(Message.INPUT, INPUT.pack(tick, index, action))
+
+# Decodes the body of a message of the given type into a tuple of its
+# fields, in the same order as they are passed to the encode functions.
+def decode(type, body):
+    if type == Message.WELCOME:
+        index, width, height, rate, count = WELCOME.unpack_from(body)
+        starts = []
+        for i in range(count):
+            offset = WELCOME.size + i * POSITION.size
+            x, y, d = POSITION.unpack_from(body, offset)
+            starts.append((x, y, DIRECTIONS[d]))
+
+        return (index, width, height, rate, starts)
+    elif type == Message.TICK:
+        tick, count = TICK.unpack_from(body)
+        heads = [HEAD.unpack_from(body, TICK.size + i * HEAD.size)
+                 for i in range(count)]
+
+        offset = TICK.size + count * HEAD.size
+        deaths = list(bytearray(body[offset + 1:]))
+
+        return (tick, heads, deaths)
+    elif type == Message.OVER:
+        count = bytearray(body[:1])[0]
+        return (list(struct.unpack_from("!%dI" % count, body, 1)),)
+    elif type == Message.TURN:
+        return TURN.unpack(body)
+    elif type == Message.INPUT:
+        return INPUT.unpack(body)
+
+    return ()
+
+# Collects bytes as they arrive from a socket and splits them into the
+# messages that are complete so far.
+class MessageBuffer(object):
+    def __init__(self):
+        self.data = b""
+
+    # Adds the received bytes to the buffer.
+    def feed(self, data):
+        self.data += data
+
+    # Returns a list of (type, fields) for every complete message in the
+    # buffer and removes them from it.
+    def messages(self):
+        messages = []
+        offset = 0
+
+        while len(self.data) - offset >= HEADER.size:
+            length, type = HEADER.unpack_from(self.data, offset)
+            end = offset + 2 + length
+            if end > len(self.data):
+                break
+
+            body = self.data[offset + HEADER.size:end]
+            messages.append((type, decode(type, body)))
+            offset = end
+
+        self.data = self.data[offset:]
+        return messages
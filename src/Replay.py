@@ -0,0 +1,236 @@
+######################################################################
+# Recording and playback of games. Since the rules are deterministic,
+# a game is stored as only where and how the riders start and then the
+# turns they took and when the rounds were reset. No trails are ever
+# written, so a recording is a few bytes per turn.
+#
+# A recording is a header followed by events. The header is
+#
+#   "TRNR", version, width, height, riders, has seed, seed
+#
+# and then for each rider its start cell, direction and color. Each
+# event is the number of ticks since the last event as a varint and
+# then a code, also a varint, which is RESET, END or a turn. A turn is
+# coded as TURN + rider * 2 + 0 for left or 1 for right, so the turns of
+# the first 63 riders take a byte and any rider after them takes more.
+#
+# Playing back simulates the game again. To seek, the player jumps to
+# the start of the round the tick is in, or to the last keyframe it
+# passed in that round, and simulates from there. So seeking never
+# costs more than a round no matter how long the game is.
+######################################################################
+
+import struct
+
+from LineRider import LineRider
+from Protocol import DIRECTIONS
+from Simulation import TronSimulation, Turn
+
+MAGIC = b"TRNR"
+VERSION = 1
+
+HEADER = struct.Struct("!4sBHHBBI")
+RIDER = struct.Struct("!HHBBBB")
+
+# The codes of the events.
+RESET, END, TURN = range(3)
+
+# Appends n to data as a varint, seven bits at a time.
+def _writeVarint(data, n):
+    while n >= 0x80:
+        data.append((n & 0x7f) | 0x80)
+        n >>= 7
+
+    data.append(n)
+
+# Reads a varint from data at offset. Returns the number and the offset
+# right after it.
+def _readVarint(data, offset):
+    n = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+
+        n |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            return (n, offset)
+
+# Records a game as it is played. Step and reset the game through the
+# recorder rather than the simulation, so that every turn and reset is
+# seen. The riders have to be at their starts when recording begins.
+class ReplayRecorder(object):
+    def __init__(self, sim, seed=None):
+        self.sim = sim
+        self.seed = seed
+
+        self.starts = []
+        for rider in sim.riders:
+            x, y = rider.cell(0)
+            self.starts.append((x, y, rider.fDirection, rider.color))
+
+        self.frame = 0
+        self.events = bytearray()
+        self._lastFrame = 0
+
+    def _event(self, code):
+        _writeVarint(self.events, self.frame - self._lastFrame)
+        _writeVarint(self.events, code)
+        self._lastFrame = self.frame
+
+    # Steps the game with the actions, recording the turns.
+    def step(self, actions=None):
+        if actions is not None:
+            for (i, action) in enumerate(actions):
+                if action != Turn.NONE:
+                    self._event(TURN + i * 2 + (action - Turn.LEFT))
+
+        self.frame += 1
+        return self.sim.step(actions)
+
+    # Resets the game for the next round, recording the reset.
+    def reset(self):
+        self._event(RESET)
+        self.sim.reset()
+
+    # Returns the recording so far as bytes.
+    def tobytes(self):
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.sim.width,
+                                     self.sim.height, len(self.starts),
+                                     self.seed is not None, self.seed or 0))
+        for (x, y, direction, color) in self.starts:
+            data += RIDER.pack(x, y, DIRECTIONS.index(direction), *color[:3])
+
+        data += self.events
+        _writeVarint(data, self.frame - self._lastFrame)
+        data.append(END)
+
+        return bytes(data)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.tobytes())
+
+# Plays back a recording by simulating it again. dim is the size in
+# pixels of a cell, which only matters for drawing the riders. A
+# keyframe is kept every interval ticks of the current round, and the
+# start of every round is kept once it is reached.
+class ReplayPlayer(object):
+    def __init__(self, data, dim=1, interval=60):
+        data = bytearray(data)
+        magic, version, width, height, riders, hasSeed, seed = \
+            HEADER.unpack_from(bytes(data[:HEADER.size]))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Tron recording")
+
+        self.seed = seed if hasSeed else None
+        self.interval = interval
+
+        self.sim = TronSimulation(width, height)
+        offset = HEADER.size
+        for i in range(riders):
+            x, y, d, r, g, b = RIDER.unpack_from(bytes(data), offset)
+            offset += RIDER.size
+
+            self.sim.addRider(LineRider(x * dim, y * dim, DIRECTIONS[d], dim,
+                                        (r, g, b)))
+
+        # The events as (frame, code), with the frames made absolute.
+        self.events = []
+        frame = 0
+        while True:
+            delta, offset = _readVarint(data, offset)
+            frame += delta
+
+            code, offset = _readVarint(data, offset)
+            if code == END:
+                break
+
+            self.events.append((frame, code))
+
+        self.frames = frame
+        self.size = len(data)
+
+        # The next frame to be played and the index of the next event.
+        self.frame = 0
+        self.next = 0
+
+        # The starts of the rounds reached so far as (frame, next, scores),
+        # and the keyframes of the current round as (frame, next, snapshot).
+        self.rounds = [(0, 0, [0] * riders)]
+        self.keyframes = []
+
+    @staticmethod
+    def load(path, dim=1, interval=60):
+        with open(path, "rb") as f:
+            return ReplayPlayer(f.read(), dim, interval)
+
+    def done(self):
+        return self.frame >= self.frames
+
+    # Plays the next frame. Returns the riders that died in it.
+    def step(self):
+        events = self.events
+
+        # Resets come before the turns of a frame, and a keyframe is taken
+        # between them so that it is always from the round it belongs to.
+        while self.next < len(events) and events[self.next] == \
+              (self.frame, RESET):
+            self.next += 1
+            self.sim.reset()
+            self.keyframes = []
+
+            if self.rounds[-1][0] < self.frame:
+                scores = [rider.score for rider in self.sim.riders]
+                self.rounds.append((self.frame, self.next, scores))
+
+        if self.frame % self.interval == 0:
+            self.keyframes.append((self.frame, self.next,
+                                   self.sim.snapshot()))
+
+        actions = [Turn.NONE] * len(self.sim.riders)
+        while self.next < len(events) and events[self.next][0] == self.frame:
+            rider, turn = divmod(events[self.next][1] - TURN, 2)
+            actions[rider] = Turn.LEFT + turn
+            self.next += 1
+
+        self.frame += 1
+        return self.sim.step(actions)
+
+    # Returns the start of the latest round known to begin by frame.
+    def _roundAt(self, frame):
+        return [r for r in self.rounds if r[0] <= frame][-1]
+
+    # Puts the game at frame, so that the next step plays that frame.
+    def seek(self, frame):
+        frame = max(0, min(frame, self.frames))
+        start = self._roundAt(frame)
+
+        # Playing on from here is the way to get there, unless the frame is
+        # behind or the start of a later round is closer.
+        if frame < self.frame or start[0] > self.frame:
+            keyframes = [k for k in self.keyframes if k[0] <= frame]
+
+            if start is self._roundAt(self.frame) and keyframes:
+                # Snapshots can only go back in time, so the keyframes after
+                # this one are no use anymore.
+                keyframe, self.next, snapshot = keyframes.pop()
+                self.sim.restore(snapshot)
+                self.frame = keyframe
+                self.keyframes = keyframes
+            else:
+                self._startRound(start)
+
+        while self.frame < frame:
+            self.step()
+
+    # Jumps to just after the reset that starts a round.
+    def _startRound(self, start):
+        self.frame, self.next, scores = start
+
+        self.sim.reset()
+        for (rider, score) in zip(self.sim.riders, scores):
+            rider.score = score
+
+        self.keyframes = []
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+
+######################################################################
+# Watches a recording made with a ReplayRecorder. The game is drawn
+# the same way as GameView, but the riders are the ones of the
+# ReplayPlayer and nobody controls them. Space pauses and the arrow
+# keys seek back and forward by a second.
+######################################################################
+
+from pydroid import modules
+
+from pygame.locals import *
+from GameView import GameView, GameState
+
+class ReplayView(GameView):
+    # How many ticks the arrow keys seek by.
+    SEEK = 60
+
+    def __init__(self, module, player):
+        # The player is needed to setup the players in the GameView init.
+        self.player = player
+        super(ReplayView, self).__init__(module)
+
+        self.gameState = GameState.PLAYING
+        self.paused = False
+
+    # The players are the riders of the recording. Only the keys of the
+    # first player are used, to seek.
+    def _initPlayers(self):
+        self.sim = self.player.sim
+        self.riders = self.sim.riders
+        self.controls = [GameView.CONTROLS[0]]
+
+    # Plays the next tick of the recording unless paused or at the end.
+    def update(self):
+        if self.paused or self.player.done():
+            return
+
+        ticks = self.sim.ticks
+        self.player.step()
+
+        # A new round started, so the old trails have to be erased.
+        if self.sim.ticks <= ticks:
+            self._clearTrails()
+            self.invalidate()
+
+        self._showScores()
+
+    # Puts the recording at frame. The riders can end up anywhere, so the
+    # trails are drawn again from scratch.
+    def _seek(self, frame):
+        self.player.seek(frame)
+
+        self._clearTrails()
+        self.invalidate()
+        self._showScores()
+
+    def _pause(self, e):
+        self.paused = not self.paused
+
+    def _dirKeydown(self, event, index):
+        if event.key == K_RIGHT:
+            self._seek(self.player.frame + ReplayView.SEEK)
+        elif event.key == K_LEFT:
+            self._seek(self.player.frame - ReplayView.SEEK)
+
+    def _dirKeyup(self, event, index):
+        pass
+
+class ReplayModule(modules.Module):
+    # The biggest window a recording is watched in. The camera scrolls over
+    # arenas that are bigger.
+    WINDOW = (1280, 960)
+
+    # Creates the root module for watching the recording of player, with a
+    # window the size of its arena, or of WINDOW if that is smaller.
+    def __init__(self, player):
+        size = (min(player.sim.width * GameView.DIM, ReplayModule.WINDOW[0]),
+                min(player.sim.height * GameView.DIM, ReplayModule.WINDOW[1]))
+        super(ReplayModule, self).__init__(None, (255, 255, 255), size)
+
+        self.incremental = True
+
+        self.game = ReplayView(self, player)
+        self.setView(self.game)
@@ -0,0 +1,30 @@
+#!/usr/bin/python
+
+###########################################################
+# The base of the menus shown over a game, which have the
+# scores of the players in their top corners.
+###########################################################
+
+from pydroid import modules, views
+
+class ScoreMenu(modules.Module):
+    # Create the score views in the top left and right corners, without
+    # any text until setScores is called.
+    def _initScores(self):
+        self.p1Score = views.TextDisp(self, (10, 10))
+        self.p1Score.setFont(fontsize=15)
+
+        self.p2Score = views.TextDisp(self, (self.size[0] - 150, 10))
+        self.p2Score.setFont(fontsize=15)
+
+    # Set the text for the scores in the two corners. With more
+    # than two players the left one is whoever is ahead.
+    def setScores(self, scores):
+        if len(scores) > 2:
+            leader = max(range(len(scores)), key=lambda i: scores[i])
+            self.p1Score.setText("Player %d leads: %d" %
+                                 (leader + 1, scores[leader]))
+            self.p2Score.setText("Player 1: " + str(scores[0]))
+        else:
+            self.p1Score.setText("Player 1: " + str(scores[0]))
+            self.p2Score.setText("Player 2: " + str(scores[1]))
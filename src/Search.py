@@ -0,0 +1,343 @@
+######################################################################
+# Looks a few moves ahead in a duel with an alpha-beta search, for the
+# Minimax policy. Both riders move at once in Tron, so each move of the
+# game is searched as a turn of this rider followed by a turn of the
+# other that already knows it, and crashes are only judged once both
+# have turned. That assumes the other rider always answers as well as
+# it can, which is the safe side to be wrong on.
+#
+# A position is the bitboard of free cells of a SpaceEvaluator with the
+# cell and direction of each head. Making a move clears two bits of
+# that int and taking it back is just using the old int again, so the
+# blocks of the riders are never copied. The search deepens one move
+# at a time until its time is up, and the move of the deepest search
+# that finished is taken. Positions are remembered in a transposition
+# table of bounded size, which also lets each deeper search try the
+# best move of the last one first, which is what lets alpha-beta cut
+# off most of the tree.
+######################################################################
+
+import collections
+import random
+import threading
+import time
+
+from Evaluator import SpaceEvaluator
+from Simulation import Turn
+
+# Raised inside a search once it has to stop.
+class _Timeout(Exception):
+    pass
+
+class AlphaBeta(object):
+    # The score of a position where only one rider crashed. Crashes sooner
+    # are worth a little more, so a win is taken as soon as possible and a
+    # loss put off as long as possible.
+    WIN = 1 << 20
+
+    # How many positions the transposition table keeps. Each entry is a few
+    # small ints, so this is a few megabytes.
+    MAX_ENTRIES = 1 << 15
+
+    # Whether the value of a table entry is exact or only a bound on it.
+    EXACT, LOWER, UPPER = range(3)
+
+    # Leaves only count the territory this many steps from the heads, which
+    # keeps them cheap on a big arena. Farther cells are not going to be
+    # fought over within the moves that are searched anyway.
+    HORIZON = 24
+
+    def __init__(self, width, height, maxEntries=MAX_ENTRIES):
+        self.evaluator = SpaceEvaluator(width, height)
+        self.stride = self.evaluator.stride
+        self.maxEntries = maxEntries
+
+        # The table maps the key of a position to (depth, value, flag, move),
+        # with the oldest entries first so they are the ones dropped.
+        self.table = collections.OrderedDict()
+
+        # The key of a position has a random number for every free cell xored
+        # together, so a move changes it with two xors. _hash is the part for
+        # the cells in _free, and is updated from the cells that changed.
+        rng = random.Random(0)
+        self._keys = [rng.getrandbits(64)
+                      for i in range(self.stride * height)]
+        self._free = 0
+        self._hash = 0
+
+        self._deadline = None
+        self._stopped = False
+
+        # Stats of the last search, the nodes visited and the depth reached.
+        self.nodes = 0
+        self.depth = 0
+
+    # Returns the best Turn for the rider at head facing direction against
+    # the other rider at otherHead facing otherDirection, searching at most
+    # depth moves and for at most budget seconds if given. Heads are the
+    # index of their cell in the bitboard free.
+    def search(self, free, head, direction, otherHead, otherDirection,
+               depth, budget=None):
+        self._deadline = None if budget is None else time.time() + budget
+        self._setFree(free)
+
+        self.nodes = 0
+        self.depth = 0
+
+        # Until a search finishes, the first move that doesn't crash.
+        best = Turn.NONE
+        for move in (Turn.NONE, Turn.LEFT, Turn.RIGHT):
+            if self._open(free, self._next(head, direction, move)[0]):
+                best = move
+                break
+
+        for d in range(1, depth + 1):
+            try:
+                value, move = self._max(free, self._hash, head, direction,
+                                        otherHead, otherDirection, d,
+                                        -AlphaBeta.WIN * 2,
+                                        AlphaBeta.WIN * 2, 0)
+            except _Timeout:
+                break
+
+            best = move
+            self.depth = d
+
+            # Somebody crashes whatever is done, so looking deeper won't help.
+            if abs(value) > AlphaBeta.WIN // 2:
+                break
+
+        return best
+
+    # Makes a search that is running give up as soon as it can. It returns
+    # the move of the deepest search that finished. Searches started after
+    # this give up right away too, until resume is called.
+    def stop(self):
+        self._stopped = True
+
+    def resume(self):
+        self._stopped = False
+
+    # Brings _hash up to date for the free cells, changing only the keys of
+    # cells that were taken or freed since the last search.
+    def _setFree(self, free):
+        changed = bin(self._free ^ free)[:1:-1]
+
+        i = changed.find("1")
+        while i >= 0:
+            self._hash ^= self._keys[i]
+            i = changed.find("1", i + 1)
+
+        self._free = free
+
+    # Returns (cell, direction) of a head at cell facing direction after
+    # taking move.
+    def _next(self, cell, direction, move):
+        direction = Turn.apply(direction, move)
+        return (cell + direction[1] * self.stride + direction[0], direction)
+
+    # Returns True if cell is free in free. Cells past the top or bottom of
+    # the arena have no bit set, and ones past the sides are in the blocked
+    # column.
+    def _open(self, free, cell):
+        return cell >= 0 and (free >> cell) & 1
+
+    # Searches the turn of this rider, returning (value, move).
+    def _max(self, free, key, head, direction, other, otherDirection, depth,
+             alpha, beta, ply):
+        self.nodes += 1
+        if self._stopped or (self._deadline is not None and
+                             time.time() > self._deadline):
+            raise _Timeout()
+
+        if depth == 0:
+            return (self._evaluate(free, head, other), None)
+
+        position = (key, head, direction, other, otherDirection)
+        entry = self.table.get(position)
+
+        first = Turn.NONE
+        if entry is not None:
+            entryDepth, value, flag, move = entry
+            value = self._fromTable(value, ply)
+            if entryDepth >= depth:
+                if flag == AlphaBeta.EXACT or \
+                   (flag == AlphaBeta.LOWER and value >= beta) or \
+                   (flag == AlphaBeta.UPPER and value <= alpha):
+                    return (value, move)
+
+            first = move
+
+        start = alpha
+        best, bestMove = None, first
+        for move in (first,) + tuple(m for m in (Turn.NONE, Turn.LEFT,
+                                                 Turn.RIGHT) if m != first):
+            cell, moved = self._next(head, direction, move)
+            value = self._min(free, key, cell, moved, other, otherDirection,
+                              depth, alpha, beta, ply)
+
+            if best is None or value > best:
+                best, bestMove = value, move
+
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break
+
+        if best <= start:
+            flag = AlphaBeta.UPPER
+        elif best >= beta:
+            flag = AlphaBeta.LOWER
+        else:
+            flag = AlphaBeta.EXACT
+
+        self.table[position] = (depth, self._toTable(best, ply), flag,
+                                bestMove)
+        if len(self.table) > self.maxEntries:
+            self.table.popitem(last=False)
+
+        return (best, bestMove)
+
+    # Searches the turn of the other rider once this one has moved to cell,
+    # then judges the crashes. Returns the value for this rider.
+    def _min(self, free, key, cell, direction, other, otherDirection, depth,
+             alpha, beta, ply):
+        crashed = not self._open(free, cell)
+
+        best = None
+        for move in (Turn.NONE, Turn.LEFT, Turn.RIGHT):
+            otherCell, moved = self._next(other, otherDirection, move)
+            otherCrashed = not self._open(free, otherCell)
+
+            if cell == otherCell or (crashed and otherCrashed):
+                value = 0
+            elif crashed:
+                value = -AlphaBeta.WIN + ply
+            elif otherCrashed:
+                value = AlphaBeta.WIN - ply
+            else:
+                taken = (1 << cell) | (1 << otherCell)
+                value = self._max(free & ~taken,
+                                  key ^ self._keys[cell] ^
+                                  self._keys[otherCell],
+                                  cell, direction, otherCell, moved,
+                                  depth - 1, alpha, beta, ply + 1)[0]
+
+            if best is None or value < best:
+                best = value
+
+            beta = min(beta, best)
+            if alpha >= beta:
+                break
+
+        return best
+
+    # A crash is scored by the ply it happens at from the root, but the same
+    # position can be reached at another ply. The table keeps crash scores
+    # counted from the position instead, and they are turned back into
+    # scores from the root when they are read.
+    def _toTable(self, value, ply):
+        if value > AlphaBeta.WIN // 2:
+            return value + ply
+        elif value < -AlphaBeta.WIN // 2:
+            return value - ply
+
+        return value
+
+    def _fromTable(self, value, ply):
+        if value > AlphaBeta.WIN // 2:
+            return value - ply
+        elif value < -AlphaBeta.WIN // 2:
+            return value + ply
+
+        return value
+
+    # Returns how much more territory this rider has than the other one.
+    def _evaluate(self, free, head, other):
+        self.evaluator.free = free
+
+        heads = [(cell % self.stride, cell // self.stride)
+                 for cell in (head, other)]
+        territory = self.evaluator.voronoi(heads, limit=AlphaBeta.HORIZON)
+
+        return territory[0] - territory[1]
+
+# Runs the searches of an AlphaBeta on a worker thread, so that a bot
+# can think about its next move while the game is being drawn instead
+# of stalling the frame it is asked in. A search is started for the
+# position the rider will be in, and its move is picked up once the
+# game gets there. Only the newest position is searched; asking for
+# another one stops the search that is running.
+class SearchThread(object):
+    def __init__(self, search):
+        self.search = search
+
+        self._condition = threading.Condition()
+        self._request = None
+
+        # The position the move was last asked for, and (position, move) for
+        # the last search that finished.
+        self._wanted = None
+        self._done = None
+
+        # Set once the thread is to exit.
+        self._closed = threading.Event()
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    # Starts searching position, a tuple of the arguments of
+    # AlphaBeta.search before depth, unless it already is.
+    def start(self, position, depth, budget=None):
+        with self._condition:
+            if position == self._wanted:
+                return
+
+            self._wanted = position
+            self._request = (position, depth, budget)
+
+            self.search.stop()
+            self._condition.notify_all()
+
+    # Returns the move for position, waiting for its search to finish and
+    # starting it first if it wasn't already.
+    def result(self, position, depth, budget=None):
+        self.start(position, depth, budget)
+
+        with self._condition:
+            while self._done is None or self._done[0] != position:
+                self._condition.wait()
+
+            return self._done[1]
+
+    # Stops the search that is running and waits for the thread to exit.
+    def close(self):
+        with self._condition:
+            self._closed.set()
+            self.search.stop()
+            self._condition.notify_all()
+
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed.is_set():
+                    self._condition.wait()
+
+                if self._closed.is_set():
+                    return
+
+                # The stop of a newer request can come before this search
+                # has started, so the flag is cleared here under the lock
+                # rather than by the search itself.
+                position, depth, budget = self._request
+                self._request = None
+                self.search.resume()
+
+            move = self.search.search(*position, depth=depth, budget=budget)
+
+            with self._condition:
+                if position == self._wanted:
+                    self._done = (position, move)
+                    self._condition.notify_all()
@@ -12,13 +12,25 @@ from pydroid import modules, settings, views
 class SettingsMenu(modules.Module):
     COLOR_REGEX = "\\(\\d{1,3}\\s*,\\s*\\d{1,3}\\s*,\\s*\\d{1,3}\\)"
 
+    # A side of the board, from 1 to 4096 cells. The longest numbers come
+    # first, since the whole input has to be what matches.
+    CELLS_REGEX = "(409[0-6]|40[0-8]\\d|[1-3]\\d{3}|[1-9]\\d{0,2})"
+    BOARD_REGEX = "%sx%s" % (CELLS_REGEX, CELLS_REGEX)
+
+    # From 2 to 255 riders.
+    RIDERS_REGEX = "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]\\d|[2-9])"
+
     def __init__(self, parent):
         super(SettingsMenu, self).__init__(parent, (255, 255, 255), parent.size)
 
+        self._initMenu()
+        self.setView(self.menu)
+
     def _initMenu(self):
         self.menu = views.Menu(self, (0, 0), self.size)
         self.menu.setOptions(["Player 1 Color", "Player 2 Color", "Text Color",
-                              "Background Color", "Back"])
+                              "Background Color", "Board Size", "Riders",
+                              "Back"])
 
         self.menu.addOptionCallback("Player 1 Color", self._inputColor, "p1",
                                     "Enter color of Player 1 as (r, g, b)")
@@ -28,10 +40,12 @@ class SettingsMenu(modules.Module):
                                     "Enter color of text as (r, g, b)")
         self.menu.addOptionCallback("Background Color", self._inputColor, "bg",
                                     "Enter color of game screen as (r, g, b)")
+        self.menu.addOptionCallback("Board Size", self._inputBoard)
+        self.menu.addOptionCallback("Riders", self._inputRiders)
         self.menu.addOptionCallback("Back", self.back)
 
     # Input the color for the described setting key
-    def _inputColor(self, key, desc):
+    def _inputColor(self, e, key, desc):
         # Setup the text input for the color with the setting key for the file
         # the regex for checking the input as a triplet, and the desc of the
         # input.
@@ -40,4 +54,29 @@ class SettingsMenu(modules.Module):
         colorInput.setup(desc)
         colorInput.setQuery("Color: ")
 
-        colorInput.execute(self.fps)
+        colorInput.execute()
+        colorInput.destroy()
+
+    # Input the size of the arena in cells, or nothing to fit the window.
+    def _inputBoard(self, e=None):
+        boardInput = settings.SettingInput(parent=self)
+        boardInput.setting("board", "(%s)?" % SettingsMenu.BOARD_REGEX)
+        boardInput.setup("Enter the board size in cells as WIDTHxHEIGHT, "
+                         "up to 4096x4096",
+                         "Enter a size from 1x1 to 4096x4096")
+        boardInput.setQuery("Board: ")
+
+        boardInput.execute()
+        boardInput.destroy()
+
+    # Input how many riders play in a local game. No more than fit on the
+    # board are played.
+    def _inputRiders(self, e=None):
+        ridersInput = settings.SettingInput(parent=self)
+        ridersInput.setting("riders", SettingsMenu.RIDERS_REGEX, "2")
+        ridersInput.setup("Enter how many riders play, from 2 to 255",
+                          "Enter a number from 2 to 255")
+        ridersInput.setQuery("Riders: ")
+
+        ridersInput.execute()
+        ridersInput.destroy()
@@ -0,0 +1,208 @@
+######################################################################
+# The rules of a game of Tron with nothing to do with the screen. A
+# TronSimulation holds the arena and the riders on it, and is moved
+# forward one tick at a time with the turns each rider makes. Nothing
+# here imports pygame, so games can be run as fast as the rules allow,
+# without a window or a clock. GameView is only a way to play and see
+# one of these.
+#
+# Any number of riders can share an arena, up to MAX_RIDERS since a
+# cell holds the id of a rider in a byte. The cost of a tick grows
+# with the number of riders and never with the length of the trails.
+######################################################################
+
+import math
+
+from Arena import Arena
+from LineRider import Direction, LineRider
+
+# The actions a rider can take each tick.
+class Turn(object):
+    NONE, LEFT, RIGHT = range(3)
+
+    # Returns the direction a rider facing direction ends up facing after
+    # taking the action.
+    @staticmethod
+    def apply(direction, action):
+        if action == Turn.LEFT:
+            return Direction.left(direction)
+        elif action == Turn.RIGHT:
+            return Direction.right(direction)
+
+        return direction
+
+class TronSimulation(object):
+    MAX_RIDERS = 255
+
+    # The fewest cells between riders that start next to each other on the
+    # ring of a free for all.
+    SPACING = 3
+
+    # Creates a simulation with an empty arena that is width cells wide
+    # and height cells tall. Riders have to be added before stepping.
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.arena = Arena(width, height)
+        self.riders = []
+
+        self.ticks = 0
+        self.over = False
+
+    # Creates the usual two player game, where the riders start on the
+    # middle row at opposite sides facing each other. dim is the size in
+    # pixels of one cell, which only matters for drawing the riders.
+    @staticmethod
+    def duel(width, height, dim=1, colors=((100, 100, 100), (0, 0, 0))):
+        sim = TronSimulation(width, height)
+
+        y = (height // 2) * dim
+        sim.addRider(LineRider(0, y, Direction.RIGHT, dim, colors[0]))
+        sim.addRider(LineRider((width - 1) * dim, y, Direction.LEFT, dim,
+                               colors[1]))
+
+        return sim
+
+    # Returns the most riders a free for all on a width by height arena can
+    # start with, which is as many as fit around its ring SPACING cells
+    # apart. Two always fit, since they start like a duel.
+    @staticmethod
+    def maxRiders(width, height):
+        radius = min(width, height) * 3 / 8.0
+        riders = int(2 * math.pi * radius / TronSimulation.SPACING)
+
+        return max(2, min(riders, TronSimulation.MAX_RIDERS))
+
+    # Creates a game of count riders, each against all the others. Two
+    # riders start like a duel. More start spread around a ring in the
+    # middle of the arena, each heading along it the same way round, so
+    # none of them starts out facing another or in the way of another.
+    # colors are used in turn. Raises ValueError if count is more than
+    # maxRiders for the arena.
+    @staticmethod
+    def freeForAll(width, height, count, dim=1,
+                   colors=((100, 100, 100), (0, 0, 0))):
+        if count > TronSimulation.maxRiders(width, height):
+            raise ValueError("%d riders don't fit on a %dx%d arena" %
+                             (count, width, height))
+
+        if count == 2:
+            return TronSimulation.duel(width, height, dim, colors)
+
+        sim = TronSimulation(width, height)
+        for i in range(count):
+            angle = 2 * math.pi * i / count
+            dx, dy = math.cos(angle), math.sin(angle)
+            x = int(round((width - 1) / 2.0 + dx * width * 3 / 8.0))
+            y = int(round((height - 1) / 2.0 + dy * height * 3 / 8.0))
+
+            # Along the ring, which is (-dy, dx), to the nearest direction.
+            if abs(dy) >= abs(dx):
+                direction = Direction.LEFT if dy > 0 else Direction.RIGHT
+            else:
+                direction = Direction.BOTTOM if dx > 0 else Direction.TOP
+
+            sim.addRider(LineRider(x * dim, y * dim, direction, dim,
+                                   colors[i % len(colors)]))
+
+        return sim
+
+    # Adds the rider to the game and writes its starting block in the
+    # arena. Returns the index of the rider, which is also the order its
+    # actions are expected in step. Raises ValueError if the game already
+    # has MAX_RIDERS riders.
+    def addRider(self, rider):
+        if len(self.riders) >= TronSimulation.MAX_RIDERS:
+            raise ValueError("a game can have at most %d riders" %
+                             TronSimulation.MAX_RIDERS)
+
+        self.riders.append(rider)
+
+        x, y = rider.head()
+        self.arena.occupy(x, y, len(self.riders))
+
+        return len(self.riders) - 1
+
+    # Puts every rider back at its start and clears the arena. Scores are
+    # kept, since they are counted across rounds.
+    def reset(self):
+        self.arena.clear()
+
+        for (i, rider) in enumerate(self.riders):
+            rider.reset()
+
+            x, y = rider.head()
+            self.arena.occupy(x, y, i + 1)
+
+        self.ticks = 0
+        self.over = False
+
+    # Returns the state of the game so that it can be put back with restore.
+    # This is cheap since the trails themselves are not copied.
+    def snapshot(self):
+        return (self.ticks, self.over,
+                [rider.snapshot() for rider in self.riders])
+
+    # Puts the game back in the state of a snapshot taken earlier in the same
+    # round, which must be after the last reset. The cells of the blocks
+    # added since then are cleared from the arena. A rider that is dead did
+    # not write the block it crashed on, so that one is left alone.
+    def restore(self, snapshot):
+        self.ticks, self.over, riders = snapshot
+
+        for (rider, state) in zip(self.riders, riders):
+            end = len(rider.blocks) if rider.alive else len(rider.blocks) - 1
+            for i in range(state[0], end):
+                x, y = rider.cell(i)
+                self.arena.occupy(x, y, Arena.EMPTY)
+
+            rider.restore(state)
+
+    # Returns the cell the rider would move into next tick if it took the
+    # action.
+    def nextCell(self, rider, action=Turn.NONE):
+        direction = Turn.apply(rider.direction, action)
+        x, y = rider.head()
+
+        return (x + direction[0], y + direction[1])
+
+    # Returns True if the cell (x, y) is in the arena and no trail covers it.
+    def free(self, x, y):
+        return self.arena.inbounds(x, y) and not self.arena.occupied(x, y)
+
+    # Returns the riders that are still alive.
+    def living(self):
+        return [rider for rider in self.riders if rider.alive]
+
+    # Moves the game forward a tick. actions is a list with a Turn for
+    # each rider in the order they were added, or None if no rider turns.
+    # The turns are always taken, since turnable only guards against a
+    # held down key, which is up to whatever reads the keyboard.
+    # Every living rider then moves a block and crashes are checked. Each
+    # rider that crashes gives a point to every other rider that was still
+    # riding this tick, so two riders crashing head on both score. The
+    # round is over once at most one rider is left, or none if the game
+    # was for one rider. Returns the riders that died in this tick.
+    def step(self, actions=None):
+        if actions is not None:
+            for (rider, action) in zip(self.riders, actions):
+                rider.direction = Turn.apply(rider.direction, action)
+
+        for rider in self.riders:
+            if rider.alive:
+                rider.update()
+
+        dead = self.arena.resolve(self.riders)
+        self.ticks += 1
+
+        if dead:
+            living = self.living()
+            for rider in living:
+                rider.score += len(dead)
+
+            for rider in dead:
+                rider.score += len(dead) - 1
+
+            if len(living) <= min(1, len(self.riders) - 1):
+                self.over = True
+
+        return dead
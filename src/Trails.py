@@ -0,0 +1,113 @@
+######################################################################
+# The trails of a game drawn onto surfaces of CHUNK by CHUNK cells, so
+# that only the part of the arena a Camera can see is ever drawn. A
+# chunk is made the first time it is seen, straight from the bytes of
+# the arena, which are already the index of the rider covering each
+# cell. They are turned into a surface with the colors of the riders
+# as its palette and then scaled to the zoom, so no cell is drawn one
+# at a time. After that new blocks are stamped onto the chunks that
+# are kept.
+#
+# Only the chunks seen most recently are kept, a few screens worth, so
+# the memory and the drawing scale with the view rather than the
+# arena. A 4096 by 4096 arena would be 400 megabytes as one surface
+# at a zoom of 5.
+######################################################################
+
+import collections
+
+import pygame
+
+class TrailChunks(object):
+    # The width and height of a chunk in cells.
+    CHUNK = 64
+
+    # How many screens of chunks are kept.
+    SCREENS = 3
+
+    # Creates the chunks for the trails of the riders on arena, drawn at
+    # zoom pixels a cell over background.
+    def __init__(self, arena, riders, background, zoom=1):
+        self.arena = arena
+        self.riders = riders
+        self.background = background
+        self.zoom = zoom
+
+        self.chunks = collections.OrderedDict()
+
+    # Forgets every chunk, for when the trails are erased or moved.
+    def clear(self):
+        self.chunks.clear()
+
+    # Changes the zoom the chunks are drawn at, which makes them all again.
+    def setZoom(self, zoom):
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.clear()
+
+    # Draws the cell (x, y) in color onto its chunk, if that chunk is kept.
+    # A chunk that is not is made from the arena when it is next seen.
+    def stamp(self, x, y, color):
+        j, cy = divmod(y, TrailChunks.CHUNK)
+        i, cx = divmod(x, TrailChunks.CHUNK)
+        chunk = self.chunks.get((i, j))
+        if chunk is None:
+            return
+
+        dim = max(1, int(self.zoom))
+        chunk.fill(color, (int(cx * self.zoom), int(cy * self.zoom), dim, dim))
+
+    # Draws the chunks that camera can see onto screen, with the view of the
+    # camera at pos on it.
+    def draw(self, screen, camera, pos=(0, 0)):
+        x0, y0, x1, y1 = camera.visible()
+        size = TrailChunks.CHUNK
+        span = int(size * self.zoom)
+
+        seen = 0
+        for j in range(y0 // size, (y1 - 1) // size + 1):
+            for i in range(x0 // size, (x1 - 1) // size + 1):
+                dest = (pos[0] + i * span - camera.x,
+                        pos[1] + j * span - camera.y)
+                screen.blit(self._chunk(i, j), dest)
+                seen += 1
+
+        # What was seen just now was used last, so it is never what goes.
+        while len(self.chunks) > max(1, seen) * TrailChunks.SCREENS:
+            self.chunks.popitem(last=False)
+
+    # Returns the chunk (i, j), making it if it isn't kept, and marks it as
+    # the one used last.
+    def _chunk(self, i, j):
+        chunk = self.chunks.pop((i, j), None)
+        if chunk is None:
+            chunk = self._make(i, j)
+
+        self.chunks[(i, j)] = chunk
+        return chunk
+
+    # Makes the chunk (i, j) from the cells of the arena.
+    def _make(self, i, j):
+        arena = self.arena
+        x0, y0 = i * TrailChunks.CHUNK, j * TrailChunks.CHUNK
+        x1 = min(arena.width, x0 + TrailChunks.CHUNK)
+        y1 = min(arena.height, y0 + TrailChunks.CHUNK)
+        width, height = x1 - x0, y1 - y0
+
+        rows = bytearray().join(
+            arena.cells[y * arena.width + x0:y * arena.width + x1]
+            for y in range(y0, y1))
+        cells = pygame.image.frombuffer(bytes(rows), (width, height), "P")
+        cells.set_palette([self.background] +
+                          [rider.color for rider in self.riders])
+
+        size = (int(width * self.zoom), int(height * self.zoom))
+        if self.zoom < 1:
+            # Averaging the cells keeps thin trails from dropping out.
+            full = pygame.Surface((width, height))
+            full.blit(cells, (0, 0))
+            return pygame.transform.smoothscale(full, size)
+
+        chunk = pygame.Surface(size)
+        chunk.blit(pygame.transform.scale(cells, size), (0, 0))
+        return chunk
@@ -0,0 +1,149 @@
+######################################################################
+# The connection of a player to a TronServer. The client keeps its own
+# TronSimulation as a mirror of the one on the server, but never steps
+# it. Instead the heads and deaths that arrive each tick are written
+# straight into the riders, so they can be drawn like in a local game.
+#
+# The socket is non-blocking once connected, so poll can be called
+# every frame without stalling the game loop. Turns that the socket
+# can't take yet are kept and sent on the next poll. Nothing here
+# imports pygame, so clients can also run headless.
+######################################################################
+
+import errno
+import socket
+
+import Protocol
+from Protocol import Message
+from LineRider import LineRider
+from Simulation import TronSimulation
+
+class TronClient(object):
+    # The errors of a non-blocking socket that only mean it has to be tried
+    # again later.
+    WOULDBLOCK = (errno.EWOULDBLOCK, errno.EAGAIN)
+
+    # Creates a client for the server at host and port. dim and colors
+    # are the size in pixels of a cell and the colors of the riders, which
+    # only matter for drawing them.
+    def __init__(self, host="localhost", port=Protocol.DEFAULT_PORT, dim=1,
+                 colors=((100, 100, 100), (0, 0, 0))):
+        self.host, self.port = host, port
+        self.dim = dim
+        self.colors = colors
+
+        self.sock = None
+        self.buffer = Protocol.MessageBuffer()
+        self.outgoing = b""
+        self.connected = False
+
+        self.index = None
+        self.rate = None
+        self.sim = None
+
+    # Connects to the server and waits for the welcome, which is needed to
+    # build the mirror of the game. Raises socket.error if the server can
+    # not be reached within timeout seconds.
+    def connect(self, timeout=5):
+        self.sock = socket.create_connection((self.host, self.port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connected = True
+
+        while self.sim is None:
+            data = self.sock.recv(4096)
+            if not data:
+                raise socket.error("server closed the connection")
+
+            self.buffer.feed(data)
+            for (type, fields) in self.buffer.messages():
+                self._apply(type, fields)
+
+        self.sock.setblocking(False)
+
+    # Sends the turn of this client's rider to the server.
+    def sendTurn(self, action):
+        if self.connected:
+            self.outgoing += Protocol.encodeTurn(action)
+            self._flush()
+
+    # Reads everything the server has sent so far and applies it to the
+    # mirror of the game. Returns the list of (type, fields) messages that
+    # were read. If the server goes away, connected becomes False.
+    def poll(self):
+        self._flush()
+
+        while self.connected:
+            try:
+                data = self.sock.recv(4096)
+            except socket.error as e:
+                if e.errno not in TronClient.WOULDBLOCK:
+                    self.close()
+
+                # Nothing more to read for now.
+                break
+
+            if not data:
+                self.close()
+            else:
+                self.buffer.feed(data)
+
+        messages = self.buffer.messages()
+        for (type, fields) in messages:
+            self._apply(type, fields)
+
+        return messages
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+
+        self.outgoing = b""
+        self.connected = False
+
+    # Returns the rider this client controls.
+    def rider(self):
+        return self.sim.riders[self.index]
+
+    # Sends as much of what is waiting to be sent as the socket takes.
+    def _flush(self):
+        while self.connected and self.outgoing:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except socket.error as e:
+                if e.errno not in TronClient.WOULDBLOCK:
+                    self.close()
+
+                return
+
+            self.outgoing = self.outgoing[sent:]
+
+    # Applies a message from the server to the mirror of the game.
+    def _apply(self, type, fields):
+        if type == Message.WELCOME:
+            self.index, width, height, self.rate, starts = fields
+
+            self.sim = TronSimulation(width, height)
+            for (i, (x, y, direction)) in enumerate(starts):
+                color = self.colors[i % len(self.colors)]
+                self.sim.addRider(LineRider(x * self.dim, y * self.dim,
+                                            direction, self.dim, color))
+        elif type == Message.TICK:
+            tick, heads, deaths = fields
+            for (i, x, y) in heads:
+                self.sim.riders[i].place(x, y)
+
+                # The arena is kept too, so the trails can be drawn from it.
+                if i not in deaths and self.sim.arena.inbounds(x, y):
+                    self.sim.arena.occupy(x, y, i + 1)
+
+            for i in deaths:
+                self.sim.riders[i].alive = False
+
+            self.sim.ticks = tick
+        elif type == Message.OVER:
+            for (rider, score) in zip(self.sim.riders, fields[0]):
+                rider.score = score
+
+            self.sim.over = True
+        elif type == Message.RESET:
+            self.sim.reset()
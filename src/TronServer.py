@@ -0,0 +1,316 @@
+#!/usr/bin/python
+
+######################################################################
+# The authoritative server for network games. The server hosts any
+# number of rooms, each with its own TronSimulation, on one asyncio
+# event loop. Players are put in the first room that is waiting for
+# players, and a new room is opened once it fills up.
+#
+# Clients connect over TCP and only send the turns of their rider. The
+# server has one fixed rate tick loop, and every room that is playing
+# is stepped on each tick, one after the other, rather than each room
+# scheduling its own ticks. On a tick a room applies at most one
+# pending turn per rider, steps its simulation and sends its players
+# the new heads and deaths. Between rounds a room waits a few seconds,
+# like the countdown of a local game, and then starts the next round.
+#
+# Messages are written without waiting for them to be sent, since a
+# tick can't wait on any one player. A player whose messages pile up
+# past MAX_BUFFER bytes is too slow to keep up and is dropped, which
+# closes the room like leaving does.
+#
+# Run this file to host games, and choose "Network" in the main menu
+# of each player to join one. Requires python 3.
+######################################################################
+
+import argparse
+import asyncio
+import collections
+import socket
+import time
+
+import Protocol
+from Protocol import Message
+from Simulation import TronSimulation, Turn
+
+# One game on the server and the players in it. A room is ticked by
+# the server, and closes for good once one of its players leaves.
+class Room(object):
+    # The most bytes a player can have waiting to be sent.
+    MAX_BUFFER = 64 * 1024
+
+    def __init__(self, width, height, rate, pause, riders=2):
+        self.sim = TronSimulation.freeForAll(width, height, riders)
+        self.rate = rate
+        self.pause = pause
+
+        self.players = len(self.sim.riders)
+        self.writers = []
+        self.pending = [collections.deque() for i in range(self.players)]
+
+        self.playing = False
+        self.closed = False
+
+        # The loop time at which the next round starts, or None if a round
+        # is being played.
+        self.resumeAt = None
+
+    def full(self):
+        return len(self.writers) == self.players
+
+    # Sends the message to every player in the room.
+    def broadcast(self, message):
+        for writer in self.writers:
+            self._send(writer, message)
+
+    # Adds the player to the room and welcomes it. The game starts once the
+    # room is full. Returns the index of the player's rider.
+    def join(self, writer):
+        index = len(self.writers)
+        self.writers.append(writer)
+
+        starts = [(rider.head()[0], rider.head()[1], rider.fDirection)
+                  for rider in self.sim.riders]
+        self._send(writer, Protocol.encodeWelcome(index, self.sim.width,
+                                                  self.sim.height, self.rate,
+                                                  starts))
+
+        if self.full():
+            self.playing = True
+            self.broadcast(Protocol.encodeStart())
+
+        return index
+
+    # Queues a turn of the player at index for the next tick.
+    def turn(self, index, action):
+        self.pending[index].append(action)
+
+    # Ends the game and disconnects every player.
+    def close(self):
+        self.playing = False
+        self.closed = True
+
+        for writer in self.writers:
+            writer.close()
+
+    # Steps the simulation with the next pending turn of each player and
+    # sends the changes to every player. now is the time of the server's
+    # loop, used to wait between rounds.
+    def tick(self, now):
+        if self.resumeAt is not None:
+            if now < self.resumeAt:
+                return
+
+            self.sim.reset()
+            for pending in self.pending:
+                pending.clear()
+
+            self.resumeAt = None
+            self.broadcast(Protocol.encodeReset())
+
+        actions = [pending.popleft() if pending else Turn.NONE
+                   for pending in self.pending]
+        dead = self.sim.step(actions)
+
+        heads = []
+        for (i, rider) in enumerate(self.sim.riders):
+            if rider.alive:
+                x, y = rider.head()
+                heads.append((i, x, y))
+
+        dead = set(dead)
+        deaths = [i for (i, rider) in enumerate(self.sim.riders)
+                  if rider in dead]
+        self.broadcast(Protocol.encodeTick(self.sim.ticks, heads, deaths))
+
+        if self.sim.over:
+            scores = [rider.score for rider in self.sim.riders]
+            self.broadcast(Protocol.encodeOver(scores))
+            self.resumeAt = now + self.pause
+
+    # Writes the message to the player, dropping the player if too much is
+    # waiting to be sent to it. Its connection is aborted rather than closed,
+    # since closing would wait for all of that to be sent first.
+    def _send(self, writer, message):
+        transport = writer.transport
+        if transport.is_closing():
+            return
+
+        writer.write(message)
+        if transport.get_write_buffer_size() > Room.MAX_BUFFER:
+            transport.abort()
+
+class TronServer(object):
+    # Creates a server for games of riders players on width by height
+    # arenas, stepped rate times a second. pause is the seconds to wait
+    # between rounds. No more than maxRooms rooms are hosted at once, if
+    # given. Raises ValueError if the riders don't fit on the arena or the
+    # rate can't be sent to clients.
+    def __init__(self, width=128, height=96, rate=60, pause=3, maxRooms=None,
+                 riders=2):
+        if not 2 <= riders <= TronSimulation.maxRiders(width, height):
+            raise ValueError("%d riders don't fit on a %dx%d arena" %
+                             (riders, width, height))
+
+        if not 0 < rate <= 0xffff:
+            raise ValueError("a rate of %d ticks a second can't be sent" %
+                             rate)
+
+        self.width, self.height = width, height
+        self.riders = riders
+        self.rate = rate
+        self.pause = pause
+        self.maxRooms = maxRooms
+
+        self.rooms = []
+
+        # The room new players are put in, until it is full.
+        self.waiting = None
+
+        # How long each of the last few seconds of ticks took, and how many
+        # ticks started more than a period late and were dropped.
+        self.tickTimes = collections.deque(maxlen=rate * 5)
+        self.droppedTicks = 0
+
+    # Accepts players on host and port and runs the tick loop forever. If
+    # stats is given, a line of stats is printed every stats seconds.
+    async def serve(self, host="localhost", port=Protocol.DEFAULT_PORT,
+                    stats=None):
+        server = await asyncio.start_server(self._accept, host, port)
+
+        try:
+            await self.run(stats)
+        finally:
+            server.close()
+            for room in self.rooms:
+                room.close()
+
+    # Ticks every room that is playing rate times a second. Ticks are
+    # scheduled from the time the loop started rather than the end of the
+    # last tick, so a slow tick does not slow the games down. If the loop
+    # falls more than a tick behind, the missed ticks are dropped rather
+    # than run back to back.
+    async def run(self, stats=None):
+        loop = asyncio.get_event_loop()
+
+        period = 1.0 / self.rate
+        nextTick = loop.time()
+        nextStats = nextTick + stats if stats else None
+
+        while True:
+            now = loop.time()
+            start = time.time()
+
+            for room in self.rooms:
+                if room.playing:
+                    room.tick(now)
+
+            self.tickTimes.append(time.time() - start)
+
+            if nextStats is not None and now >= nextStats:
+                print(self.stats())
+                nextStats += stats
+
+            nextTick += period
+            if nextTick < loop.time() - period:
+                self.droppedTicks += 1
+                nextTick = loop.time()
+
+            await asyncio.sleep(max(0, nextTick - loop.time()))
+
+    # Returns a line with the number of rooms and players, the average and
+    # worst tick time and how much of the tick period the ticks used.
+    def stats(self):
+        players = sum(len(room.writers) for room in self.rooms)
+        times = list(self.tickTimes) or [0]
+        average = sum(times) / len(times)
+
+        return ("rooms %d players %d tick avg %.2fms max %.2fms load %.0f%% "
+                "dropped %d" % (len(self.rooms), players, average * 1000,
+                                max(times) * 1000, average * self.rate * 100,
+                                self.droppedTicks))
+
+    # Returns the room the next player should join, opening a new one if
+    # none is waiting for players. Returns None if the server is full.
+    def _roomForPlayer(self):
+        if self.waiting is None or self.waiting.full():
+            if self.maxRooms is not None and len(self.rooms) >= self.maxRooms:
+                return None
+
+            self.waiting = Room(self.width, self.height, self.rate,
+                                self.pause, self.riders)
+            self.rooms.append(self.waiting)
+
+        return self.waiting
+
+    # Handles a new connection. The player is put in a room and then its
+    # turns are queued until it leaves, which closes the room.
+    async def _accept(self, reader, writer):
+        try:
+            room = self._roomForPlayer()
+        except ValueError:
+            # The room couldn't be built, so there is nothing to join.
+            room = None
+
+        if room is None:
+            writer.close()
+            return
+
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        index = room.join(writer)
+
+        try:
+            while True:
+                length, type = Protocol.HEADER.unpack(
+                    await reader.readexactly(Protocol.HEADER.size))
+                body = await reader.readexactly(length - 1)
+
+                if type == Message.TURN:
+                    room.turn(index, Protocol.decode(type, body)[0])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # The server is shutting down.
+            return
+
+        if not room.closed:
+            room.close()
+            self.rooms.remove(room)
+
+            if room is self.waiting:
+                self.waiting = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Hosts network games of "
+                                     "Tron.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=Protocol.DEFAULT_PORT)
+    parser.add_argument("--size", type=int, nargs=2, default=(128, 96),
+                        metavar=("WIDTH", "HEIGHT"),
+                        help="size of the arena in cells")
+    parser.add_argument("--rate", type=int, default=60,
+                        help="ticks per second")
+    parser.add_argument("--rooms", type=int, default=None,
+                        help="most rooms to host at once")
+    parser.add_argument("--riders", type=int, default=2,
+                        help="players in each room")
+    parser.add_argument("--stats", type=float, default=None,
+                        metavar="SECONDS", help="print stats this often")
+    args = parser.parse_args()
+
+    try:
+        server = TronServer(args.size[0], args.size[1], args.rate,
+                            maxRooms=args.rooms, riders=args.riders)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
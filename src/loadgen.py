@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+###########################################################
+# Fills a TronServer with headless players to see how many
+# rooms it can keep up with. Every player is a connection
+# on one asyncio event loop that reads what the server
+# sends and turns at random now and then. At the end the
+# rate of ticks the players actually got is compared with
+# the rate the server is meant to tick at. Requires
+# python 3.
+###########################################################
+
+import argparse
+import asyncio
+import random
+
+import Protocol
+from Protocol import Message
+from Simulation import Turn
+
+# Plays as one player until stop is set. Counts the ticks and bytes
+# received in counts.
+async def play(host, port, rng, turnChance, counts, stop):
+    reader, writer = await asyncio.open_connection(host, port)
+    buffer = Protocol.MessageBuffer()
+
+    try:
+        while not stop.is_set():
+            data = await reader.read(4096)
+            if not data:
+                break
+
+            counts["bytes"] += len(data)
+            buffer.feed(data)
+
+            for (type, fields) in buffer.messages():
+                if type == Message.TICK:
+                    counts["ticks"] += 1
+
+                    if rng.random() < turnChance:
+                        action = rng.choice((Turn.LEFT, Turn.RIGHT))
+                        writer.write(Protocol.encodeTurn(action))
+    finally:
+        writer.close()
+
+async def run(args):
+    counts = {"ticks": 0, "bytes": 0}
+    stop = asyncio.Event()
+    rng = random.Random(args.seed)
+
+    players = [asyncio.ensure_future(play(args.host, args.port,
+                                          random.Random(rng.random()),
+                                          args.turns, counts, stop))
+               for i in range(args.rooms * args.riders)]
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    for player in players:
+        player.cancel()
+
+    await asyncio.gather(*players, return_exceptions=True)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Fills a TronServer with "
+                                     "headless players.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=Protocol.DEFAULT_PORT)
+    parser.add_argument("--rooms", type=int, default=100,
+                        help="rooms to fill")
+    parser.add_argument("--riders", type=int, default=2,
+                        help="players in each room, as the server was "
+                        "started with")
+    parser.add_argument("--duration", type=float, default=10,
+                        help="seconds to play for")
+    parser.add_argument("--rate", type=int, default=60,
+                        help="ticks per second the server runs at")
+    parser.add_argument("--turns", type=float, default=0.05,
+                        help="chance of turning on each tick")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = asyncio.run(run(args))
+
+    # Rounds pause between games, so players won't see every tick even
+    # on a server that keeps up.
+    players = args.rooms * args.riders
+    rate = counts["ticks"] / float(players * args.duration)
+    print("players %d ticks/s per player %.1f of %d, %.1f KB/s in total" %
+          (players, rate, args.rate,
+           counts["bytes"] / 1024.0 / args.duration))
+
+if __name__ == "__main__":
+    main()
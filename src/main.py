@@ -9,10 +9,14 @@
 # option selections.
 ###########################################################
 
+import socket
+
 from pydroid import modules, settings, views
 
+import Protocol
 from SettingsMenu import SettingsMenu
 from GameModule import GameModule
+from NetworkModule import NetworkModule
 
 class MainMenu(modules.Module):
     def __init__(self, fill=(255, 255, 255), size=(640, 480)):
@@ -29,28 +33,40 @@ class MainMenu(modules.Module):
         self.menu.setOptions(["Local", "Network", "Settings", "Quit"])
 
         self.menu.addOptionCallback("Local", self._startGame)
+        self.menu.addOptionCallback("Network", self._startNetworkGame)
+        self.menu.addOptionCallback("Settings", self._settingsMenu)
         self.menu.addOptionCallback("Quit", self.quit)
 
         self.setView(self.menu)
 
     # Run this to set the background and text colors for this module
     def _initColors(self):
-        fillStr = settings.Settings.load("bg", "(255, 255, 255)")
-        fontStr = settings.Settings.load("txt", "(0, 0, 0)")
-
-        fillChannels = [int(n) for n in fillStr.strip()[1:-1].split(",")]
-        fontChannels = [int(n) for n in fontStr.strip()[1:-1].split(",")]
-
-        self.fill = tuple(fillChannels)
-        self.color = tuple(fontChannels)
+        self.fill = settings.Settings.loadColor("bg", (255, 255, 255))
+        self.color = settings.Settings.loadColor("txt", (0, 0, 0))
 
     def _startGame(self, e=None):
         g = GameModule(self)
         g.execute()
+        g.destroy()
+
+    # Joins the game hosted by the server saved in the settings, which is
+    # localhost unless changed.
+    def _startNetworkGame(self, e=None):
+        host = settings.Settings.load("server", "localhost")
+
+        try:
+            g = NetworkModule(self, host, Protocol.DEFAULT_PORT)
+        except socket.error:
+            # There is no server to play on, so stay on the main menu.
+            return
+
+        g.execute()
+        g.destroy()
 
     def _settingsMenu(self, e=None):
         settings = SettingsMenu(self)
         settings.execute()
+        settings.destroy()
 
 if __name__ == "__main__":
     menu = MainMenu()
@@ -16,10 +16,13 @@ import utils
 
 import sys
 import string, re
+import time
 
 import utils
 import views
 
+from profiler import FrameProfiler, ViewProfiler
+
 ################################################################################
 # Author: Matias Grioni
 # Created: 6/2/15
@@ -69,9 +72,50 @@ class Module(utils.EventHandler):
         self.clock = pygame.time.Clock()
         self.fps = 60
 
+        # update is called tickRate times a second of real time, no matter
+        # how often the screen is drawn, which is at most fps times a second.
+        # If drawing falls behind, up to maxFrameSkip more updates are run
+        # before the next draw to catch up, and past that the time is dropped
+        # so the game slows down instead of never drawing. With a tickRate of
+        # None update is called once per frame instead.
+        self.tickRate = 60
+        self.maxFrameSkip = 5
+
+        # The timing of the last frame. frameTime is the seconds since the
+        # frame before, frameUpdates how many times update was called in it
+        # and tickProgress how far into the next tick it was drawn, from 0 to
+        # 1. droppedTime is the total seconds that could not be caught up.
+        self.frameTime = 0.0
+        self.frameUpdates = 0
+        self.tickProgress = 0.0
+        self.droppedTime = 0.0
+        self.resetTiming()
+
+        # Runs timers on the time of this module. Its clock moves with the
+        # updates, a tick at a time.
+        self.scheduler = utils.Scheduler()
+
+        # The child modules started with getModule, by their class, so they
+        # are only created once.
+        self._pool = {}
+
+        # Incremental modules only redraw the parts of the screen that views
+        # report as changed. The dirty rects are None when the whole screen
+        # has to be drawn again on the next frame.
+        self.incremental = False
+        self._dirtyRects = None
+
+        # Times the phases of each frame. F3 shows the overlay of the times
+        # and F4 saves them to a csv file in the working directory. F5 starts
+        # timing every view, and saves the times when pressed again.
+        self.profiler = FrameProfiler()
+
         # Setup the event handlers for the module
         self.addEventCallback((KEYDOWN, K_ESCAPE), self.back)
         self.addEventCallback((QUIT, None), self.quit)
+        self.addEventCallback((KEYDOWN, K_F3), self._toggleOverlay)
+        self.addEventCallback((KEYDOWN, K_F4), self._exportProfile)
+        self.addEventCallback((KEYDOWN, K_F5), self._toggleViewProfiler)
 
     def setView(self, child):
         self.view.addChild(child)
@@ -83,8 +127,10 @@ class Module(utils.EventHandler):
         # Force reset the screen
         self.screen.fill(self.fill)       
         pygame.display.flip()
+        self.invalidate()
 
         self.fps = 60
+        self.resetTiming()
         self.view.reset()
 
     # The following are base logic functions that are mostly bare here
@@ -107,40 +153,162 @@ class Module(utils.EventHandler):
             self.handleEvent(e)
 
     def update(self):
-        self.view.update()
+        views.callEach((self.view,), "update")
     
+    # Draws the view hierarchy. If this module is incremental and nothing has
+    # invalidated the whole screen then only the changed parts are drawn.
     def draw(self):
-        self.view.draw()
+        if self.incremental and self._dirtyRects is not None:
+            views.callEach((self.view,), "drawDirty")
+        else:
+            views.callEach((self.view,), "draw")
+
+        if self.profiler.overlay:
+            self.invalidate(self.profiler.drawOverlay(self.screen))
+
+    # Marks the rect (x, y, w, h) of the screen as changed so that it is sent
+    # to the display on the next flip. With no rect the whole screen is drawn
+    # and sent again on the next frame.
+    def invalidate(self, rect=None):
+        if rect is None:
+            self._dirtyRects = None
+        elif self._dirtyRects is not None:
+            self._dirtyRects.append(rect)
+
+    # Sends what was drawn this frame to the display. Incremental modules only
+    # update the dirty rects unless the whole screen was invalidated.
+    def flip(self):
+        if not self.incremental or self._dirtyRects is None:
+            pygame.display.flip()
+        elif self._dirtyRects:
+            pygame.display.update(self._dirtyRects)
+
+        self._dirtyRects = []
+
+    # Forgets the time that has passed since the last frame, so that it is
+    # not caught up with updates. Call it after anything that held up the
+    # loop on purpose, like a child module running.
+    def resetTiming(self):
+        self._lastFrame = time.time()
+        self._accumulator = 0.0
+
+    # Runs as many updates as the time since the last frame calls for.
+    def _tick(self):
+        now = time.time()
+        self.frameTime = now - self._lastFrame
+        self._lastFrame = now
+
+        if self.tickRate is None:
+            self.scheduler.advance(self.frameTime)
+            self.update()
+            self.frameUpdates = 1
+            return
+
+        period = 1.0 / self.tickRate
+        self._accumulator += self.frameTime
+
+        updates = 0
+        while self.running and self._accumulator >= period and \
+              updates <= self.maxFrameSkip:
+            self.scheduler.advance(period)
+            self.update()
+            self._accumulator -= period
+            updates += 1
+
+        if self._accumulator >= period:
+            dropped = self._accumulator - self._accumulator % period
+            self.droppedTime += dropped
+            self._accumulator -= dropped
+
+        self.frameUpdates = updates
+        self.tickProgress = self._accumulator / period
 
-    # Runs the logic loop for this module.
+    # The lifecycle of a module, like an Android activity. A module is created
+    # once, and then resumed each time it comes to the front, which is when
+    # it starts executing or when a module it started ends. It is paused when
+    # it stops executing or starts another module, and destroyed once it will
+    # not be used again. Override these to hold on to or let go of resources,
+    # calling the method of the super class.
+    def onResume(self):
+        # Time spent away from this module isn't caught up, and what was on
+        # the screen is not this module's anymore.
+        self.resetTiming()
+        self.invalidate()
+
+        # The frame this module is in was held up by whatever it resumed from.
+        self.profiler.discard()
+
+    def onPause(self):
+        pass
+
+    def onDestroy(self):
+        pass
+
+    # Returns the child module of class cls, creating it with this module as
+    # its parent the first time and returning the same one after that. Reset
+    # whatever the child shows before executing it again.
+    def getModule(self, cls):
+        child = self._pool.get(cls)
+        if child is None:
+            child = cls(self)
+            self._pool[cls] = child
+
+        return child
+
+    # Destroys the child modules kept by getModule and then this module.
+    # It should not be executed again after.
+    def destroy(self):
+        for child in self._pool.values():
+            child.destroy()
+
+        self._pool.clear()
+        self.onDestroy()
+
+    # Runs the logic loop for this module. Events are handled and the screen
+    # drawn once a frame, while update runs at the tick rate.
     def execute(self):
         self.running = True
 
+        if self.parent is not None:
+            self.parent.onPause()
+        self.onResume()
+
         # Even if the module, isn't running, it should display the initial
         # screen but not update its screen. This helps if there is a pause
         # in execution.
         self.screen.fill(self.fill)
         self.draw()
-        pygame.display.flip()
+        self.flip()
 
         # Accept input and update the screen, 
+        profiler = self.profiler
+        profiler.start()
         while self.running:
             self.handleEvents()
-            self.update()
+            profiler.mark(FrameProfiler.EVENTS)
+            self._tick()
+            profiler.mark(FrameProfiler.UPDATE)
             self.draw()
-            pygame.display.flip()
+            profiler.mark(FrameProfiler.DRAW)
+            self.flip()
+            profiler.mark(FrameProfiler.FLIP)
 
             self.clock.tick(self.fps)
+            profiler.mark(FrameProfiler.IDLE)
+            profiler.endFrame()
 
         # For when the loop is over, if it's transitioning
         # to a new screen we want to clear it before then, and then draw
         # the next screen so that it starts off with a clean slate.
-        # Mostly, for timing purposes though, in the future, an activity
-        # lifecycle should be implemented.
+        self.onPause()
+
         self.screen.fill(self.fill)
         if self.parent is not None:
+            self.parent.onResume()
             self.parent.draw()
-        pygame.display.flip()
+            self.parent.flip()
+        else:
+            pygame.display.flip()
 
     # Moves up through the module stack back times. If the
     # current module is the root, quit the app. 
@@ -169,6 +337,26 @@ class Module(utils.EventHandler):
     def getFocusedView(self):
         return self.view.getFocusedChild()
 
+    # Shows or hides the frame times on top of this module. The whole screen
+    # is drawn again so that nothing is left of the overlay once it is off.
+    def _toggleOverlay(self, e=None):
+        self.profiler.overlay = not self.profiler.overlay
+        self.invalidate()
+
+    # Saves the frame times of this module as a csv file named after the
+    # time it was saved.
+    def _exportProfile(self, e=None):
+        self.profiler.export(time.strftime("frames-%Y%m%d-%H%M%S.csv"))
+
+    # Starts timing the views, or stops and saves their times as collapsed
+    # stacks for a flame graph, named after the time they were saved.
+    def _toggleViewProfiler(self, e=None):
+        viewProfiler = ViewProfiler.stop()
+        if viewProfiler is None:
+            ViewProfiler.start()
+        else:
+            viewProfiler.export(time.strftime("views-%Y%m%d-%H%M%S.folded"))
+
 ################################################################################
 # Author: Matias Grioni
 # Created: 8/5/15
@@ -0,0 +1,268 @@
+######################################################################
+# Times where each frame of a module goes. The loop of a module marks
+# the end of each phase of a frame, handling events, updating, drawing,
+# flipping the display and waiting on the clock, and the profiler keeps
+# the times of the last frames in a ring buffer. Percentiles over those
+# frames can be shown on top of the module as an overlay, and the
+# frames can be saved as a csv or json trace.
+#
+# Marking a phase is a call to the clock and a store, so a module
+# always profiles itself and the overlay only has to be turned on.
+######################################################################
+
+import json
+import time
+from array import array
+
+import pygame
+
+import utils
+
+# The most precise clock there is.
+clock = getattr(time, "perf_counter", time.time)
+
+class FrameProfiler(object):
+    EVENTS, UPDATE, DRAW, FLIP, IDLE = range(5)
+    PHASES = ("events", "update", "draw", "flip", "idle")
+
+    # How many frames are kept, which is 10 seconds at 60 frames a second.
+    SIZE = 600
+
+    # The percentiles the overlay shows, and how often it is refreshed in
+    # seconds, since its text has to be rendered again each time.
+    PERCENTILES = (50, 95, 99)
+    REFRESH = 0.5
+
+    def __init__(self, size=SIZE):
+        self.size = size
+
+        # The seconds each phase took in each frame. The frames are written
+        # at _next and wrap around, and count is how many have been written
+        # in all.
+        self.times = [array("d", [0.0] * size) for p in FrameProfiler.PHASES]
+        self.count = 0
+        self._next = 0
+
+        self._current = [0.0] * len(FrameProfiler.PHASES)
+        self._last = clock()
+        self._discard = False
+
+        self.overlay = False
+        self._lines = []
+        self._refreshed = 0.0
+        self._width = 0
+
+    # Starts timing a frame from now.
+    def start(self):
+        self._last = clock()
+        self._current = [0.0] * len(FrameProfiler.PHASES)
+        self._discard = False
+
+    # Marks the end of phase in the current frame. The phase took the time
+    # since the last mark. A phase can be marked more than once a frame,
+    # and the times are added.
+    def mark(self, phase):
+        now = clock()
+        self._current[phase] += now - self._last
+        self._last = now
+
+    # Keeps the current frame, unless it was discarded, and starts the next
+    # one from now.
+    def endFrame(self):
+        if not self._discard:
+            for (phase, seconds) in enumerate(self._current):
+                self.times[phase][self._next] = seconds
+
+            self._next = (self._next + 1) % self.size
+            self.count += 1
+
+        self.start()
+
+    # Drops the current frame, for when something held it up on purpose,
+    # like a child module running inside an update.
+    def discard(self):
+        self._discard = True
+
+    # Returns the times of the kept frames of phase from oldest to newest.
+    # phase None gives the whole frames.
+    def frames(self, phase=None):
+        kept = min(self.count, self.size)
+        start = (self._next - kept) % self.size
+        order = [(start + i) % self.size for i in range(kept)]
+
+        if phase is None:
+            return [sum(times[i] for times in self.times) for i in order]
+
+        return [self.times[phase][i] for i in order]
+
+    # Returns the ps percentiles of the times of phase over the kept frames,
+    # or of whole frames if phase is None, by nearest rank. They are all 0 if
+    # no frames were kept yet.
+    def percentiles(self, ps, phase=None):
+        times = sorted(self.frames(phase))
+        if not times:
+            return [0.0] * len(ps)
+
+        ranks = [int(round(p / 100.0 * len(times) + 0.5)) - 1 for p in ps]
+        return [times[max(0, min(rank, len(times) - 1))] for rank in ranks]
+
+    # Saves the kept frames to path, as json if it ends in .json and as csv
+    # otherwise. Times are in milliseconds with one row or object a frame.
+    def export(self, path):
+        phases = [self.frames(p) for p in range(len(FrameProfiler.PHASES))]
+        rows = [[times[i] * 1000 for times in phases]
+                for i in range(len(phases[0]))]
+
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump([dict(zip(FrameProfiler.PHASES, row))
+                           for row in rows], f, indent=1)
+            else:
+                f.write(",".join(FrameProfiler.PHASES) + "\n")
+                for row in rows:
+                    f.write(",".join("%.4f" % ms for ms in row) + "\n")
+
+    # Draws the percentiles of each phase onto the top left of screen and
+    # returns the rect it covers.
+    def drawOverlay(self, screen):
+        now = clock()
+        if not self._lines or now - self._refreshed >= FrameProfiler.REFRESH:
+            self._lines = self._renderLines()
+            self._refreshed = now
+
+        # The box never shrinks, so that a narrower refresh doesn't leave the
+        # edge of the last one behind.
+        width = max(line.get_width() for line in self._lines) + 8
+        width = self._width = max(self._width, width)
+        height = sum(line.get_height() for line in self._lines) + 8
+        rect = pygame.Rect(0, 0, width, height)
+        screen.fill((0, 0, 0), rect)
+
+        y = 4
+        for line in self._lines:
+            screen.blit(line, (4, y))
+            y += line.get_height()
+
+        return rect
+
+    # Renders a line of the percentiles in milliseconds for each phase and
+    # for the whole frame.
+    def _renderLines(self):
+        text = ["%-6s" % "ms" + "".join(" p%-5d" % p
+                                        for p in FrameProfiler.PERCENTILES)]
+
+        rows = list(enumerate(FrameProfiler.PHASES)) + [(None, "frame")]
+        for (phase, name) in rows:
+            times = self.percentiles(FrameProfiler.PERCENTILES, phase)
+            text.append("%-6s" % name +
+                        "".join(" %6.2f" % (t * 1000) for t in times))
+
+        # The numbers are different every time, so the text is not put in
+        # the cache of rendered text.
+        font = utils.TextCache.font("monospace", 14)
+        return [font.render(line, False, (255, 255, 255)) for line in text]
+
+# The ViewProfiler that every view is timed by, or None while the views
+# are not timed. It is started and stopped with ViewProfiler.start and
+# ViewProfiler.stop.
+current = None
+
+# Times the update and draw of every view, to find which ones are
+# expensive. A view is timed where another view or its module calls it,
+# so the time of a call covers everything its class and super classes
+# do in it, and views of any class are timed, whenever it was imported.
+# While no ViewProfiler is running, calling a view only costs checking
+# current.
+#
+# The views are timed as a tree, like the calls go from the RootView
+# down through the ViewGroups. Each stack of calls is named by the
+# class and method of each view in it, and the time spent in that call
+# itself, less its children, is added up for the stack. collapsed
+# gives these in the collapsed stack format flame graph tools read.
+# The total time and calls of each view and each class are kept too.
+class ViewProfiler(object):
+    def __init__(self):
+        # The calls being timed, innermost last, as lists of
+        # [path, start, seconds of children].
+        self._stack = []
+
+        # Seconds of self time by stack, and [calls, seconds] by
+        # (class name, id of view, method) and (class name, method).
+        self.stacks = {}
+        self.views = {}
+        self.classes = {}
+
+    # Starts timing every view with a new ViewProfiler, which is returned.
+    @staticmethod
+    def start():
+        global current
+        current = ViewProfiler()
+
+        return current
+
+    # Stops timing the views. Returns the ViewProfiler that timed them, or
+    # None if they were not being timed.
+    @staticmethod
+    def stop():
+        global current
+        profiler, current = current, None
+
+        return profiler
+
+    # Calls the method called name of view and times it.
+    def call(self, view, name):
+        stack = self._stack
+
+        label = "%s.%s" % (type(view).__name__, name)
+        path = stack[-1][0] + (label,) if stack else (label,)
+
+        call = [path, clock(), 0.0]
+        stack.append(call)
+        try:
+            return getattr(view, name)()
+        finally:
+            stack.pop()
+            seconds = clock() - call[1]
+            if stack:
+                stack[-1][2] += seconds
+
+            self._record(view, name, path, seconds, seconds - call[2])
+
+    def _record(self, view, name, path, seconds, selfSeconds):
+        self.stacks[path] = self.stacks.get(path, 0.0) + selfSeconds
+
+        className = type(view).__name__
+        for (key, table) in (((className, id(view), name), self.views),
+                             ((className, name), self.classes)):
+            totals = table.get(key)
+            if totals is None:
+                totals = table[key] = [0, 0.0]
+
+            totals[0] += 1
+            totals[1] += seconds
+
+    # Returns the stacks as lines of the collapsed stack format, the names in
+    # the stack joined by ; and then the self time in microseconds.
+    def collapsed(self):
+        return ["%s %d" % (";".join(path), round(seconds * 1e6))
+                for (path, seconds) in sorted(self.stacks.items())]
+
+    # Saves the collapsed stacks to path.
+    def export(self, path):
+        with open(path, "w") as f:
+            for line in self.collapsed():
+                f.write(line + "\n")
+
+    # Returns lines with the calls, total and average milliseconds of each
+    # class and method, the slowest first.
+    def report(self):
+        rows = sorted(self.classes.items(), key=lambda r: -r[1][1])
+
+        lines = ["%-30s %8s %10s %8s" % ("view", "calls", "total ms",
+                                         "avg ms")]
+        for ((className, name), (calls, seconds)) in rows:
+            lines.append("%-30s %8d %10.2f %8.3f" %
+                         ("%s.%s" % (className, name), calls, seconds * 1000,
+                          seconds * 1000 / calls))
+
+        return lines
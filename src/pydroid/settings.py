@@ -12,8 +12,12 @@
 import modules, views
 
 from pygame.locals import *
+import atexit
+import collections
+import os
 import string
 import re
+import threading
 
 ###########################################################
 # Author: Matias Grioni
@@ -23,47 +27,130 @@ import re
 # to the way Android works with preferences. One saves
 # a value with a key associated with it as text in the
 # defined text file (/settings/settings.txt)
+#
+# The file is read once into a dict and only read again
+# if it changes on disk. Saves go into the dict right away
+# and are written to the file together WRITE_DELAY seconds
+# after the first one, or when the program exits. The file
+# is written to a temporary file first and then renamed
+# over the old one, so it is never left half written.
 ###########################################################
 class Settings(object):
     SETTINGSFILE = "../settings/settings.txt"
+    WRITE_DELAY = 1.0
+
+    # The settings as they are in the file, the modification time of the
+    # file when it was read, and the saves not written to it yet.
+    _values = None
+    _mtime = None
+    _pending = {}
+
+    _lock = threading.RLock()
+    _writeTimer = None
 
     # Save the value provided along with the name in the game settings
     # file as a line in the format key::value or overwrites an existing line
     @staticmethod
     def save(key, value):
-        with open(Settings.SETTINGSFILE, "r+") as f:
-            found = False
-            newLines = []
-            for line in f.readlines():
-                s = line.strip("\r\n")
-                args = s.split("::")
-
-                if args[0] == key:
-                    found = True
-                    newLines.append(key + "::" + value)
-                else:
-                    newLines.append(s)
-
-            if not found:
-                newLines.append(key + "::" + value)
-
-            f.seek(0)
-            f.truncate()
-            f.write("\n".join(newLines))
+        with Settings._lock:
+            Settings._refresh()
+            Settings._values[key] = value
+            Settings._pending[key] = value
+
+            if Settings._writeTimer is None:
+                Settings._writeTimer = threading.Timer(Settings.WRITE_DELAY,
+                                                       Settings.flush)
+                Settings._writeTimer.daemon = True
+                Settings._writeTimer.start()
 
     # Loads the value for the provided key in the settings file. Returns
     # the default value if the key is not found or None if no default
     # is provided.
     @staticmethod
     def load(key, default=None):
-        with open(Settings.SETTINGSFILE, "r") as f:
-            for line in f.readlines():
-                args = line.strip("\r\n").split("::")
+        with Settings._lock:
+            Settings._refresh()
+            return Settings._values.get(key, default)
+
+    # Saves a color as an (r, g, b) tuple.
+    @staticmethod
+    def saveColor(key, color):
+        Settings.save(key, "(%d, %d, %d)" % tuple(color[:3]))
+
+    # Loads a color saved as "(r, g, b)" as a tuple of ints. Returns the
+    # default if there is no color saved for the key or it can't be read.
+    @staticmethod
+    def loadColor(key, default=None):
+        value = Settings.load(key)
+        if value is None:
+            return default
+
+        try:
+            channels = tuple(int(c) for c in value.strip()[1:-1].split(","))
+        except ValueError:
+            return default
+
+        return channels if len(channels) == 3 else default
+
+    # Writes the saves that are waiting to the file now.
+    @staticmethod
+    def flush():
+        with Settings._lock:
+            if Settings._writeTimer is not None:
+                Settings._writeTimer.cancel()
+                Settings._writeTimer = None
+
+            if not Settings._pending:
+                return
 
-                if args[0] == key:
-                    return args[1]
+            # Pick up any change made to the file by something else first.
+            Settings._refresh()
 
-        return default
+            path = Settings.SETTINGSFILE
+            temp = path + ".tmp"
+            with open(temp, "w") as f:
+                f.write("\n".join(k + "::" + v
+                                   for (k, v) in Settings._values.items()))
+                f.flush()
+                os.fsync(f.fileno())
+
+            if hasattr(os, "replace"):
+                os.replace(temp, path)
+            else:
+                # Renaming over a file fails on windows in python 2.
+                if os.name == "nt" and os.path.exists(path):
+                    os.remove(path)
+                os.rename(temp, path)
+
+            Settings._mtime = os.stat(path).st_mtime
+            Settings._pending = {}
+
+    # Reads the file again if it changed since it was last read. Saves that
+    # haven't been written yet are kept over what is in the file.
+    @staticmethod
+    def _refresh():
+        try:
+            mtime = os.stat(Settings.SETTINGSFILE).st_mtime
+        except OSError:
+            mtime = None
+
+        if Settings._values is not None and mtime == Settings._mtime:
+            return
+
+        values = collections.OrderedDict()
+        if mtime is not None:
+            with open(Settings.SETTINGSFILE, "r") as f:
+                for line in f.readlines():
+                    args = line.strip("\r\n").split("::", 1)
+                    if len(args) == 2:
+                        values[args[0]] = args[1]
+
+        values.update(Settings._pending)
+
+        Settings._values = values
+        Settings._mtime = mtime
+
+atexit.register(Settings.flush)
 
 ###########################################################
 # Author: Matias Grioni
@@ -79,8 +166,10 @@ class SettingModule(modules.Module):
     # background color and window size. Note, if a parent is provided,
     # the size will be equal to the size of the parent regardless of the
     # value passed in.
-    def __init__(self, parent=None, fill=(255, 255, 255), size=(640, 480)):
+    def __init__(self, parent=None, color=(0, 0, 0), fill=(255, 255, 255),
+                 size=(640, 480)):
         super(SettingModule, self).__init__(parent, fill, size)
+        self.color = color
 
         # Variable to store the current value. Only strings for value.
         # Also initializes the TextDisp text to be used for the setting
@@ -95,10 +184,10 @@ class SettingModule(modules.Module):
         self.desc.setFont(color=self.color)
         self.error.setFont(color=self.color)
 
-        container = views.ViewGroup(self, (0, 0), self.size)
-        container.children.append(self.desc)
-        container.children.append(self.error)
-        self.setView(container)
+        self.container = views.ViewGroup(self, (0, 0), self.size)
+        self.container.addChild(self.desc)
+        self.container.addChild(self.error)
+        self.setView(self.container)
 
         self.addEventCallback((KEYDOWN, K_RETURN), self.save)
 
@@ -163,7 +252,8 @@ class SettingInput(SettingModule):
 
         self.query = ""
         self.disp = views.TextDisp(self, (self.x, self.y))
-        self.children.append(self.disp)
+        self.disp.setFont(color=self.color)
+        self.container.addChild(self.disp)
 
         # Set the default pygame event actions for all SettingInput
         # objects.
@@ -175,11 +265,6 @@ class SettingInput(SettingModule):
         self.query = query
         self.disp.setText(query + self.value)
 
-    # Draws the current value
-    def draw(self):
-        super(SettingInput, self).draw()
-        self.disp.draw(self.screen)
-
     # Local method to remove the last character from the setting value
     # Shouldn't be used by client.
     def _backspace(self, e):
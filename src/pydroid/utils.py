@@ -9,6 +9,10 @@
 # found here.
 ######################################################################
 
+import collections
+import heapq
+import itertools
+
 import pygame
 from pygame.locals import *
 
@@ -25,6 +29,15 @@ class EventHandler(object):
     def __init__(self):
         self.eventCallbacks = {}
 
+        # An index of the callbacks by what events they match, so that an
+        # event is dispatched with lookups rather than a pass over every
+        # callback. _multiCallbacks maps each (type, code) in a multiple
+        # event key like (KEYDOWN, (K_ESCAPE, K_UP)) to the keys it is in,
+        # in the order they were added. _types counts the callbacks for each
+        # event type, so events of any other type are ignored right away.
+        self._multiCallbacks = {}
+        self._types = {}
+
     # Adds a callback for the keyboard event code. All codes have one
     # unique callback. event should be a tuple where the first entry
     # is the event type, and the second entry is the key code.
@@ -44,19 +57,63 @@ class EventHandler(object):
     # for an event. Args are the arguments to provide to the callback
     # and kwargs are the named arguments, following convention.
     def addEventCallback(self, event, callback, *args, **kwargs):
+        if event not in self.eventCallbacks:
+            self._types[event[0]] = self._types.get(event[0], 0) + 1
+
+            if type(event[1]) is tuple:
+                for code in event[1]:
+                    info = (event[0], code)
+                    self._multiCallbacks[info] = \
+                        self._multiCallbacks.get(info, ()) + (event,)
+
         self.eventCallbacks[event] = (callback, args, kwargs)
+        self._callbacksChanged()
 
     # Removes the callback for the provided event and returns the
     # previously added callback or None if there was none defined
     # for the event.
     def removeEventCallback(self, event):
-        return self.eventCallbacks.pop(event, None)
+        callback = self.eventCallbacks.pop(event, None)
+
+        if callback is not None:
+            self._types[event[0]] -= 1
+            if self._types[event[0]] == 0:
+                del self._types[event[0]]
+
+            if type(event[1]) is tuple:
+                for code in event[1]:
+                    info = (event[0], code)
+                    keys = tuple(k for k in self._multiCallbacks[info]
+                                 if k != event)
+
+                    if keys:
+                        self._multiCallbacks[info] = keys
+                    else:
+                        del self._multiCallbacks[info]
+
+            self._callbacksChanged()
+
+        return callback
 
     # Removes all event listeners
     def clearEventCallbacks(self):
         self.eventCallbacks.clear()
+        self._multiCallbacks.clear()
+        self._types.clear()
+        self._callbacksChanged()
+
+    # Returns True if there is any callback for events of the type.
+    def handlesType(self, eventType):
+        return eventType in self._types
+
+    # Called whenever a callback is added or removed.
+    def _callbacksChanged(self):
+        pass
 
     def handleEvent(self, e):
+        if e.type not in self._types:
+            return
+
         # Creates a tuple with the necessary event information based on
         # the parameter. Generates the key for the callback dictionary
         # so we can check if there is a registered callback for this event.
@@ -76,12 +133,12 @@ class EventHandler(object):
             self._handleCallback(e, callback)
 
         # Then check if this event is found in a callback tuple with
-        # multiple matching events like (KEYDOWN, (K_ESCAPE, K_UP))
-        for key in self.eventCallbacks:
-            if type(key[1]) is tuple:
-                if info[0] == key[0] and info[1] in key[1]:
-                    callback = self.eventCallbacks[key]
-                    self._handleCallback(e, callback)
+        # multiple matching events like (KEYDOWN, (K_ESCAPE, K_UP)). A
+        # callback can remove another, so each is looked up again.
+        for key in self._multiCallbacks.get(info, ()):
+            callback = self.eventCallbacks.get(key)
+            if callback is not None:
+                self._handleCallback(e, callback)
 
         # Then check if a callback is defined for only the event type
         # and not an event code in that type.
@@ -98,15 +155,88 @@ class EventHandler(object):
 
         func(e, *args, **kwargs)
 
+######################################################################
+# Author: Matias Grioni
+# Created: 8/11/15
+#
+# Calls functions after a delay, without ever waiting for them. The
+# scheduler has its own clock which only moves when advance is called,
+# which a module does as part of its loop, so nothing scheduled runs
+# while the module isn't running. Any number of calls can be waiting
+# at once, and each can be cancelled until it has run.
+######################################################################
+class Scheduler(object):
+    # Calls due within this many seconds of the clock are run, so that
+    # adding up fractions of a second still reaches a whole second.
+    EPSILON = 1e-9
+
+    def __init__(self):
+        self.time = 0.0
+
+        # The calls as a heap of (due, order, call). order keeps calls due at
+        # the same time in the order they were scheduled.
+        self._calls = []
+        self._order = itertools.count()
+
+    # Calls callback with args and kwargs once delay seconds have passed.
+    # Returns the ScheduledCall, which can be cancelled.
+    def schedule(self, delay, callback, *args, **kwargs):
+        call = ScheduledCall(self.time + delay, callback, args, kwargs)
+        heapq.heappush(self._calls, (call.due, next(self._order), call))
+
+        return call
+
+    # Cancels every call that has not run yet.
+    def clear(self):
+        for (due, order, call) in self._calls:
+            call.cancelled = True
+
+        self._calls = []
+
+    # Returns how many calls are waiting to run.
+    def pending(self):
+        return len([c for c in self._calls if not c[2].cancelled])
+
+    # Moves the clock forward dt seconds and runs the calls that are due, in
+    # the order they are due. A call can schedule more calls, which run in
+    # this same advance if they are due by now too.
+    def advance(self, dt):
+        self.time += dt
+
+        while self._calls and self._calls[0][0] <= self.time + \
+              Scheduler.EPSILON:
+            call = heapq.heappop(self._calls)[2]
+            if not call.cancelled:
+                call.run()
+
+# A call waiting in a Scheduler.
+class ScheduledCall(object):
+    def __init__(self, due, callback, args, kwargs):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+
+        self.cancelled = False
+        self.done = False
+
+    # Stops the call from running, if it hasn't yet.
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        self.done = True
+        self.callback(*self.args, **self.kwargs)
+
 ######################################################################
 # Author: Matias Grioni
 # Created: 7/18/15
 #
 # A countdown utility. Pass in a specified time in seconds to
 # countdown, and a provided callback will be called each second, and
-# another callback once the timer has finished. If no callbacks are
-# provided then it will merely stall the execution of the program, for
-# the specified time.
+# another callback once the timer has finished. The countdown runs on
+# a Scheduler, so start returns right away and the seconds pass as the
+# module keeps running.
 ######################################################################
 class Timer(object):
     def __init__(self, s):
@@ -115,14 +245,109 @@ class Timer(object):
         self.onTick = None
         self.onFinish = None
 
-    # Start the synchronously countdown
-    def start(self):
-        tmp = self.s
+        # The seconds left, and the next call of the countdown if it is
+        # running.
+        self.remaining = 0
+        self._call = None
+
+    def running(self):
+        return self._call is not None
+
+    # Starts the countdown on the scheduler from the beginning. onTick is
+    # called with the seconds left right away and then every second.
+    def start(self, scheduler):
+        self.cancel()
+
+        self.remaining = self.s
+        self._step(scheduler)
+
+    # Stops the countdown without calling onFinish.
+    def cancel(self):
+        if self._call is not None:
+            self._call.cancel()
+            self._call = None
+
+    def _step(self, scheduler):
+        if self.remaining > 0:
+            if self.onTick is not None:
+                self.onTick(self.remaining)
+
+            self.remaining -= 1
+            self._call = scheduler.schedule(1, self._step, scheduler)
+        else:
+            self._call = None
+
+            if self.onFinish is not None:
+                self.onFinish()
+
+######################################################################
+# Author: Matias Grioni
+# Created: 8/12/15
+#
+# Process wide caches for text, used statically like Settings. Finding
+# a system font is slow, so each (family, size) is only looked up once
+# and kept for good. Rendered text is kept in a least recently used
+# cache, bounded both by how many surfaces it holds and by how many
+# bytes of pixels, so the same score or menu option is only rendered
+# once while it keeps being shown. The surfaces are shared, so they
+# must only be blitted and never drawn on.
+######################################################################
+class TextCache(object):
+    MAX_SURFACES = 256
+    MAX_BYTES = 4 * 1024 * 1024
+
+    _fonts = {}
+    _surfaces = collections.OrderedDict()
+    _bytes = 0
+
+    hits = 0
+    misses = 0
+
+    # Returns the pygame font for the family and size.
+    @staticmethod
+    def font(family, size):
+        key = (family, size)
+
+        font = TextCache._fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(family, size)
+            TextCache._fonts[key] = font
+
+        return font
+
+    # Returns a surface with the text rendered in the font and color.
+    @staticmethod
+    def render(family, size, text, color, antialias=False):
+        surfaces = TextCache._surfaces
+        key = (family, size, text, tuple(color), antialias)
+
+        surface = surfaces.pop(key, None)
+        if surface is not None:
+            TextCache.hits += 1
+        else:
+            TextCache.misses += 1
+
+            surface = TextCache.font(family, size).render(text, antialias,
+                                                          color)
+            TextCache._bytes += TextCache._sizeOf(surface)
+
+        # The most recently used surfaces are kept at the end.
+        surfaces[key] = surface
+
+        while len(surfaces) > TextCache.MAX_SURFACES or \
+              (TextCache._bytes > TextCache.MAX_BYTES and len(surfaces) > 1):
+            old = surfaces.popitem(last=False)[1]
+            TextCache._bytes -= TextCache._sizeOf(old)
 
-        while tmp > 0:
-            self.onTick(tmp)
-            tmp -= 1
-            pygame.time.delay(1000)
+        return surface
 
-        self.onFinish()
+    # Forgets every rendered surface. The fonts are kept.
+    @staticmethod
+    def clear():
+        TextCache._surfaces.clear()
+        TextCache._bytes = 0
 
+    @staticmethod
+    def _sizeOf(surface):
+        return surface.get_width() * surface.get_height() * \
+            surface.get_bytesize()
@@ -10,10 +10,23 @@
 import pygame
 from pygame.locals import *
 
+import profiler
 import utils
 
 from types import NoneType
 
+# Calls the method called name, which is update, draw or drawDirty, of each
+# of the views. Views and modules call the views they hold through here, so
+# that every call is timed while a ViewProfiler is running.
+def callEach(views, name):
+    viewProfiler = profiler.current
+    if viewProfiler is None:
+        for view in views:
+            getattr(view, name)()
+    else:
+        for view in views:
+            viewProfiler.call(view, name)
+
 ######################################################################
 # Author: Matias Grioni
 # Created: 7/12/15
@@ -56,8 +69,37 @@ class View(utils.EventHandler):
         bounds = (self.x, self.y, self.size[0], self.size[1])
         pygame.draw.rect(self.screen, self.curBackground, bounds)
 
+    # Called instead of draw by incremental modules. Only what has changed
+    # since the last frame should be drawn, and the changed rects passed to
+    # module.invalidate. By default a view has nothing that changes between
+    # frames on its own.
+    def drawDirty(self):
+        pass
+
+    # Signals that this view looks different now. A view does not know what
+    # was drawn under it, so the whole module is drawn again on the next frame.
+    def invalidate(self):
+        self.module.invalidate()
+
     def setPosition(self, pos):
         self.x, self.y = pos[0], pos[1]
+        self._geometryChanged()
+
+    # Lets the ViewGroup this view is in know that it moved or changed size,
+    # so its hit test index is built again.
+    def _geometryChanged(self):
+        if self.parent is not None:
+            self.parent._hitGrid = None
+
+    # Returns the event types that this view has callbacks for.
+    def _handledTypes(self):
+        return self._types
+
+    # The ViewGroup this view is in skips events that no view in it has a
+    # callback for, so it has to know when the callbacks change.
+    def _callbacksChanged(self):
+        if self.parent is not None:
+            self.parent._callbacksChanged()
 
     # Returns True if the given position is within or on the bounds of this
     # view. Bounds for checking are not inclusive.
@@ -137,22 +179,78 @@ class View(utils.EventHandler):
 # Author: Matias Grioni
 # Created: 7/14/15
 #
-# A container for multiple different views. Add views by accessing the children
-# member variable and calling .append()
+# A container for multiple different views. Add views with addChild, so that the
+# group knows where they are and which events they want.
 ################################################################################
 class ViewGroup(View):
+    # The size in pixels of the cells of the hit test index.
+    HIT_CELL = 64
+
     def __init__(self, module, pos, size=(0, 0)):
         super(ViewGroup, self).__init__(module, pos, size)
         self.children = []
 
         self._focusedIndex = -1
 
+        # The event types that this group or any view in it has callbacks
+        # for, or None if it has to be found again.
+        self._subtreeTypes = None
+
+        # Maps each HIT_CELL sized cell of the screen to the indices of the
+        # children that overlap it, in order, so a mouse event only tests the
+        # children under it. None when it has to be built again.
+        self._hitGrid = None
+
         # ViewGroups are not focusable or clickable by default. They are to
         # house other views and organize them.
         self.setFocusable(False)
         self.setPressable(False)
 
+    # Returns True if this group or any view in it has a callback for events
+    # of the type.
+    def handlesType(self, eventType):
+        return eventType in self._handledTypes()
+
+    def _handledTypes(self):
+        if self._subtreeTypes is None:
+            self._subtreeTypes = set(self._types)
+            for child in self.children:
+                self._subtreeTypes.update(child._handledTypes())
+
+        return self._subtreeTypes
+
+    def _callbacksChanged(self):
+        self._subtreeTypes = None
+        super(ViewGroup, self)._callbacksChanged()
+
+    # Returns the indices of the children that contain (x, y), in order.
+    def childrenAt(self, x, y):
+        if self._hitGrid is None:
+            self._buildHitGrid()
+
+        cell = (int(x) // ViewGroup.HIT_CELL, int(y) // ViewGroup.HIT_CELL)
+        return [i for i in self._hitGrid.get(cell, ())
+                if self.children[i].posInBounds(x, y)]
+
+    def _buildHitGrid(self):
+        self._hitGrid = {}
+
+        size = ViewGroup.HIT_CELL
+        for (i, child) in enumerate(self.children):
+            left, top = int(child.x) // size, int(child.y) // size
+            right = int(child.x + child.size[0]) // size
+            bottom = int(child.y + child.size[1]) // size
+
+            for cx in range(left, right + 1):
+                for cy in range(top, bottom + 1):
+                    self._hitGrid.setdefault((cx, cy), []).append(i)
+
     def handleEvent(self, e):
+        # Nothing in this group would do anything with the event, so don't
+        # bother passing it down.
+        if not self.handlesType(e.type):
+            return
+
         if e.type in (KEYUP, KEYDOWN):
             # If this current ViewGroup is focused, then this won't return True
             # and the event will still be sent to the event handlers for this
@@ -162,27 +260,36 @@ class ViewGroup(View):
                 if nextChild is not None:
                     nextChild.handleEvent(e)
         elif e.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION):
-            for child in self.children:
-                if child.posInBounds(*e.pos):
-                    child.handleEvent(e)
-                else:
-                    child.clearFocus()
+            hits = self.childrenAt(*e.pos)
+
+            # The focused child loses focus if the mouse is not on it. Only
+            # that child is checked, since clearing focus does nothing to the
+            # others.
+            if 0 <= self._focusedIndex < len(self.children) and \
+               self._focusedIndex not in hits:
+                self.children[self._focusedIndex].clearFocus()
+
+            for i in hits:
+                self.children[i].handleEvent(e)
  
         super(ViewGroup, self).handleEvent(e)
 
     def update(self):
         super(ViewGroup, self).update()
-        for child in self.children:
-            child.update()
+        callEach(self.children, "update")
 
     def draw(self):
         super(ViewGroup, self).draw()
-        for child in self.children:
-            child.draw()
+        callEach(self.children, "draw")
+
+    def drawDirty(self):
+        callEach(self.children, "drawDirty")
 
     def addChild(self, child):
         child.parent = self
         self.children.append(child)
+        self._callbacksChanged()
+        self._hitGrid = None
 
     # Returns the child of this ViewGroup that is focused. If no view is focused
     # then None is returned.
@@ -199,7 +306,15 @@ class ViewGroup(View):
 
         return focus
 
+    # Returns the focused view in this group. The child at the focused index
+    # is checked first, so the search is only needed if focus moved without
+    # the index being kept up.
     def _getFocusedNext(self):
+        if 0 <= self._focusedIndex < len(self.children):
+            child = self.children[self._focusedIndex]
+            if child.focused:
+                return child
+
         focus = None
 
         for child in self.children:
@@ -304,12 +419,16 @@ class TextDisp(View):
         if color is not None:
             self.color = color
 
-        self.font = pygame.font.SysFont(self.fonttype, self.fontsize)
+        self.font = utils.TextCache.font(self.fonttype, self.fontsize)
 
-    # Recreates the text surface using the passed in text
+    # Recreates the text surface using the passed in text. The same text in
+    # the same font is only rendered once and then shared.
     def setText(self, text):
-        self.surface = self.font.render(text, False, self.color)
+        self.surface = utils.TextCache.render(self.fonttype, self.fontsize,
+                                              text, self.color)
         self.size = (self.surface.get_width(), self.surface.get_height())
+        self._geometryChanged()
+        self.invalidate()
 
     # Draws the text at x, y on the provided surface
     def draw(self):
@@ -366,6 +485,8 @@ class Menu(ViewGroup):
     def setOptions(self, options):
         self.options = options
         del self.children[:]
+        self._callbacksChanged()
+        self._hitGrid = None
         
         # For each text option provided create the TextDisp for them.
         for (i, option) in enumerate(options):
@@ -378,7 +499,7 @@ class Menu(ViewGroup):
                 newY = prior.y + prior.size[1] + 10
                 menuItem = TextDisp(self.module, (self.x + 30, newY), option)
 
-            self.children.append(menuItem)
+            self.addChild(menuItem)
 
     # Draw the text and the appropriate selector shape
     def draw(self):
@@ -0,0 +1,55 @@
+#!/usr/bin/python
+
+######################################################################
+# Watches a game recorded by a ReplayRecorder in a window, or with
+# --stats prints what is in the recording without opening one. The
+# stats are found by simulating the whole game, which is much faster
+# than real time since nothing is drawn.
+######################################################################
+
+import argparse
+
+from Replay import TURN, ReplayPlayer
+
+# Simulates the whole recording and prints its length, the result of each
+# round and how big the file is.
+def printStats(player):
+    rounds = []
+    while not player.done():
+        player.step()
+
+        if player.sim.over and (not rounds or rounds[-1][0] != player.frame):
+            scores = [rider.score for rider in player.sim.riders]
+            rounds.append((player.frame, player.sim.ticks, scores))
+
+    turns = len([code for (frame, code) in player.events if code >= TURN])
+    print("frames %d rounds %d turns %d size %d bytes" %
+          (player.frames, len(rounds), turns, player.size))
+    if player.seed is not None:
+        print("seed %d" % player.seed)
+
+    for (i, (frame, ticks, scores)) in enumerate(rounds):
+        print("round %d ended on frame %d after %d ticks, scores %s" %
+              (i + 1, frame, ticks, " ".join(str(s) for s in scores)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Watches a recorded game "
+                                     "of Tron.")
+    parser.add_argument("path", help="the recording to open")
+    parser.add_argument("--stats", action="store_true",
+                        help="print stats instead of watching the game")
+    args = parser.parse_args()
+
+    if args.stats:
+        printStats(ReplayPlayer.load(args.path))
+    else:
+        # Only needed to watch, so that stats can be had without pygame.
+        from GameView import GameView
+        from ReplayView import ReplayModule
+
+        module = ReplayModule(ReplayPlayer.load(args.path, GameView.DIM))
+        module.title("Tron replay")
+        module.execute()
+
+if __name__ == "__main__":
+    main()
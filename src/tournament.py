@@ -0,0 +1,187 @@
+#!/usr/bin/python
+
+###########################################################
+# Plays bot policies against each other in headless games
+# of Tron. The matches are either a round robin, or a swiss
+# tournament where each round pairs up policies with close
+# records. Matches are spread across a pool of processes,
+# and the results are added to the standings as each one
+# finishes. Every match is seeded from the tournament seed,
+# so running with the same seed gives the same results no
+# matter how many processes are used.
+###########################################################
+
+import argparse
+import json
+import multiprocessing
+
+from Policy import POLICIES
+from Simulation import TronSimulation
+
+# Plays a match between the policies named a and b, which is rounds
+# games on a width by height arena. The policies swap sides every round.
+# Runs in the worker processes, so the arguments come in as one tuple.
+# Returns the tuple (a, b, wins of a, wins of b, draws, total ticks).
+def playMatch(match):
+    a, b, seed, rounds, width, height = match
+
+    policies = [POLICIES[a](), POLICIES[b]()]
+    sim = TronSimulation.duel(width, height)
+
+    wins = [0, 0]
+    draws = 0
+    ticks = 0
+
+    for r in range(rounds):
+        # sides[i] is the policy riding rider i this round.
+        sides = (0, 1) if r % 2 == 0 else (1, 0)
+        for (i, policy) in enumerate(policies):
+            policy.reset("%d-%d-%d" % (seed, r, i))
+
+        sim.reset()
+        while not sim.over:
+            sim.step([policies[sides[i]].act(sim, i) for i in range(2)])
+
+        ticks += sim.ticks
+        alive = [rider.alive for rider in sim.riders]
+        if alive[0] != alive[1]:
+            wins[sides[alive.index(True)]] += 1
+        else:
+            draws += 1
+
+    return (a, b, wins[0], wins[1], draws, ticks)
+
+# The records of each policy in a tournament. A win is worth a point
+# and a draw half a point.
+class Standings(object):
+    def __init__(self, names):
+        self.names = list(names)
+        self.records = dict((name, {"wins": 0, "losses": 0, "draws": 0,
+                                    "ticks": 0, "games": 0})
+                            for name in names)
+
+        # The pairs of policies that have already played, in either order.
+        self.played = set()
+
+    # Adds the result of a match as returned by playMatch.
+    def record(self, result):
+        a, b, winsA, winsB, draws, ticks = result
+        games = winsA + winsB + draws
+
+        for (name, wins, losses) in ((a, winsA, winsB), (b, winsB, winsA)):
+            record = self.records[name]
+            record["wins"] += wins
+            record["losses"] += losses
+            record["draws"] += draws
+            record["ticks"] += ticks
+            record["games"] += games
+
+        self.played.add((a, b))
+        self.played.add((b, a))
+
+    def points(self, name):
+        record = self.records[name]
+        return record["wins"] + record["draws"] / 2.0
+
+    # Returns the names of the policies from first to last place. Ties are
+    # broken by name so the order is always the same.
+    def ranking(self):
+        return sorted(self.names, key=lambda name: (-self.points(name), name))
+
+    # Returns the standings as lines of text, from first place down.
+    def report(self):
+        lines = ["%-10s %6s %6s %6s %6s %9s" % ("policy", "points", "wins",
+                                                "losses", "draws",
+                                                "avg ticks")]
+        for name in self.ranking():
+            record = self.records[name]
+            avgTicks = record["ticks"] / float(max(record["games"], 1))
+            lines.append("%-10s %6.1f %6d %6d %6d %9.1f" %
+                         (name, self.points(name), record["wins"],
+                          record["losses"], record["draws"], avgTicks))
+
+        return lines
+
+# Returns every pair of the names once.
+def roundRobin(names):
+    return [(a, b) for (i, a) in enumerate(names) for b in names[i + 1:]]
+
+# Returns the pairs for the next round of a swiss tournament. Policies are
+# paired down the standings with the closest one they have not played yet.
+# With an odd number of policies the lowest one left over sits out.
+def swissPairs(standings):
+    left = standings.ranking()
+    pairs = []
+
+    while len(left) > 1:
+        a = left.pop(0)
+        opponents = [b for b in left if (a, b) not in standings.played]
+        b = opponents[0] if opponents else left[0]
+
+        left.remove(b)
+        pairs.append((a, b))
+
+    return pairs
+
+# Plays the matches for the pairs in the pool and adds each result to the
+# standings as soon as it comes back. first is the number of matches played
+# before these, so every match in the tournament gets its own seed.
+def playRound(pool, standings, pairs, first, args):
+    matches = [(a, b, args.seed * 1000003 + first + i, args.rounds,
+                args.size[0], args.size[1])
+               for (i, (a, b)) in enumerate(pairs)]
+
+    for result in pool.imap_unordered(playMatch, matches):
+        standings.record(result)
+
+    return first + len(matches)
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a tournament of "
+                                     "Tron bot policies.")
+    parser.add_argument("policies", nargs="+", choices=sorted(POLICIES),
+                        help="the policies to enter")
+    parser.add_argument("--format", choices=("roundrobin", "swiss"),
+                        default="roundrobin")
+    parser.add_argument("--swiss-rounds", dest="swissRounds", type=int,
+                        default=3, help="rounds of a swiss tournament")
+    parser.add_argument("--rounds", type=int, default=10,
+                        help="games in each match")
+    parser.add_argument("--size", type=int, nargs=2, default=(128, 96),
+                        metavar=("WIDTH", "HEIGHT"),
+                        help="size of the arena in cells")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument("--json", action="store_true",
+                        help="print the standings as json")
+    args = parser.parse_args()
+
+    # The same policy can't be entered twice.
+    names = []
+    for name in args.policies:
+        if name not in names:
+            names.append(name)
+
+    standings = Standings(names)
+    pool = multiprocessing.Pool(args.workers)
+
+    if args.format == "roundrobin":
+        playRound(pool, standings, roundRobin(names), 0, args)
+    else:
+        played = 0
+        for r in range(args.swissRounds):
+            played = playRound(pool, standings, swissPairs(standings), played,
+                               args)
+
+    pool.close()
+    pool.join()
+
+    if args.json:
+        print(json.dumps(dict((name, standings.records[name])
+                              for name in names), sort_keys=True))
+    else:
+        print("\n".join(standings.report()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# The game is run from src, which is where its modules import each other
+# from, so the tests put it on the path the same way.
+
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path[:0] = [SRC, os.path.join(SRC, "pydroid")]
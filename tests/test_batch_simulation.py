@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+
+from BatchSimulation import BatchSimulation
+from LineRider import LineRider
+from Simulation import TronSimulation, Turn
+
+GAMES = 8
+
+# Plays GAMES seeded games of TronSimulation next to a BatchSimulation
+# of them, with the same random turns, for ticks ticks, checking after
+# every tick that they agree. A game is reset in both once it is over.
+# Returns how many ticks had several riders die in the same game.
+def play(make, ticks, chance=0.2):
+    sims = [make() for i in range(GAMES)]
+    sim = sims[0]
+    starts = [(r.head()[0], r.head()[1], r.direction) for r in sim.riders]
+    batch = BatchSimulation(GAMES, sim.width, sim.height, starts)
+    rng = random.Random(len(starts))
+
+    pileups = 0
+    for tick in range(ticks):
+        actions = [[rng.choice((Turn.LEFT, Turn.RIGHT))
+                    if rng.random() < chance else Turn.NONE
+                    for rider in sim.riders] for sim in sims]
+
+        dead = batch.step(actions)
+        for (g, sim) in enumerate(sims):
+            died = sim.step(actions[g])
+            assert [r in died for r in sim.riders] == list(dead[g])
+            pileups += len(died) > 1
+
+        over = [g for (g, sim) in enumerate(sims) if sim.over]
+        for (g, sim) in enumerate(sims):
+            assert sim.over == batch.over[g]
+            assert sim.ticks == batch.ticks[g]
+            assert [r.head() for r in sim.riders] == \
+                list(zip(batch.x[g], batch.y[g]))
+            assert [r.alive for r in sim.riders] == list(batch.alive[g])
+            assert [r.score for r in sim.riders] == list(batch.scores[g])
+            assert bytes(sim.arena.cells) == batch.cells[g].tobytes()
+
+        batch.reset(over)
+        for g in over:
+            sims[g].reset()
+
+    return pileups
+
+def test_duels_match():
+    play(lambda: TronSimulation.duel(24, 16), 400)
+
+def test_free_for_all_matches():
+    pileups = play(lambda: TronSimulation.freeForAll(16, 12, 5), 400, 0.4)
+    assert pileups > 0
+
+# Three riders that meet head on in the same cell on their first tick,
+# and a fourth that rides on.
+def test_head_on_crash_of_three_matches():
+    def make():
+        sim = TronSimulation(9, 9)
+        for (x, y, direction) in ((2, 4, (1, 0)), (4, 2, (0, 1)),
+                                  (6, 4, (-1, 0)), (0, 0, (1, 0))):
+            sim.addRider(LineRider(x, y, direction, 1))
+
+        return sim
+
+    assert play(make, 20, 0) > 0
+
+@pytest.mark.parametrize("games", [[], np.zeros(GAMES, dtype=bool)])
+def test_reset_nothing(games):
+    batch = BatchSimulation(GAMES, 24, 16)
+    batch.step()
+    batch.reset(games)
+
+    assert list(batch.ticks) == [1] * GAMES
@@ -0,0 +1,80 @@
+import errno
+import socket
+
+import Protocol
+from Protocol import Message
+from Simulation import Turn
+from TronClient import TronClient
+
+# A socket that takes at most room bytes a send and has nothing to read,
+# or fails every recv with error.
+class FakeSocket(object):
+    def __init__(self, room=0, error=errno.EAGAIN):
+        self.room = room
+        self.error = error
+        self.sent = b""
+        self.closed = False
+
+    def send(self, data):
+        if self.room == 0:
+            raise socket.error(errno.EAGAIN, "would block")
+
+        taken = data[:self.room]
+        self.room -= len(taken)
+        self.sent += taken
+        return len(taken)
+
+    def recv(self, size):
+        raise socket.error(self.error, "recv failed")
+
+    def close(self):
+        self.closed = True
+
+def client(sock):
+    client = TronClient()
+    client.sock = sock
+    client.connected = True
+    return client
+
+def test_welcome_rate_past_255():
+    starts = [(1, 2, Protocol.DIRECTIONS[3])]
+    buffer = Protocol.MessageBuffer()
+    buffer.feed(Protocol.encodeWelcome(1, 4096, 4096, 1000, starts))
+
+    assert buffer.messages() == [(Message.WELCOME,
+                                  (1, 4096, 4096, 1000, starts))]
+
+def test_turns_are_kept_until_the_socket_takes_them():
+    sock = FakeSocket(room=3)
+    tron = client(sock)
+
+    tron.sendTurn(Turn.LEFT)
+    tron.sendTurn(Turn.RIGHT)
+    assert tron.connected
+    assert sock.sent + tron.outgoing == \
+        Protocol.encodeTurn(Turn.LEFT) + Protocol.encodeTurn(Turn.RIGHT)
+
+    sock.room = 100
+    tron.poll()
+    assert tron.outgoing == b""
+    assert sock.sent == \
+        Protocol.encodeTurn(Turn.LEFT) + Protocol.encodeTurn(Turn.RIGHT)
+
+def test_nothing_to_read_stays_connected():
+    tron = client(FakeSocket())
+    assert tron.poll() == []
+    assert tron.connected
+
+def test_reset_connection_disconnects():
+    sock = FakeSocket(error=errno.ECONNRESET)
+    tron = client(sock)
+
+    tron.poll()
+    assert not tron.connected
+    assert sock.closed
+
+def test_scores_past_0xffff():
+    buffer = Protocol.MessageBuffer()
+    buffer.feed(Protocol.encodeOver([0x10000, 3, 0xffffffff]))
+
+    assert buffer.messages() == [(Message.OVER, ([0x10000, 3, 0xffffffff],))]
@@ -0,0 +1,70 @@
+import os
+import subprocess
+
+import pytest
+
+from Arena import Arena
+from Evaluator import SpaceEvaluator
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   "src")
+
+# An 8x6 arena split by a wall down column 3 with a gap at the bottom.
+# Prints what the evaluator makes of it, so the same checks can be run on
+# any interpreter.
+SCRIPT = """
+from Arena import Arena
+from Evaluator import SpaceEvaluator
+
+arena = Arena(8, 6)
+for y in range(5):
+    arena.occupy(3, y)
+
+evaluator = SpaceEvaluator(8, 6)
+evaluator.load(arena)
+print(evaluator.reachable(0, 0))
+print(evaluator.reachable(3, 0))
+print(evaluator.connected((0, 0), (7, 0)))
+print(evaluator.voronoi([(0, 0), (7, 0)]))
+"""
+
+EXPECTED = ["43", "0", "True", "[18, 23]"]
+
+# The game itself runs on python 2, so the evaluator is checked there too
+# when it is installed.
+PYTHON2 = ("python2", "python2.7")
+
+def run(python):
+    return subprocess.check_output([python, "-c", SCRIPT], cwd=SRC,
+                                   stderr=subprocess.STDOUT)
+
+def python2():
+    for python in PYTHON2:
+        try:
+            subprocess.check_call([python, "-c", "pass"])
+        except (OSError, subprocess.CalledProcessError):
+            continue
+
+        return python
+
+    return None
+
+def test_space_of_split_arena():
+    arena = Arena(8, 6)
+    for y in range(5):
+        arena.occupy(3, y)
+
+    evaluator = SpaceEvaluator(8, 6)
+    evaluator.load(arena)
+
+    assert evaluator.reachable(0, 0) == 43
+    assert evaluator.reachable(3, 0) == 0
+    assert evaluator.connected((0, 0), (7, 0))
+    assert evaluator.voronoi([(0, 0), (7, 0)]) == [18, 23]
+
+def test_space_on_python2():
+    python = python2()
+    if python is None:
+        pytest.skip("python 2 is not installed")
+
+    assert run(python).decode("ascii").split("\n")[:4] == EXPECTED
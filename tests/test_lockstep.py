@@ -0,0 +1,119 @@
+import random
+import socket
+import time
+
+from Lockstep import LockstepSession, LoopbackTransport, SocketTransport
+from Simulation import TronSimulation, Turn
+
+# A loopback that gives every message its own delay, so later messages
+# can overtake earlier ones, unlike over TCP.
+class ShuffledTransport(LoopbackTransport):
+    def send(self, message):
+        arrival = self.clock() + self.delay + \
+                  self.random.uniform(0, self.jitter)
+        self.peer.queue.append((arrival, message))
+
+    def receive(self):
+        now = self.clock()
+        arrived = [m for m in self.queue if m[0] <= now]
+        self.queue = [m for m in self.queue if m[0] > now]
+
+        return [message for (arrival, message) in arrived]
+
+# A clock that only moves when told to.
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def state(sim):
+    return (sim.ticks, sim.over, sim.arena.cells,
+            [(r.head(), r.direction, r.alive, r.score) for r in sim.riders])
+
+# Plays frames frames on two peers that turn at random, each 60 times a
+# second, with every turn delayed by delay seconds plus up to jitter.
+# Returns the two sessions once both are on the last frame and have every
+# turn.
+def play(transport, frames, delay, jitter):
+    clock = Clock()
+    ends = transport.pair(delay, jitter, seed=1, clock=clock)
+    sessions = [LockstepSession(TronSimulation.duel(64, 48), i, ends[i])
+                for i in range(2)]
+    rng = random.Random(2)
+
+    for step in range(frames * 20):
+        clock.now = step / 60.0
+
+        for session in sessions:
+            if session.frame < frames:
+                if rng.random() < 0.1:
+                    session.turn(rng.choice((Turn.LEFT, Turn.RIGHT)))
+
+                session.advance()
+            else:
+                rollback = session._receive()
+                if rollback is not None:
+                    session._rollback(rollback)
+
+        if all(s.frame == frames and s.confirmedFrame() >= frames - 1
+               for s in sessions):
+            return sessions
+
+    raise AssertionError("the peers never caught up")
+
+def test_peers_agree_with_delay_and_jitter():
+    sessions = play(LoopbackTransport, 600, 0.05, 0.04)
+
+    assert state(sessions[0].sim) == state(sessions[1].sim)
+    assert sessions[0].rollbacks > 0 and sessions[1].rollbacks > 0
+
+def test_peers_agree_when_turns_arrive_out_of_order():
+    sessions = play(ShuffledTransport, 600, 0.05, 0.1)
+
+    assert state(sessions[0].sim) == state(sessions[1].sim)
+
+def test_window_waits_for_a_silent_peer():
+    a, b = LoopbackTransport.pair()
+    session = LockstepSession(TronSimulation.duel(64, 48), 0, a, window=10)
+
+    frames = 0
+    while session.advance():
+        frames += 1
+
+    assert frames == 10
+
+# Returns the two ends of a TCP connection on localhost.
+def connection():
+    listener = socket.socket()
+    listener.bind(("localhost", 0))
+    listener.listen(1)
+
+    client = socket.create_connection(listener.getsockname())
+    server = listener.accept()[0]
+    listener.close()
+
+    return (client, server)
+
+# Calls receive until it returns something or count tries have passed.
+def receive(transport, count=100):
+    for i in range(count):
+        messages = transport.receive()
+        if messages:
+            return messages
+
+        time.sleep(0.01)
+
+    return []
+
+def test_socket_peer_going_away_disconnects():
+    a, b = [SocketTransport(sock) for sock in connection()]
+
+    a.send((0, 0, Turn.LEFT))
+    assert receive(b) == [(0, 0, Turn.LEFT)]
+    assert b.connected
+
+    a.close()
+    assert receive(b, 10) == []
+    assert not b.connected
@@ -0,0 +1,59 @@
+import pygame
+import pytest
+
+import profiler
+import views
+from profiler import ViewProfiler
+
+class Offscreen(object):
+    def __init__(self):
+        self.screen = pygame.Surface((10, 10))
+
+@pytest.fixture
+def viewProfiler():
+    yield ViewProfiler.start()
+    ViewProfiler.stop()
+
+def group(*children):
+    group = views.ViewGroup(Offscreen(), (0, 0))
+    for child in children:
+        group.addChild(child)
+
+    return group
+
+# Made after the profiler starts, like a view from a module imported late.
+def updater():
+    class Updater(views.View):
+        def update(self):
+            self.updates = getattr(self, "updates", 0) + 1
+            super(Updater, self).update()
+
+    return Updater(Offscreen())
+
+def test_views_are_timed_from_their_caller(viewProfiler):
+    child = updater()
+    views.callEach((group(child),), "update")
+
+    assert child.updates == 1
+    assert viewProfiler.classes[("Updater", "update")][0] == 1
+    assert sorted(viewProfiler.stacks) == [
+        ("ViewGroup.update",), ("ViewGroup.update", "Updater.update")]
+
+def test_collapsed_stacks(viewProfiler):
+    views.callEach((group(updater(), updater()),), "draw")
+
+    lines = viewProfiler.collapsed()
+    assert [line.split()[0] for line in lines] == [
+        "ViewGroup.draw", "ViewGroup.draw;Updater.draw"]
+    assert viewProfiler.classes[("Updater", "draw")][0] == 2
+
+def test_nothing_is_timed_once_stopped():
+    started = ViewProfiler.start()
+    assert ViewProfiler.stop() is started
+    assert profiler.current is None and ViewProfiler.stop() is None
+
+    child = updater()
+    views.callEach((group(child),), "update")
+
+    assert child.updates == 1
+    assert started.stacks == {}
@@ -0,0 +1,49 @@
+import random
+
+from Replay import ReplayPlayer, ReplayRecorder
+from Simulation import TronSimulation, Turn
+
+# Records a game of riders riders, where every rider turns now and then,
+# and returns the recording with the blocks of every rider at the end.
+def record(riders, ticks, width=512, height=384):
+    sim = TronSimulation.freeForAll(width, height, riders)
+    recorder = ReplayRecorder(sim)
+    rng = random.Random(riders)
+
+    for tick in range(ticks):
+        if sim.over:
+            recorder.reset()
+
+        actions = [rng.choice((Turn.NONE, Turn.NONE, Turn.LEFT, Turn.RIGHT))
+                   for rider in sim.riders]
+        recorder.step(actions)
+
+    return (recorder.tobytes(), [list(r.blocks) for r in sim.riders])
+
+def play(data, frames):
+    player = ReplayPlayer(data)
+    while not player.done():
+        player.step()
+
+    assert player.frames == frames
+    return [list(r.blocks) for r in player.sim.riders]
+
+def test_round_trip():
+    data, blocks = record(4, 300)
+    assert play(data, 300) == blocks
+
+def test_round_trip_past_127_riders():
+    data, blocks = record(200, 40)
+    assert play(data, 40) == blocks
+
+def test_turn_of_last_rider():
+    sim = TronSimulation.freeForAll(512, 384, 200)
+    recorder = ReplayRecorder(sim)
+
+    actions = [Turn.NONE] * 200
+    actions[199] = Turn.RIGHT
+    recorder.step(actions)
+
+    player = ReplayPlayer(recorder.tobytes())
+    player.step()
+    assert player.sim.riders[199].direction == sim.riders[199].direction
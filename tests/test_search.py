@@ -0,0 +1,84 @@
+import threading
+import time
+
+from Arena import Arena
+from Evaluator import SpaceEvaluator
+from Search import AlphaBeta, SearchThread
+
+# A 5x4 arena with its second row taken. The rider searched for is in
+# the bottom two rows, heading east from (0, 2), and the other is at the
+# end of the top row heading west, with four cells left before it
+# crashes into the west wall.
+WIDTH, HEIGHT = 5, 4
+
+def position():
+    arena = Arena(WIDTH, HEIGHT)
+    for x in range(WIDTH):
+        arena.occupy(x, 1)
+    arena.occupy(0, 2)
+    arena.occupy(4, 0)
+
+    evaluator = SpaceEvaluator(WIDTH, HEIGHT)
+    evaluator.load(arena)
+    stride = evaluator.stride
+
+    return (evaluator.free, 2 * stride, (1, 0), 4, (-1, 0))
+
+def value(search, free, head, direction, other, otherDirection, depth, ply):
+    search._setFree(free)
+    return search._max(free, search._hash, head, direction, other,
+                       otherDirection, depth, -AlphaBeta.WIN * 2,
+                       AlphaBeta.WIN * 2, ply)[0]
+
+def test_win_is_found():
+    search = AlphaBeta(WIDTH, HEIGHT, maxEntries=0)
+    assert value(search, *position(), depth=6, ply=0) == AlphaBeta.WIN - 4
+
+def test_win_from_table_is_counted_from_where_it_is_read():
+    # The same position reached deeper in an earlier search, like the one of
+    # the last tick, is stored with a win that many plies further away.
+    search = AlphaBeta(WIDTH, HEIGHT)
+    assert value(search, *position(), depth=6, ply=3) == AlphaBeta.WIN - 7
+    assert value(search, *position(), depth=6, ply=0) == AlphaBeta.WIN - 4
+
+def test_close_stops_the_thread():
+    search = AlphaBeta(WIDTH, HEIGHT)
+    worker = SearchThread(search)
+    worker.start(position(), 64, budget=60)
+
+    worker.close()
+    assert not worker._thread.is_alive()
+
+# A search that waits to be let go once it is asked for, like a worker
+# that has taken a request but not started on it yet.
+class HeldSearch(AlphaBeta):
+    def __init__(self, width, height):
+        super(HeldSearch, self).__init__(width, height)
+        self.asked = threading.Event()
+        self.go = threading.Event()
+
+    def search(self, *args, **kwargs):
+        self.asked.set()
+        self.go.wait()
+        return super(HeldSearch, self).search(*args, **kwargs)
+
+def test_newer_request_stops_search_that_has_not_started():
+    # On an empty arena this big the old search would take its whole budget.
+    evaluator = SpaceEvaluator(30, 30)
+    evaluator.load(Arena(30, 30))
+    free, row = evaluator.free, 15 * evaluator.stride
+
+    search = HeldSearch(30, 30)
+    worker = SearchThread(search)
+    old = (free, row + 5, (1, 0), row + 25, (-1, 0))
+    new = (free, row + 6, (1, 0), row + 24, (-1, 0))
+
+    start = time.time()
+    worker.start(old, 64, budget=30)
+    search.asked.wait()
+    worker.start(new, 1)
+    search.go.set()
+
+    worker.result(new, 1)
+    worker.close()
+    assert time.time() - start < 10
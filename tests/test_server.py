@@ -0,0 +1,62 @@
+import pytest
+
+from Simulation import TronSimulation
+from TronServer import Room, TronServer
+
+# A transport that never sends anything, so all that is written to it
+# stays in its buffer.
+class StuckTransport(object):
+    def __init__(self):
+        self.buffered = 0
+        self.aborted = False
+
+    def is_closing(self):
+        return self.aborted
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def abort(self):
+        self.aborted = True
+
+class Writer(object):
+    def __init__(self):
+        self.transport = StuckTransport()
+
+    def write(self, data):
+        self.transport.buffered += len(data)
+
+    def close(self):
+        pass
+
+def test_slow_player_is_dropped():
+    room = Room(128, 96, 60, 0)
+    slow, fast = Writer(), Writer()
+    room.join(slow)
+    room.join(fast)
+
+    for tick in range(Room.MAX_BUFFER):
+        if slow.transport.aborted:
+            break
+
+        fast.transport.buffered = 0
+        room.tick(tick)
+
+    assert slow.transport.aborted
+
+    assert slow.transport.buffered <= Room.MAX_BUFFER + 1024
+    assert not fast.transport.aborted
+
+def test_riders_that_do_not_fit():
+    most = TronSimulation.maxRiders(128, 96)
+    TronServer(128, 96, riders=most)
+
+    with pytest.raises(ValueError):
+        TronServer(128, 96, riders=most + 1)
+
+def test_rate_that_can_not_be_sent():
+    TronServer(rate=0xffff)
+
+    for rate in (0, 0x10000):
+        with pytest.raises(ValueError):
+            TronServer(rate=rate)
@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+from pydroid.settings import Settings
+
+# Points Settings at a file of its own holding "old::1", with nothing
+# read or waiting to be written, and puts it back afterwards.
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    path = tmp_path / "settings.txt"
+    path.write_text(u"old::1")
+
+    monkeypatch.setattr(Settings, "SETTINGSFILE", str(path))
+    monkeypatch.setattr(Settings, "WRITE_DELAY", 0.2)
+    monkeypatch.setattr(Settings, "_values", None)
+    monkeypatch.setattr(Settings, "_mtime", None)
+    monkeypatch.setattr(Settings, "_pending", {})
+
+    yield path
+
+    if Settings._writeTimer is not None:
+        Settings._writeTimer.cancel()
+        Settings._writeTimer = None
+
+def test_load_after_save_is_cached(path):
+    Settings.save("new", "2")
+
+    assert Settings.load("new") == "2"
+    assert Settings.load("old") == "1"
+    assert path.read_text() == u"old::1"
+
+def test_nothing_written_before_the_delay(path):
+    Settings.save("new", "2")
+    Settings.save("old", "3")
+    assert path.read_text() == u"old::1"
+
+    time.sleep(Settings.WRITE_DELAY * 5)
+    assert path.read_text() == u"old::3\nnew::2"
+
+def test_flush_writes_now(path):
+    Settings.save("new", "2")
+    Settings.flush()
+
+    assert path.read_text() == u"old::1\nnew::2"
+    assert Settings._writeTimer is None
+
+def test_interrupted_write_leaves_the_old_file(path, monkeypatch):
+    def crash(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", crash)
+    Settings.save("new", "2")
+
+    with pytest.raises(OSError):
+        Settings.flush()
+
+    assert path.read_text() == u"old::1"
+    assert Settings.load("new") == "2"
@@ -0,0 +1,24 @@
+import collections
+
+from pydroid import settings
+
+from SettingsMenu import SettingsMenu
+
+Input = collections.namedtuple("Input", ["regex", "value"])
+
+def accepts(regex, value):
+    return settings.SettingModule.check(Input(regex, value))
+
+def test_riders_from_2_to_255():
+    accepted = [n for n in range(1000)
+                if accepts(SettingsMenu.RIDERS_REGEX, str(n))]
+    assert accepted == list(range(2, 256))
+    assert not accepts(SettingsMenu.RIDERS_REGEX, "02")
+
+def test_board_from_1_to_4096():
+    assert accepts(SettingsMenu.BOARD_REGEX, "1x1")
+    assert accepts(SettingsMenu.BOARD_REGEX, "4096x4096")
+    assert accepts(SettingsMenu.BOARD_REGEX, "128x96")
+
+    for board in ("0x96", "4097x96", "128x5000", "128", "128x", "x96"):
+        assert not accepts(SettingsMenu.BOARD_REGEX, board), board
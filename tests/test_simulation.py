@@ -0,0 +1,30 @@
+import pytest
+
+from Simulation import TronSimulation
+
+BOARDS = [(128, 96), (64, 48), (20, 15), (12, 10), (300, 200), (1000, 30),
+          (4096, 4096)]
+
+@pytest.mark.parametrize("board", BOARDS)
+def test_most_riders_survive_first_tick(board):
+    count = TronSimulation.maxRiders(*board)
+    sim = TronSimulation.freeForAll(board[0], board[1], count)
+    assert len(sim.riders) == count
+
+    assert sim.step() == []
+    assert all(rider.alive for rider in sim.riders)
+
+@pytest.mark.parametrize("board", BOARDS[:5])
+def test_every_count_survives_first_tick(board):
+    for count in range(2, TronSimulation.maxRiders(*board) + 1):
+        sim = TronSimulation.freeForAll(board[0], board[1], count)
+        assert sim.step() == [], count
+
+def test_too_many_riders():
+    most = TronSimulation.maxRiders(128, 96)
+    with pytest.raises(ValueError):
+        TronSimulation.freeForAll(128, 96, most + 1)
+
+def test_max_riders_is_capped():
+    assert TronSimulation.maxRiders(4096, 4096) == TronSimulation.MAX_RIDERS
+    assert TronSimulation.maxRiders(2, 1) == 2
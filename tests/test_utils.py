@@ -0,0 +1,136 @@
+import pygame
+from pygame.locals import KEYDOWN, KEYUP, K_ESCAPE, K_UP, K_a
+
+from pydroid import utils
+
+RATE = 60
+
+def key(type, code):
+    return pygame.event.Event(type, key=code)
+
+# Starts a countdown of seconds on a scheduler advanced a tick at a time,
+# and returns the ticks that start returned on and that each callback ran
+# on.
+def countdown(seconds, ticks):
+    scheduler = utils.Scheduler()
+    timer = utils.Timer(seconds)
+    calls = []
+    timer.onTick = lambda left: calls.append((tick, left))
+    timer.onFinish = lambda: calls.append((tick, "finish"))
+
+    tick = 0
+    timer.start(scheduler)
+    started = (tick, timer.running(), scheduler.pending())
+
+    for tick in range(1, ticks + 1):
+        scheduler.advance(1.0 / RATE)
+
+    return (started, calls, timer)
+
+def test_countdown_runs_on_the_scheduler():
+    started, calls, timer = countdown(3, 4 * RATE)
+
+    # start only shows the first second and leaves the rest scheduled.
+    assert started == (0, True, 1)
+    assert calls == [(0, 3), (RATE, 2), (2 * RATE, 1),
+                     (3 * RATE, "finish")]
+    assert not timer.running()
+
+def test_countdown_waits_for_the_scheduler():
+    started, calls, timer = countdown(3, RATE - 1)
+
+    assert calls == [(0, 3)]
+    assert timer.running()
+
+def test_cancelled_countdown_never_finishes():
+    scheduler = utils.Scheduler()
+    timer = utils.Timer(2)
+    finished = []
+    timer.onFinish = lambda: finished.append(True)
+
+    timer.start(scheduler)
+    scheduler.advance(1)
+    timer.cancel()
+    scheduler.advance(5)
+
+    assert finished == []
+    assert scheduler.pending() == 0
+
+# Records the callbacks that run, by name.
+class Recorder(utils.EventHandler):
+    def __init__(self):
+        super(Recorder, self).__init__()
+        self.calls = []
+
+    def record(self, e, name):
+        self.calls.append(name)
+
+def test_exact_then_multiple_then_type():
+    handler = Recorder()
+    handler.addEventCallback((KEYDOWN, None), handler.record, "type")
+    handler.addEventCallback((KEYDOWN, (K_UP, K_a)), handler.record, "up a")
+    handler.addEventCallback((KEYDOWN, K_a), handler.record, "a")
+    handler.addEventCallback((KEYDOWN, (K_ESCAPE, K_a)), handler.record,
+                             "escape a")
+    handler.addEventCallback((KEYUP, K_a), handler.record, "up")
+
+    handler.handleEvent(key(KEYDOWN, K_a))
+    assert handler.calls == ["a", "up a", "escape a", "type"]
+
+    del handler.calls[:]
+    handler.handleEvent(key(KEYDOWN, K_ESCAPE))
+    assert handler.calls == ["escape a", "type"]
+
+def test_readding_keeps_the_order_of_multiple_keys():
+    handler = Recorder()
+    handler.addEventCallback((KEYDOWN, (K_UP, K_a)), handler.record, "first")
+    handler.addEventCallback((KEYDOWN, (K_a, K_ESCAPE)), handler.record,
+                             "second")
+    handler.addEventCallback((KEYDOWN, (K_UP, K_a)), handler.record, "again")
+
+    handler.handleEvent(key(KEYDOWN, K_a))
+    assert handler.calls == ["again", "second"]
+
+    handler.removeEventCallback((KEYDOWN, (K_UP, K_a)))
+    handler.addEventCallback((KEYDOWN, (K_UP, K_a)), handler.record, "last")
+
+    del handler.calls[:]
+    handler.handleEvent(key(KEYDOWN, K_a))
+    assert handler.calls == ["second", "last"]
+
+def test_callbacks_removed_while_dispatching_do_not_run():
+    handler = Recorder()
+
+    def remove(e):
+        handler.calls.append("remove")
+        handler.removeEventCallback((KEYDOWN, (K_a, K_UP)))
+        handler.removeEventCallback((KEYDOWN, None))
+
+    handler.addEventCallback((KEYDOWN, K_a), remove)
+    handler.addEventCallback((KEYDOWN, (K_a, K_UP)), handler.record, "multi")
+    handler.addEventCallback((KEYDOWN, None), handler.record, "type")
+
+    handler.handleEvent(key(KEYDOWN, K_a))
+    assert handler.calls == ["remove"]
+    assert handler.handlesType(KEYDOWN)
+
+    handler.handleEvent(key(KEYDOWN, K_UP))
+    assert handler.calls == ["remove"]
+
+def test_callback_removing_itself_and_a_later_one():
+    handler = Recorder()
+
+    def first(e):
+        handler.calls.append("first")
+        handler.removeEventCallback((KEYDOWN, (K_a, K_UP)))
+        handler.removeEventCallback((KEYDOWN, (K_a, K_ESCAPE)))
+
+    handler.addEventCallback((KEYDOWN, (K_a, K_UP)), first)
+    handler.addEventCallback((KEYDOWN, (K_a, K_ESCAPE)), handler.record,
+                             "second")
+
+    handler.handleEvent(key(KEYDOWN, K_a))
+    handler.handleEvent(key(KEYDOWN, K_a))
+
+    assert handler.calls == ["first"]
+    assert not handler.handlesType(KEYDOWN)